@@ -0,0 +1,112 @@
+"""
+Micro-benchmark of accessing read-only properties of entities.
+
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from argparse import ArgumentParser, Namespace
+from functools import partial
+import sys
+from timeit import repeat
+from typing import Any, Callable, Dict, Type
+from bigboat.client import Client_v2
+from bigboat.instance import Instance
+
+PROPERTIES = ("name", "current_state", "desired_state", "application",
+              "services", "parameters", "options")
+
+def parse_args() -> Namespace:
+    """
+    Parse command line arguments.
+    """
+
+    parser = ArgumentParser(description='Measure property access of entities')
+    parser.add_argument('--number', type=int, default=1000000,
+                        help='Number of accesses per measurement')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Number of measurements, of which the best is used')
+    return parser.parse_args()
+
+def _get_property(property_name: str, instance: object) -> Any:
+    return getattr(instance, property_name)
+
+def partial_readonly(subject: Type) -> Type:
+    """
+    Register read-only properties in the way of earlier versions, which use
+    a partial function for each property, for comparison.
+    """
+
+    for property_name in PROPERTIES:
+        setattr(subject, property_name,
+                property(fget=partial(_get_property, f'_{property_name}')))
+
+    return subject
+
+@partial_readonly
+class PartialInstance(Instance):
+    """
+    Instance entity with properties and missing attribute handling of earlier
+    versions.
+    """
+
+    __slots__ = ()
+
+    def __getattr__(self, attr: str) -> Any:
+        raise AttributeError
+
+def measure(statement: str, instance: Instance, args: Namespace) -> float:
+    """
+    Measure the best time in nanoseconds per execution of a statement.
+    """
+
+    timings = repeat(statement, globals={'instance': instance},
+                     number=args.number, repeat=args.repeat)
+    return min(timings) / args.number * 1e9
+
+def main() -> int:
+    """
+    Main entry point.
+    """
+
+    args = parse_args()
+    client = Client_v2('http://bigboat.example', 'api-key')
+    classes: Dict[str, Callable[..., Instance]] = {
+        'partial': PartialInstance,
+        'readonly': Instance
+    }
+    statements = {
+        'name': 'instance.name',
+        'current_state': 'instance.current_state',
+        'missing': "hasattr(instance, 'missing')"
+    }
+    for statement_name, statement in statements.items():
+        timings = {
+            class_name: measure(statement,
+                                cls(client, 'nginx', current_state='running'),
+                                args)
+            for class_name, cls in classes.items()
+        }
+        print(f'{statement_name}: ' +
+              ', '.join(f'{class_name} {timing:.1f} ns'
+                        for class_name, timing in timings.items()) +
+              f' (speedup {timings["partial"] / timings["readonly"]:.2f}x)')
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Benchmark of parsing application definitions of the v1 API with the pure
+Python loader, the libyaml loader and the parser of top-level fields.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from argparse import ArgumentParser, Namespace
+from functools import partial
+import sys
+from timeit import repeat
+from typing import Any, Callable, Dict
+import yaml
+from bigboat.appdef import SafeLoader, load_appdef, load_fields
+
+def parse_args() -> Namespace:
+    """
+    Parse command line arguments.
+    """
+
+    parser = ArgumentParser(description='Measure parsing of appdefs')
+    parser.add_argument('--services', type=int, default=200,
+                        help='Number of services in the appdef')
+    parser.add_argument('--number', type=int, default=5,
+                        help='Number of parses per measurement')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Number of measurements, of which the best is used')
+    return parser.parse_args()
+
+def create_appdef(count: int) -> str:
+    """
+    Create a large application definition with name and version at the start.
+    """
+
+    document: Dict[str, Any] = {'name': 'large-app', 'version': '1.0'}
+    for index in range(count):
+        document[f'service-{index}'] = {
+            'image': f'registry.example/service-{index}:latest',
+            'environment': {f'SETTING_{key}': f'value-{key}'
+                            for key in range(20)},
+            'volumes': [f'/data/{index}/{key}:/mnt/{key}' for key in range(5)],
+            'ports': [f'{8000 + index}/tcp'],
+            'labels': {'bigboat.service.type': 'service'}
+        }
+
+    return yaml.dump(document, Dumper=yaml.SafeDumper, sort_keys=False)
+
+def measure(function: Callable[[], Any], args: Namespace) -> float:
+    """
+    Measure the best time in milliseconds per call of a function.
+    """
+
+    timings = repeat(function, number=args.number, repeat=args.repeat)
+    return min(timings) / args.number * 1e3
+
+def main() -> int:
+    """
+    Main entry point.
+    """
+
+    args = parse_args()
+    text = create_appdef(args.services).encode('utf-8')
+    print(f'appdef with {args.services} services ({len(text)} bytes), '
+          f'loader {SafeLoader.__name__}')
+    paths: Dict[str, Callable[[], Any]] = {
+        'safe_load': partial(yaml.safe_load, text),
+        'load_appdef': partial(load_appdef, text),
+        'load_fields': partial(load_fields, text, ('name', 'version'))
+    }
+    for name, function in paths.items():
+        print(f'{name}: {measure(function, args):.2f} ms')
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Benchmark of decoding JSON responses with the available backends.
+Decoding is measured by itself and as part of parsing entities by the client.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from argparse import ArgumentParser, Namespace
+from functools import partial
+from importlib import import_module
+import json
+import sys
+from timeit import repeat
+from typing import Any, Callable, Dict, List
+from requests.models import Response
+from bigboat.client import Client_v2
+from bigboat.decode import BACKENDS, Decoder
+from .server import instance_listing, status_listing
+
+def parse_args() -> Namespace:
+    """
+    Parse command line arguments.
+    """
+
+    parser = ArgumentParser(description='Measure decoding of JSON responses')
+    parser.add_argument('--instances', type=int, default=10000,
+                        help='Number of instances in the listing')
+    parser.add_argument('--statuses', type=int, default=500,
+                        help='Number of status items in the listing')
+    parser.add_argument('--number', type=int, default=5,
+                        help='Number of decodes per measurement')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Number of measurements, of which the best is used')
+    return parser.parse_args()
+
+def get_backends() -> Dict[str, Decoder]:
+    """
+    Retrieve the decoders of the installed backends.
+    """
+
+    backends: Dict[str, Decoder] = {}
+    for name in BACKENDS:
+        try:
+            backends[name] = import_module(name).loads
+        except ImportError:
+            print(f'{name}: not installed')
+
+    return backends
+
+def create_response(body: bytes) -> Response:
+    """
+    Create a response with a JSON body as received by the client.
+    """
+
+    response = Response()
+    response.status_code = 200
+    response.headers['Content-Type'] = 'application/json'
+    response._content = body # pylint: disable=protected-access
+    return response
+
+def measure(function: Callable[[], Any], args: Namespace) -> float:
+    """
+    Measure the best time in milliseconds per call of a function.
+    """
+
+    timings = repeat(function, number=args.number, repeat=args.repeat)
+    return min(timings) / args.number * 1e3
+
+def main() -> int:
+    """
+    Main entry point.
+    """
+
+    args = parse_args()
+    payloads: Dict[str, List[Dict[str, Any]]] = {
+        'instances': instance_listing(args.instances),
+        'status': status_listing(args.statuses)
+    }
+    backends = get_backends()
+    for path, payload in payloads.items():
+        body = json.dumps(payload).encode('utf-8')
+        response = create_response(body)
+        print(f'{path} ({len(body)} bytes): ' +
+              f'response.json() {measure(response.json, args):.2f} ms')
+        for name, decoder in backends.items():
+            client = Client_v2('http://bigboat.example', 'api-key',
+                               decoder=decoder)
+            # pylint: disable=protected-access
+            parse: Callable[[Response], Any] = client._parse_statuses
+            if path == 'instances':
+                parse = client._parse_instances
+            decode = measure(partial(decoder, body), args)
+            total = measure(partial(parse, response), args)
+            print(f'  {name}: decode {decode:.2f} ms, parse {total:.2f} ms')
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
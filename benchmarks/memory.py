@@ -0,0 +1,92 @@
+"""
+Benchmark of the memory used by instance and application entities.
+
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from argparse import ArgumentParser, Namespace
+import gc
+import json
+import sys
+import tracemalloc
+from typing import Any, Dict, List
+from bigboat.client import Client_v2
+from bigboat.instance import Instance
+
+def parse_args() -> Namespace:
+    """
+    Parse command line arguments.
+    """
+
+    parser = ArgumentParser(description='Measure memory of instance entities')
+    parser.add_argument('--count', type=int, default=10000,
+                        help='Number of instances to create')
+    return parser.parse_args()
+
+def create_instances(client: Client_v2, payload: List[Dict[str, Any]]) -> \
+        List[Instance]:
+    """
+    Create instance entities from a listing of instances from the API.
+    """
+
+    # pylint: disable=protected-access
+    return [client._format_instance(item) for item in payload]
+
+def measure(count: int) -> int:
+    """
+    Measure the number of bytes retained by the entities of a number of
+    instances, including the parsed data that the entities refer to.
+    """
+
+    client = Client_v2('http://bigboat.example', 'api-key')
+    payload = [
+        {
+            'name': f'instance-{index}',
+            'state': {'current': 'running', 'desired': 'running'},
+            'app': {'name': 'app', 'version': '1.0'},
+            'services': {'www': {'state': 'running'}}
+        }
+        for index in range(count)
+    ]
+
+    text = json.dumps(payload)
+
+    gc.collect()
+    tracemalloc.start()
+    instances = create_instances(client, json.loads(text))
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del instances
+
+    return size
+
+def main() -> int:
+    """
+    Main entry point.
+    """
+
+    args = parse_args()
+    size = measure(args.count)
+    print(f'{args.count} instances: {size} bytes '
+          f'({size / args.count:.1f} bytes per instance, '
+          f'{size * 10000 / args.count / 1024:.1f} KiB per 10k instances)')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
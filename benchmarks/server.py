@@ -0,0 +1,249 @@
+"""
+In-process HTTP server which imitates the BigBoat API for benchmarks.
+
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+from threading import Thread
+from time import sleep
+from types import TracebackType
+from typing import Any, Dict, List, NamedTuple, Optional, Type
+
+class Route(NamedTuple):
+    """
+    A fixed response of the server.
+    """
+
+    content_type: str
+    body: bytes
+    status: int = 200
+
+def json_route(payload: Any, status: int = 200) -> Route:
+    """
+    Create a route with a JSON response.
+    """
+
+    return Route('application/json', json.dumps(payload).encode('utf-8'),
+                 status)
+
+def text_route(text: str, content_type: str = 'text/plain',
+               status: int = 200) -> Route:
+    """
+    Create a route with a text response.
+    """
+
+    return Route(content_type, text.encode('utf-8'), status)
+
+def app_listing(count: int) -> List[Dict[str, Any]]:
+    """
+    Create a payload of a listing of applications from the v2 API.
+    """
+
+    return [
+        {'id': f'app-id-{index}', 'name': f'app-{index}', 'version': '1.0'}
+        for index in range(count)
+    ]
+
+def instance_listing(count: int, services: int = 2,
+                     apps: int = 10) -> List[Dict[str, Any]]:
+    """
+    Create a payload of a listing of instances from the v2 API.
+    """
+
+    return [
+        {
+            'id': f'id-{index}',
+            'name': f'instance-{index}',
+            'state': {'current': 'running', 'desired': 'running'},
+            'app': {'name': f'app-{index % apps}', 'version': '1.0'},
+            'services': {
+                f'service-{number}': {
+                    'state': 'running',
+                    'container': {'id': f'container-{index}-{number}'},
+                    'ports': [f'{8000 + number}/tcp']
+                }
+                for number in range(services)
+            },
+            'parameters': {},
+            'options': {}
+        }
+        for index in range(count)
+    ]
+
+def status_listing(count: int) -> List[Dict[str, Any]]:
+    """
+    Create a payload of a listing of status items from the v2 API.
+    """
+
+    return [
+        {
+            'name': f'check-{index}',
+            'title': f'Check {index}',
+            'description': 'Status of a component of the dashboard',
+            'isOk': index % 7 != 0,
+            'lastCheck': {
+                'ISO': '2024-01-01T00:00:00.000Z',
+                'epoch': 1704067200000 + index
+            }
+        }
+        for index in range(count)
+    ]
+
+def fleet_routes(apps: int = 10, instances: int = 100, services: int = 2,
+                 statuses: int = 20) -> Dict[str, Route]:
+    """
+    Create the routes of the v1 and v2 APIs for a dashboard with a number of
+    applications, instances with services, and status items. The first
+    application is 'app-0' with version '1.0' and the first instance is
+    'instance-0'.
+    """
+
+    apps = max(1, apps)
+    instance_items = instance_listing(instances, services=services, apps=apps)
+    names = [item['name'] for item in instance_items]
+    compose = 'www:\n  image: nginx\n'
+    app = {'name': 'app-0', 'version': '1.0'}
+    instance = instance_listing(1, services=services, apps=apps)[0]
+    routes = {
+        '/api/v1/instances': json_route({
+            'statusCode': 200, 'instances': names
+        }),
+        '/api/v1/appdef/app-0/1.0': text_route(
+            'name: app-0\nversion: "1.0"\n' + compose, 'text/yaml'
+        ),
+        'DELETE /api/v1/appdef/app-0/1.0': text_route(''),
+        '/api/v1/state/instance-0': text_route('active'),
+        '/api/v1/start-app/app-0/1.0/instance-0': text_route(''),
+        '/api/v1/stop-app/instance-0': text_route(''),
+        '/api/v2/apps': json_route(app_listing(apps)),
+        '/api/v2/apps/app-0/1.0': json_route(app),
+        'PUT /api/v2/apps/app-0/1.0': json_route(app, 201),
+        'DELETE /api/v2/apps/app-0/1.0': json_route({}),
+        '/api/v2/instances': json_route(instance_items),
+        '/api/v2/instances/instance-0': json_route(instance),
+        'PUT /api/v2/instances/instance-0': json_route(instance, 201),
+        'DELETE /api/v2/instances/instance-0': json_route(instance),
+        '/api/v2/status': json_route(status_listing(statuses))
+    }
+    for file_name in ('dockerCompose', 'bigboatCompose'):
+        path = f'/api/v2/apps/app-0/1.0/files/{file_name}'
+        routes[path] = text_route(compose)
+        routes[f'PUT {path}'] = text_route('', status=201)
+
+    return routes
+
+class FakeRequestHandler(BaseHTTPRequestHandler):
+    """
+    Request handler which provides fixed responses for paths.
+    """
+
+    server: 'FakeServer'
+    protocol_version = 'HTTP/1.1'
+    # Send small responses immediately instead of waiting for acknowledgments
+    disable_nagle_algorithm = True
+
+    def _respond(self) -> None:
+        # Read the request body, such that the connection can be reused.
+        length = int(self.headers.get('Content-Length', 0))
+        if length:
+            self.rfile.read(length)
+
+        if self.server.delay > 0:
+            sleep(self.server.delay)
+
+        route = self.server.routes.get(f'{self.command} {self.path}')
+        if route is None and self.command == 'GET':
+            route = self.server.routes.get(self.path)
+        if route is None:
+            self.send_error(404)
+            return
+
+        self.send_response(route.status)
+        self.send_header('Content-Type', route.content_type)
+        self.send_header('Content-Length', str(len(route.body)))
+        self.end_headers()
+        self.wfile.write(route.body)
+
+    def do_GET(self) -> None: # pylint: disable=invalid-name
+        """
+        Handle a GET request.
+        """
+
+        self._respond()
+
+    def do_PUT(self) -> None: # pylint: disable=invalid-name
+        """
+        Handle a PUT request.
+        """
+
+        self._respond()
+
+    def do_DELETE(self) -> None: # pylint: disable=invalid-name
+        """
+        Handle a DELETE request.
+        """
+
+        self._respond()
+
+    def log_message(self, format: str, # pylint: disable=redefined-builtin
+                    *args: Any) -> None:
+        pass
+
+class FakeServer(ThreadingHTTPServer):
+    """
+    HTTP server on a local port which runs in a background thread while it
+    is used as a context manager.
+
+    Args:
+        routes (dict): Responses by request paths of GET requests, or by HTTP
+            methods and paths separated by a space, such as 'PUT /api/v2/apps'.
+        delay (float): The number of seconds to wait before each response,
+            which imitates the processing time of a dashboard.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, routes: Dict[str, Route], delay: float = 0.0):
+        super().__init__(('127.0.0.1', 0), FakeRequestHandler)
+        self.routes = routes
+        self.delay = delay
+        self._thread: Optional[Thread] = None
+
+    @property
+    def url(self) -> str:
+        """
+        The base URL of the server.
+        """
+
+        host, port = self.server_address[:2]
+        return f'http://{host!s}:{port}'
+
+    def __enter__(self) -> 'FakeServer':
+        self._thread = Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]],
+                 exc_value: Optional[BaseException],
+                 traceback: Optional[TracebackType]) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
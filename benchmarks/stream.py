@@ -0,0 +1,132 @@
+"""
+Benchmark of retrieving a large listing of instances as a list or by
+streaming and parsing the response incrementally.
+
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from argparse import ArgumentParser, Namespace
+import json
+import resource
+import subprocess
+import sys
+from time import perf_counter
+from typing import Dict, Iterable, Union
+from bigboat.client import Client_v2
+from bigboat.instance import Instance
+from .server import FakeServer, instance_listing, json_route
+
+MODES = ('list', 'iter')
+
+def parse_args() -> Namespace:
+    """
+    Parse command line arguments.
+    """
+
+    parser = ArgumentParser(description='Compare instance listing methods')
+    parser.add_argument('--count', type=int, default=50000,
+                        help='Number of instances in the listing')
+    parser.add_argument('--mode', choices=MODES, default=None,
+                        help='Measure one method against a server URL')
+    parser.add_argument('--url', default=None,
+                        help='Base URL of the server to measure against')
+    return parser.parse_args()
+
+def consume(instances: Iterable[Instance], start: float) -> \
+        Dict[str, Union[int, float]]:
+    """
+    Count the running instances and the time until the first instance.
+    """
+
+    first = 0.0
+    running = 0
+    for instance in instances:
+        if not first:
+            first = perf_counter() - start
+        if instance.current_state == 'running':
+            running += 1
+
+    return {'first': first, 'running': running}
+
+def peak_rss() -> int:
+    """
+    Determine the peak resident set size of the process in KiB.
+    """
+
+    # The peak from resource usage includes that of a parent process before
+    # the process was started, so prefer the high water mark of Linux.
+    try:
+        with open('/proc/self/status', encoding='utf-8') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def measure(mode: str, url: str) -> Dict[str, Union[int, float]]:
+    """
+    Measure one method of retrieving the instances.
+    """
+
+    client = Client_v2(url, 'api-key')
+    baseline = peak_rss()
+    start = perf_counter()
+    if mode == 'list':
+        result = consume(client.instances(), start)
+    else:
+        result = consume(client.iter_instances(), start)
+
+    result['total'] = perf_counter() - start
+    result['peak'] = peak_rss()
+    result['increase'] = result['peak'] - baseline
+    return result
+
+def main() -> int:
+    """
+    Main entry point.
+    """
+
+    args = parse_args()
+    if args.mode is not None:
+        print(json.dumps(measure(args.mode, args.url)))
+        return 0
+
+    route = json_route(instance_listing(args.count))
+    body = route.body
+    routes = {'/api/v2/instances': route}
+    with FakeServer(routes) as server:
+        # Measure each method in a separate process to determine its peak
+        # resident set size
+        for mode in MODES:
+            process = subprocess.run([
+                sys.executable, '-m', 'benchmarks.stream', '--mode', mode,
+                '--url', server.url
+            ], check=True, capture_output=True, text=True)
+            result = json.loads(process.stdout)
+            print(f'{mode}: {args.count} instances ({len(body)} bytes), '
+                  f'first item after {result["first"] * 1000:.1f} ms, '
+                  f'total {result["total"] * 1000:.1f} ms, '
+                  f'peak RSS {result["peak"]} KiB '
+                  f'(increase {result["increase"]} KiB)')
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,265 @@
+"""
+Benchmark suite of the methods of the v1 and v2 clients against a local
+server which imitates a BigBoat dashboard with a configurable fleet.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from argparse import ArgumentParser, Namespace
+from functools import partial
+import json
+import platform
+import sys
+from time import perf_counter, process_time, thread_time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, \
+    Union
+from bigboat.application import Application
+from bigboat.client import Client, Client_v1, Client_v2
+from bigboat.instance import Instance
+from .server import FakeServer, fleet_routes
+
+Result = Dict[str, Union[str, int, float]]
+Operation = Callable[[], Any]
+
+# Methods which perform their requests in worker threads, whose CPU time is
+# measured for the entire process instead of the calling thread
+THREADED: Tuple[str, ...] = (
+    'get_instances', 'update_instances', 'delete_instances', 'wait_for_states'
+)
+
+def parse_args() -> Namespace:
+    """
+    Parse command line arguments.
+    """
+
+    parser = ArgumentParser(description='Measure the methods of the clients')
+    parser.add_argument('--apps', type=int, default=10,
+                        help='Number of applications of the dashboard')
+    parser.add_argument('--instances', type=int, default=100,
+                        help='Number of instances of the dashboard')
+    parser.add_argument('--services', type=int, default=2,
+                        help='Number of services of each instance')
+    parser.add_argument('--statuses', type=int, default=20,
+                        help='Number of status items of the dashboard')
+    parser.add_argument('--number', type=int, default=200,
+                        help='Number of calls of each method')
+    parser.add_argument('--warmup', type=int, default=10,
+                        help='Number of calls before measuring each method')
+    parser.add_argument('--allocations', type=int, default=10,
+                        help='Number of calls to trace allocations of')
+    parser.add_argument('--method', action='append', default=None,
+                        help='Only measure methods whose name, such as '
+                             "'v2.instances', contains this value "
+                             '(repeatable)')
+    parser.add_argument('--output', default=None,
+                        help='JSON file to write the results to')
+    parser.add_argument('--baseline', default=None,
+                        help='JSON file of an earlier run to compare with')
+    return parser.parse_args()
+
+def get_operations(client_v1: Client, client_v2: Client_v2) -> \
+        Dict[str, Operation]:
+    """
+    Create the calls of the client methods to measure, by name.
+    """
+
+    names = ['instance-0']
+    operations: Dict[str, Operation] = {}
+    for prefix, client in (('v1', client_v1), ('v2', client_v2)):
+        operations.update({
+            f'{prefix}.apps': client.apps,
+            f'{prefix}.get_app': partial(client.get_app, 'app-0', '1.0'),
+            f'{prefix}.update_app': partial(client.update_app, 'app-0', '1.0'),
+            f'{prefix}.delete_app': partial(client.delete_app, 'app-0', '1.0'),
+            f'{prefix}.instances': client.instances,
+            f'{prefix}.iter_instances': partial(consume, client.iter_instances),
+            f'{prefix}.get_instance': partial(client.get_instance,
+                                              'instance-0'),
+            f'{prefix}.get_instances': partial(client.get_instances, names),
+            f'{prefix}.update_instance': partial(client.update_instance,
+                                                 'instance-0', 'app-0', '1.0'),
+            f'{prefix}.delete_instance': partial(client.delete_instance,
+                                                 'instance-0'),
+            f'{prefix}.update_instances': partial(
+                client.update_instances,
+                [get_instance(client, names[0])]
+            ),
+            f'{prefix}.delete_instances': partial(client.delete_instances,
+                                                  names),
+            f'{prefix}.wait_for_states': partial(
+                client.wait_for_states, {names[0]: 'running'}, timeout=10.0
+            ),
+            f'{prefix}.watch_instances': partial(first, client.watch_instances)
+        })
+
+    operations.update({
+        'v2.get_compose': partial(client_v2.get_compose, 'app-0', '1.0',
+                                  'dockerCompose'),
+        'v2.update_compose': partial(client_v2.update_compose, 'app-0', '1.0',
+                                     'dockerCompose',
+                                     'www:\n  image: nginx\n'),
+        'v2.statuses': client_v2.statuses
+    })
+    return operations
+
+def get_instance(client: Client, name: str) -> Instance:
+    """
+    Create an instance of the first application to start with a client.
+    """
+
+    return Instance(client, name,
+                    application=Application(client, 'app-0', '1.0'))
+
+def first(method: Callable[[], Iterable[Any]]) -> Any:
+    """
+    Retrieve the first item of an iterator method.
+    """
+
+    return next(iter(method()))
+
+def consume(method: Callable[[], Iterable[Any]]) -> List[Any]:
+    """
+    Retrieve all items of an iterator method.
+    """
+
+    return list(method())
+
+def percentile(latencies: List[float], fraction: float) -> float:
+    """
+    Determine a percentile of sorted latencies by the nearest rank.
+    """
+
+    index = max(0, min(len(latencies) - 1,
+                       int(round(fraction * len(latencies))) - 1))
+    return latencies[index]
+
+def measure(name: str, operation: Operation, args: Namespace) -> Result:
+    """
+    Measure the throughput, latency, CPU time and allocations of calls of
+    a client method. The CPU time is that of the calling thread, or that of
+    the process for methods which use worker threads, which then includes
+    the CPU time of the server.
+    """
+
+    for _ in range(args.warmup):
+        operation()
+
+    threaded = name.split('.')[-1] in THREADED
+    clock = process_time if threaded else thread_time
+    latencies: List[float] = []
+    cpu_start = clock()
+    start = perf_counter()
+    for _ in range(args.number):
+        call_start = perf_counter()
+        operation()
+        latencies.append(perf_counter() - call_start)
+
+    elapsed = perf_counter() - start
+    cpu = clock() - cpu_start
+    latencies.sort()
+
+    # Allocations are traced separately since tracing slows down the calls.
+    # The traced memory includes that of the server thread.
+    peak = 0
+    if args.allocations > 0:
+        tracemalloc.start()
+        for _ in range(args.allocations):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            operation()
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+        tracemalloc.stop()
+
+    return {
+        'calls_per_second': args.number / elapsed,
+        'p50_ms': percentile(latencies, 0.5) * 1e3,
+        'p99_ms': percentile(latencies, 0.99) * 1e3,
+        'cpu_ms_per_call': cpu / args.number * 1e3,
+        'cpu_clock': 'process' if threaded else 'thread',
+        'peak_alloc_kib': peak / 1024
+    }
+
+def load_baseline(path: Optional[str]) -> Dict[str, Result]:
+    """
+    Read the results of an earlier run.
+    """
+
+    if path is None:
+        return {}
+
+    with open(path, 'r', encoding='utf-8') as baseline_file:
+        return json.load(baseline_file)['results']
+
+def format_result(name: str, result: Result,
+                  baseline: Optional[Result]) -> str:
+    """
+    Format the result of a method for display.
+    """
+
+    text = (f'{name}: {result["calls_per_second"]:.0f} calls/s, '
+            f'p50 {result["p50_ms"]:.2f} ms, p99 {result["p99_ms"]:.2f} ms, '
+            f'CPU {result["cpu_ms_per_call"]:.2f} ms/call '
+            f'({result["cpu_clock"]}), '
+            f'peak allocations {result["peak_alloc_kib"]:.1f} KiB')
+    if baseline is not None:
+        ratio = float(result['calls_per_second']) / \
+            float(baseline['calls_per_second'])
+        text += f' ({ratio:.2f}x throughput of baseline)'
+
+    return text
+
+def main() -> int:
+    """
+    Main entry point.
+    """
+
+    args = parse_args()
+    fleet = {
+        'apps': args.apps,
+        'instances': args.instances,
+        'services': args.services,
+        'statuses': args.statuses
+    }
+    baseline = load_baseline(args.baseline)
+    results: Dict[str, Result] = {}
+    with FakeServer(fleet_routes(**fleet)) as server:
+        with Client_v1(server.url) as client_v1, \
+                Client_v2(server.url, 'api-key') as client_v2:
+            operations = get_operations(client_v1, client_v2)
+            selected: List[Tuple[str, Operation]] = [
+                (name, operation) for name, operation in operations.items()
+                if args.method is None or
+                any(part in name for part in args.method)
+            ]
+            for name, operation in selected:
+                results[name] = measure(name, operation, args)
+                print(format_result(name, results[name], baseline.get(name)))
+
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump({
+                'fleet': fleet,
+                'number': args.number,
+                'python': platform.python_version(),
+                'results': results
+            }, output_file, indent=4)
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Stress test of a thread-safe v2 client which is used by many threads at the
+same time against a local server which imitates a BigBoat dashboard.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from argparse import ArgumentParser, Namespace
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import sys
+from time import perf_counter
+from typing import Any, Callable, List, Tuple
+from bigboat.client import Client_v2
+from .server import FakeServer, fleet_routes
+
+Check = Tuple[Callable[[], Any], Callable[[Any], bool]]
+
+def parse_args() -> Namespace:
+    """
+    Parse command line arguments.
+    """
+
+    parser = ArgumentParser(description='Measure a thread-safe client used by '
+                                        'many threads')
+    parser.add_argument('--threads', type=int, nargs='+',
+                        default=[1, 2, 4, 8, 16, 32],
+                        help='Numbers of threads to measure')
+    parser.add_argument('--number', type=int, default=2000,
+                        help='Number of calls for each number of threads')
+    parser.add_argument('--instances', type=int, default=20,
+                        help='Number of instances of the dashboard')
+    parser.add_argument('--statuses', type=int, default=20,
+                        help='Number of status items of the dashboard')
+    parser.add_argument('--delay', type=float, default=0.002,
+                        help='Seconds that the server waits before responding')
+    parser.add_argument('--shared', action='store_true', default=False,
+                        help='Use one shared session instead of a session '
+                             'pool, for comparison')
+    return parser.parse_args()
+
+def get_checks(client: Client_v2, args: Namespace) -> List[Check]:
+    """
+    Create the calls to perform with a function that checks their results.
+    """
+
+    return [
+        (partial(client.get_instance, 'instance-0'),
+         lambda instance: instance is not None and
+         instance.name == 'instance-0'),
+        (client.instances,
+         lambda instances: len(instances) == args.instances),
+        (client.statuses,
+         lambda statuses: len(statuses) == args.statuses),
+        (partial(client.update_instance, 'instance-0', 'app-0', '1.0'),
+         lambda instance: instance is not None and
+         instance.application.version == '1.0')
+    ]
+
+def perform(check: Check) -> bool:
+    """
+    Perform a call and check whether its result is correct.
+    """
+
+    operation, valid = check
+    try:
+        return bool(valid(operation()))
+    except Exception: # pylint: disable=broad-exception-caught
+        return False
+
+def measure(url: str, threads: int, args: Namespace) -> Tuple[float, int]:
+    """
+    Measure the throughput of calls by a number of threads which use the
+    same client, as well as the number of incorrect results.
+    """
+
+    # Identical requests are not coalesced such that every call is performed.
+    with Client_v2(url, 'api-key', pool_maxsize=threads, coalesce=False,
+                   thread_safe=not args.shared) as client:
+        checks = get_checks(client, args)
+        calls = [checks[index % len(checks)] for index in range(args.number)]
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(perform, calls[:threads]))
+            start = perf_counter()
+            results = list(executor.map(perform, calls))
+            elapsed = perf_counter() - start
+
+    return args.number / elapsed, results.count(False)
+
+def main() -> int:
+    """
+    Main entry point.
+    """
+
+    args = parse_args()
+    routes = fleet_routes(instances=args.instances, statuses=args.statuses)
+    failed = 0
+    with FakeServer(routes, delay=args.delay) as server:
+        single = None
+        for threads in args.threads:
+            throughput, errors = measure(server.url, threads, args)
+            if single is None:
+                single = throughput
+            failed += errors
+            print(f'{threads} threads: {throughput:.0f} calls/s, '
+                  f'{throughput / single:.2f}x scaling, '
+                  f'{errors} incorrect results')
+
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -18,6 +18,16 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+from .cache import ComposeCache, ConditionalCache, ResponseCache
 from .client import Client_v1, Client_v2
+from .deadlines import DeadlineExceeded, deadline
+from .federation import FederatedClient
+from .metrics import EndpointMetrics, Instrument, RequestInfo
+from .ratelimit import RateLimiter
+from .retry import CircuitBreaker, CircuitOpenError, RetryPolicy
+try:
+    from .async_client import AsyncClient_v2
+except ImportError: # pragma: no cover
+    pass
 
 __version__ = '1.0.1'
@@ -0,0 +1,123 @@
+"""
+Parsing of application definitions from the BigBoat v1 API.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from typing import Any, Collection, Dict, Optional, Union
+import yaml
+from yaml.events import AliasEvent, CollectionEndEvent, CollectionStartEvent, \
+    DocumentEndEvent, MappingStartEvent, NodeEvent, ScalarEvent, StreamEndEvent
+from yaml.nodes import ScalarNode
+
+# Use the loader of libyaml when the library is available, which parses
+# documents much faster than the pure Python loader.
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Marker for a complex key in a top-level mapping
+_COMPLEX = object()
+
+def load_appdef(text: Union[str, bytes]) -> Any:
+    """
+    Parse a complete YAML document.
+
+    Args:
+        text (str or bytes): The YAML document.
+
+    Returns:
+        The object of the document.
+    """
+
+    return yaml.load(text, Loader=SafeLoader)
+
+def load_fields(text: Union[str, bytes], fields: Collection[str]) -> \
+        Dict[str, Any]:
+    """
+    Parse only some of the top-level keys of a YAML mapping document.
+
+    The document is read until the fields are found, skipping the values of
+    other keys without constructing them. If the document is not a mapping or
+    some of the fields are not found as plain keys, then the complete document
+    is parsed instead.
+
+    Args:
+        text (str or bytes): The YAML document.
+        fields (collection of str): The names of the top-level keys.
+
+    Returns:
+        dict: The values of the fields that are in the document.
+    """
+
+    loader = SafeLoader(text)
+    try:
+        found = _find_fields(loader, fields)
+    finally:
+        loader.dispose()
+
+    if found is None or len(found) < len(fields):
+        document = load_appdef(text)
+        if not isinstance(document, dict):
+            return {}
+
+        return {key: document[key] for key in fields if key in document}
+
+    return found
+
+def _find_fields(loader: Any, fields: Collection[str]) -> \
+        Optional[Dict[str, Any]]:
+    event = loader.get_event()
+    while not isinstance(event, NodeEvent):
+        # An empty document or stream has no node to read fields from.
+        if event is None or isinstance(event, (DocumentEndEvent,
+                                               StreamEndEvent)):
+            return None
+        event = loader.get_event()
+    if not isinstance(event, MappingStartEvent):
+        return None
+
+    found: Dict[str, Any] = {}
+    depth = 1
+    key: Any = None
+    while depth > 0 and len(found) < len(fields):
+        event = loader.get_event()
+        if isinstance(event, CollectionStartEvent):
+            if depth == 1:
+                # A collection is either the value of the current key or
+                # a complex key whose value follows the collection.
+                key = _COMPLEX if key is None else None
+            depth += 1
+        elif isinstance(event, CollectionEndEvent):
+            depth -= 1
+        elif depth == 1 and key is None:
+            key = event.value if isinstance(event, ScalarEvent) else _COMPLEX
+        elif depth == 1:
+            if key in fields and not isinstance(event, AliasEvent):
+                found[key] = _construct_scalar(loader, event)
+            key = None
+
+    return found
+
+def _construct_scalar(loader: Any, event: Any) -> Any:
+    # Resolve the tag of the scalar in the same way as the composer of the
+    # loader does before constructing the value.
+    tag = event.tag
+    if tag is None or tag == '!':
+        tag = loader.resolve(ScalarNode, event.value, event.implicit)
+
+    node = ScalarNode(tag, event.value, event.start_mark, event.end_mark,
+                      style=event.style)
+    return loader.construct_object(node, deep=True)
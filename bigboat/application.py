@@ -35,6 +35,8 @@ class Application(Entity):
     An application definition entity.
     """
 
+    __slots__ = ('_name', '_version')
+
     def __init__(self, client: Client, name: str, version: str):
         super().__init__(client)
 
@@ -0,0 +1,387 @@
+"""
+Asynchronous client that connects to the BigBoat API.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import asyncio
+from types import TracebackType
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterable, List, \
+    Mapping, Optional, Tuple, Type, TypeVar, Union, cast
+import aiohttp
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from .application import Application
+from .batch import BatchResult
+from .client import Client_v2_Base, Timeouts
+from .decode import Decoder
+from .deadlines import DeadlineExceeded, remaining
+from .instance import Instance
+from .stream import JSONArrayParser
+from .watch import InstanceChanges, InstanceWatcher, StateWaiter
+
+T = TypeVar('T')
+
+# The API methods of the client base class are overridden by coroutines.
+# pylint: disable=invalid-overridden-method
+
+class AsyncInstanceWatcher(InstanceWatcher, AsyncIterator[InstanceChanges]):
+    """
+    Watcher that polls the live instances of an asynchronous client and
+    provides the changes compared to the previous poll.
+
+    The watcher is an asynchronous iterator, see
+    :obj:`bigboat.watch.InstanceWatcher` for its arguments and behavior.
+    """
+
+    async def poll(self) -> InstanceChanges: # type: ignore[override]
+        instances = self._client.instances(services=self._services)
+        return self.compare(await cast(Awaitable[List[Instance]], instances))
+
+    def __next__(self) -> InstanceChanges:
+        raise TypeError('Use async for to watch instances of an asynchronous '
+                        'client')
+
+    def __aiter__(self) -> 'AsyncInstanceWatcher':
+        return self
+
+    async def __anext__(self) -> InstanceChanges:
+        if self._polled:
+            await asyncio.sleep(next(self._backoff))
+
+        self._polled = True
+        changes = await self.poll()
+        while not changes:
+            await asyncio.sleep(next(self._backoff))
+            changes = await self.poll()
+
+        self._backoff.reset()
+        return changes
+
+class AsyncClient_v2(Client_v2_Base):
+    """
+    Client for the BigBoat v2 API which performs its requests within an
+    asyncio event loop.
+
+    All API methods are coroutines with the same arguments and results as
+    those of :obj:`bigboat.client.Client_v2`. The client should be closed
+    after use, either by awaiting `close` or by using it as an asynchronous
+    context manager. Entities returned by this client provide coroutines
+    from their `update` and `delete` methods.
+
+    Args:
+        base_url (str): The base URL of the BigBoat instance.
+        api_key (str): The API key to authenticate with.
+        limit (int or `None`): The maximum number of simultaneous connections,
+            or `None` to use `LIMIT`.
+        timeouts (dict or `None`): Timeouts for specific API methods, which
+            override those of `TIMEOUTS`. The keys are HTTP methods and path
+            templates, such as 'GET instances/{name}'. The values are either
+            read timeouts in seconds or pairs of connect and read timeouts.
+        decoder (str, callable or `None`): The JSON library to decode
+            responses with, such as 'orjson', 'ujson' or 'json', a function
+            that decodes bytes, or `None` to use the fastest installed
+            library.
+    """
+
+    LIMIT = 100
+
+    def __init__(self, base_url: str, api_key: str,
+                 limit: Optional[int] = None,
+                 timeouts: Optional[Timeouts] = None,
+                 decoder: Optional[Union[str, Decoder]] = None):
+        # pylint: disable=too-many-arguments
+        super().__init__(base_url, api_key, timeouts=timeouts, decoder=decoder)
+        self._limit = self.LIMIT if limit is None else limit
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # The session must be created while the event loop is running.
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self._limit),
+                headers={'api-key': self._api_key},
+                timeout=aiohttp.ClientTimeout(total=self.TIMEOUT)
+            )
+
+        return self._session
+
+    async def close(self) -> None: # type: ignore[override]
+        """
+        Close the connections of the client.
+        """
+
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def __enter__(self) -> 'AsyncClient_v2':
+        raise TypeError('Use async with to close the asynchronous client')
+
+    async def __aenter__(self) -> 'AsyncClient_v2':
+        return self
+
+    async def __aexit__(self, exc_type: Optional[Type[BaseException]],
+                        exc_value: Optional[BaseException],
+                        traceback: Optional[TracebackType]) -> None:
+        await self.close()
+
+    def _client_timeout(self, method: str, path: str) -> aiohttp.ClientTimeout:
+        connect, read = self._timeout(method, path)
+        return aiohttp.ClientTimeout(total=remaining(), sock_connect=connect,
+                                     sock_read=read)
+
+    async def _request(self, method: str, path: str, **kwargs: Any) -> \
+            Response:
+        session = self._get_session()
+        response = await session.request(method, self._format_url(path),
+                                         timeout=self._client_timeout(method,
+                                                                      path),
+                                         **kwargs)
+        async with response:
+            content = await response.read()
+
+        return self._convert(response, content)
+
+    @staticmethod
+    def _convert(response: aiohttp.ClientResponse, content: bytes) -> \
+            Response:
+        # Provide the response in the same form as the synchronous client
+        # receives it, such that the same parsing can be applied.
+        result = Response()
+        result.status_code = response.status
+        result.headers = CaseInsensitiveDict(response.headers)
+        result.url = str(response.url)
+        result.reason = str(response.reason)
+        result.encoding = response.charset
+        result._content = content # pylint: disable=protected-access
+        return result
+
+    async def _get(self, path: str) -> Response:
+        return await self._request('GET', path)
+
+    async def _put(self, path: str, content_type: Optional[str] = None,
+                   data: Optional[Union[str, bytes]] = None,
+                   json: Optional[Any] = None) -> Response:
+        headers = self._format_headers(content_type=content_type, json=json)
+        return await self._request('PUT', path, headers=headers, data=data,
+                                   json=json)
+
+    async def _delete(self, path: str) -> Response:
+        return await self._request('DELETE', path)
+
+    async def apps(self) -> List[Application]: # type: ignore[override]
+        return self._parse_apps(await self._get('apps'))
+
+    async def get_app(self, name: str, # type: ignore[override]
+                      version: str) -> Optional[Application]:
+        return self._parse_app(await self._get(f'apps/{name}/{version}'))
+
+    async def update_app(self, name: str, # type: ignore[override]
+                         version: str) -> Optional[Application]:
+        try:
+            request = await self._put(f'apps/{name}/{version}')
+        except aiohttp.ClientConnectionError:
+            return None
+
+        return self._parse_app(request)
+
+    async def delete_app(self, name: str, # type: ignore[override]
+                         version: str) -> bool:
+        request = await self._delete(f'apps/{name}/{version}')
+        return self._parse_deletion(request)
+
+    async def get_compose(self, name: str, version: str, file_name: str) -> \
+            Optional[str]:
+        """
+        Retrieve a docker compose or bigboat compose file for the application.
+
+        See :meth:`bigboat.client.Client_v2.get_compose`.
+        """
+
+        path = f'apps/{name}/{version}/files/{file_name}'
+        return self._parse_compose(await self._get(path))
+
+    async def update_compose(self, name: str, version: str, file_name: str,
+                             content: Union[str, bytes]) -> bool:
+        """
+        Update a docker compose or bigboat compose file for the application.
+
+        See :meth:`bigboat.client.Client_v2.update_compose`.
+        """
+
+        path = f'apps/{name}/{version}/files/{file_name}'
+        request = await self._put(path, content_type='text/plain',
+                                  data=content)
+        return self._parse_compose_update(request)
+
+    async def instances(self, # type: ignore[override]
+                        services: bool = True) -> List[Instance]:
+        return self._parse_instances(await self._get('instances'),
+                                     services=services)
+
+    async def iter_instances(self, # type: ignore[override]
+                             services: bool = True,
+                             chunk_size: Optional[int] = None) -> \
+            AsyncIterator[Instance]:
+        """
+        Retrieve all live instances from the API one by one, parsing the
+        response while it is received.
+
+        See :meth:`bigboat.client.Client_v2.iter_instances`. This method is
+        an asynchronous generator.
+        """
+
+        session = self._get_session()
+        response = await session.request('GET', self._format_url('instances'),
+                                         timeout=self._client_timeout(
+                                             'GET', 'instances'
+                                         ))
+        async with response:
+            if response.status in (400, 401):
+                self._check_bad_request(self._convert(response,
+                                                      await response.read()))
+
+            parser = JSONArrayParser()
+            if chunk_size is None:
+                chunk_size = self.CHUNK_SIZE
+            async for chunk in response.content.iter_chunked(chunk_size):
+                for instance in parser.feed(chunk):
+                    yield self._format_instance(instance, services=services)
+
+            for instance in parser.close():
+                yield self._format_instance(instance, services=services)
+
+    def watch_instances(self, interval: float = 5.0,
+                        max_interval: float = 60.0,
+                        services: bool = True) -> AsyncInstanceWatcher:
+        """
+        Watch the live instances for changes.
+
+        See :meth:`bigboat.client.Client.watch_instances`. The watcher is an
+        asynchronous iterator.
+        """
+
+        return AsyncInstanceWatcher(self, interval=interval,
+                                    max_interval=max_interval,
+                                    services=services)
+
+    async def get_instance(self, # type: ignore[override]
+                           name: str) -> Optional[Instance]:
+        return self._parse_instance(await self._get(f'instances/{name}'))
+
+    async def _run_batch(self, operations: List[Tuple[str, Awaitable[T]]],
+                         max_workers: Optional[int] = None) -> BatchResult[T]:
+        semaphore = asyncio.Semaphore(self._limit if max_workers is None
+                                      else max_workers)
+
+        async def run(operation: Awaitable[T]) -> T:
+            async with semaphore:
+                return await operation
+
+        values = await asyncio.gather(*(
+            run(operation) for _, operation in operations
+        ), return_exceptions=True)
+        result: BatchResult[T] = BatchResult()
+        for (key, _), value in zip(operations, values):
+            if isinstance(value, (ValueError, aiohttp.ClientError,
+                                  asyncio.TimeoutError, DeadlineExceeded)):
+                result.add_error(key, value)
+            elif isinstance(value, BaseException):
+                raise value
+            else:
+                result[key] = value
+
+        return result
+
+    async def get_instances(self, # type: ignore[override]
+                            names: Iterable[str],
+                            max_workers: Optional[int] = None) -> \
+            BatchResult[Optional[Instance]]:
+        return await self._run_batch([
+            (name, self.get_instance(name)) for name in dict.fromkeys(names)
+        ], max_workers)
+
+    async def update_instances(self, # type: ignore[override]
+                               instances: Iterable[Instance],
+                               max_workers: Optional[int] = None) -> \
+            BatchResult[Optional[Instance]]:
+        return await self._run_batch([
+            (instance.name, self._update_instance(instance))
+            for instance in instances
+        ], max_workers)
+
+    async def update_instance(self, # type: ignore[override]
+                              name: str, app_name: str, version: str,
+                              **kwargs: Dict[str, str]) -> Optional[Instance]:
+        data = self._format_instance_data(app_name, version, **kwargs)
+        request = await self._put(f'instances/{name}', json=data)
+        return self._parse_instance(request)
+
+    async def delete_instance(self, # type: ignore[override]
+                              name: str) -> Optional[Instance]:
+        return self._parse_instance(await self._delete(f'instances/{name}'))
+
+    async def _update_instance(self, # type: ignore[override]
+                               instance: Instance) -> Optional[Instance]:
+        if instance.application is None:
+            raise ValueError('Application information required to start instance')
+
+        return await self.update_instance(instance.name,
+                                          instance.application.name,
+                                          instance.application.version,
+                                          parameters=instance.parameters,
+                                          options=instance.options)
+
+    async def delete_instances(self, # type: ignore[override]
+                               names: Iterable[str],
+                               max_workers: Optional[int] = None) -> \
+            BatchResult[Optional[Instance]]:
+        return await self._run_batch([
+            (name, self.delete_instance(name)) for name in dict.fromkeys(names)
+        ], max_workers)
+
+    async def wait_for_states(self, # type: ignore[override]
+                              targets: Mapping[str, str], timeout: float,
+                              interval: float = 1.0,
+                              max_interval: float = 15.0) -> \
+            Dict[str, Instance]:
+        with self._bound_wait(timeout):
+            waiter = StateWaiter(targets, timeout, interval=interval,
+                                 max_interval=max_interval)
+            delay = waiter.update(await self.get_instances(waiter.pending))
+            while delay is not None:
+                await asyncio.sleep(delay)
+                delay = waiter.update(
+                    await self.get_instances(waiter.pending)
+                )
+
+        return waiter.reached
+
+    async def wait_for_state(self, # type: ignore[override]
+                             name: str, state: str, timeout: float) -> \
+            Optional[Instance]:
+        return (await self.wait_for_states({name: state}, timeout)).get(name)
+
+    async def statuses(self) -> List[Dict[str, Any]]:
+        """
+        Retrieve all status items reported by BigBoat.
+
+        See :meth:`bigboat.client.Client_v2.statuses`.
+        """
+
+        return self._parse_statuses(await self._get('status'))
@@ -0,0 +1,150 @@
+"""
+Batch operations performed concurrently for multiple entities.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor, \
+    TimeoutError as FutureTimeoutError
+from contextvars import copy_context
+from time import monotonic
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple, \
+    TypeVar
+from requests.exceptions import RequestException
+from .deadlines import remaining
+
+T = TypeVar('T')
+
+class BatchResult(Dict[str, T]):
+    """
+    Results of an operation performed for multiple entities.
+
+    The batch result is a dictionary of the keys of the entities, such as
+    instance names, for which the operation completed, with the result of
+    the operation for that entity as values. Errors for other entities are
+    collected in the `rejected` property when the API refused the operation,
+    and in the `failed` property when the request could not be performed.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._rejected: Dict[str, ValueError] = {}
+        self._failed: Dict[str, Exception] = {}
+
+    @property
+    def rejected(self) -> Dict[str, ValueError]:
+        """
+        The errors raised by the API by entity keys.
+        """
+
+        return self._rejected
+
+    @property
+    def failed(self) -> Dict[str, Exception]:
+        """
+        The transport errors that occurred during the operation by entity keys.
+        """
+
+        return self._failed
+
+    @property
+    def errors(self) -> Dict[str, Exception]:
+        """
+        All the errors that occurred during the operation by entity keys.
+        """
+
+        errors: Dict[str, Exception] = dict(self._rejected)
+        errors.update(self._failed)
+        return errors
+
+    def add_error(self, key: str, error: Exception) -> None:
+        """
+        Register an error that occurred during the operation for an entity.
+        """
+
+        if isinstance(error, ValueError):
+            self._rejected[key] = error
+        else:
+            self._failed[key] = error
+
+    def __repr__(self) -> str:
+        return (f'BatchResult({super().__repr__()}, '
+                f'rejected={self._rejected!r}, failed={self._failed!r})')
+
+def run_batch(operations: Iterable[Tuple[str, Callable[[], T]]],
+              max_workers: int, timeouts: Optional[Mapping[str, float]] = None,
+              result: Optional[BatchResult[T]] = None) -> BatchResult[T]:
+    """
+    Perform operations concurrently with a limited number of workers.
+
+    Args:
+        operations: Pairs of keys of the entities and callables that perform
+            the operation for that entity.
+        max_workers (int): The maximum number of operations that are performed
+            at the same time.
+        timeouts (dict or `None`): Number of seconds since the start of the
+            batch after which the operations for specific keys are considered
+            to have failed. Such operations are abandoned and do not delay the
+            batch any further, but they may continue in the background.
+            Operations also time out at the deadline of the current context,
+            which the operations are performed in as well.
+        result (:obj:`bigboat.batch.BatchResult` or `None`): An empty batch
+            result to fill, such as a subclass instance.
+
+    Returns:
+        :obj:`bigboat.batch.BatchResult`: The results of the operations in
+        the order of the provided entities, with the errors raised by
+        the API or during transport kept separately.
+    """
+
+    if result is None:
+        result = BatchResult()
+    if timeouts is None:
+        timeouts = {}
+
+    start = monotonic()
+    left = remaining()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    abandoned = False
+    try:
+        futures: List[Tuple[str, Future]] = [
+            (key, executor.submit(copy_context().run, operation))
+            for key, operation in operations
+        ]
+        for key, future in futures:
+            timeout = timeouts.get(key)
+            if left is not None:
+                timeout = left if timeout is None else min(timeout, left)
+            try:
+                if timeout is None:
+                    result[key] = future.result()
+                else:
+                    result[key] = future.result(
+                        timeout=max(0.0, start + timeout - monotonic())
+                    )
+            except FutureTimeoutError:
+                abandoned = not future.cancel() or abandoned
+                result.add_error(key, FutureTimeoutError(
+                    f'Operation for {key} did not complete within {timeout} '
+                    'seconds'
+                ))
+            except (ValueError, RequestException) as error:
+                result.add_error(key, error)
+    finally:
+        executor.shutdown(wait=not abandoned)
+
+    return result
@@ -0,0 +1,527 @@
+"""
+Caches for responses from the BigBoat API.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from collections import OrderedDict
+from hashlib import sha256
+import json
+import os
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from time import monotonic, time
+from typing import Any, Dict, NamedTuple, Optional, Tuple, Union
+from requests.models import Response
+
+class BoundedCache:
+    """
+    Base class for caches that hold a maximum number of entries by request
+    paths, evicting the least recently used entries.
+
+    Args:
+        max_entries (int): The maximum number of entries in the cache.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, Any] = OrderedDict()
+        self._lock = Lock()
+
+    def _get(self, path: str) -> Any:
+        entry = self._entries.get(path)
+        if entry is not None:
+            self._entries.move_to_end(path)
+
+        return entry
+
+    def _set(self, path: str, entry: Any) -> None:
+        self._entries[path] = entry
+        self._entries.move_to_end(path)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, *paths: str, prefix: Optional[str] = None) -> None:
+        """
+        Remove entries from the cache.
+
+        Args:
+            *paths: The paths of the requests to remove.
+            prefix (str or `None`): Remove all entries of requests whose path
+                starts with this prefix.
+        """
+
+        with self._lock:
+            for path in paths:
+                self._entries.pop(path, None)
+            if prefix is not None:
+                for path in [key for key in self._entries
+                             if key.startswith(prefix)]:
+                    del self._entries[path]
+
+    def clear(self) -> None:
+        """
+        Remove all entries from the cache.
+        """
+
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class ResponseCache(BoundedCache):
+    """
+    Cache of parsed responses of GET requests to the API.
+
+    Entries expire after a time-to-live (TTL) which depends on the endpoint
+    of the request. When the cache holds more than the maximum number of
+    entries, then the least recently used entries are evicted.
+
+    Args:
+        ttl (float): The default number of seconds that an entry remains
+            valid after it is stored.
+        ttls (dict or `None`): Number of seconds that entries remain valid
+            for specific endpoints. The keys are path templates, such as
+            'instances' or 'instances/{name}'.
+        max_entries (int): The maximum number of entries in the cache.
+    """
+
+    def __init__(self, ttl: float = 5.0,
+                 ttls: Optional[Dict[str, float]] = None,
+                 max_entries: int = 1000):
+        super().__init__(max_entries)
+        self._ttl = ttl
+        self._ttls = {} if ttls is None else ttls
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def hits(self) -> int:
+        """
+        The number of lookups that found a valid entry.
+        """
+
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """
+        The number of lookups that did not find a valid entry.
+        """
+
+        return self._misses
+
+    def lookup(self, path: str) -> Tuple[bool, Any]:
+        """
+        Retrieve a valid entry from the cache.
+
+        Args:
+            path (str): The path of the request.
+
+        Returns:
+            tuple: Whether a valid entry was found and the cached value.
+        """
+
+        with self._lock:
+            entry = self._get(path)
+            if entry is None or entry[0] <= monotonic():
+                if entry is not None:
+                    del self._entries[path]
+                self._misses += 1
+                return False, None
+
+            self._hits += 1
+            return True, entry[1]
+
+    def store(self, path: str, endpoint: str, value: Any) -> None:
+        """
+        Store a value in the cache.
+
+        Args:
+            path (str): The path of the request.
+            endpoint (str): The path template of the request, which determines
+                how long the entry remains valid.
+            value: The parsed response.
+        """
+
+        ttl = self._ttls.get(endpoint, self._ttl)
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._set(path, (monotonic() + ttl, value))
+
+class Validated(NamedTuple):
+    """
+    A parsed response with the validators that the API provided for it.
+    """
+
+    etag: Optional[str]
+    last_modified: Optional[str]
+    value: Any
+    size: int
+    parse_time: float
+
+class ConditionalCache(BoundedCache):
+    """
+    Cache of validators (ETag and Last-Modified headers) and parsed responses
+    of GET requests, in order to perform conditional requests to the API.
+
+    When the API responds that the resource was not modified since the
+    earlier response, then the parsed response is reused. The cache tracks
+    how much response data and parsing time was saved this way.
+
+    Args:
+        max_entries (int): The maximum number of entries in the cache.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        super().__init__(max_entries)
+        self._not_modified = 0
+        self._bytes_saved = 0
+        self._parse_time_saved = 0.0
+
+    @property
+    def not_modified(self) -> int:
+        """
+        The number of responses that indicated that the resource was not
+        modified, such that the earlier parsed response was reused.
+        """
+
+        return self._not_modified
+
+    @property
+    def bytes_saved(self) -> int:
+        """
+        The number of bytes of response bodies that were not transferred due
+        to conditional requests.
+        """
+
+        return self._bytes_saved
+
+    @property
+    def parse_time_saved(self) -> float:
+        """
+        The number of seconds of response parsing that was avoided due to
+        conditional requests.
+        """
+
+        return self._parse_time_saved
+
+    def headers(self, path: str) -> Dict[str, str]:
+        """
+        Retrieve headers for a conditional request.
+
+        Args:
+            path (str): The path of the request.
+
+        Returns:
+            dict: The headers to add to the request, which are empty if no
+            validators are known for the path.
+        """
+
+        with self._lock:
+            entry: Optional[Validated] = self._get(path)
+
+        headers: Dict[str, str] = {}
+        if entry is not None:
+            if entry.etag is not None:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified is not None:
+                headers['If-Modified-Since'] = entry.last_modified
+
+        return headers
+
+    def reuse(self, path: str) -> Tuple[bool, Any]:
+        """
+        Retrieve the parsed response for a resource that was not modified.
+
+        Args:
+            path (str): The path of the request.
+
+        Returns:
+            tuple: Whether an earlier response was found and its parsed value.
+        """
+
+        with self._lock:
+            entry: Optional[Validated] = self._get(path)
+            if entry is None:
+                return False, None
+
+            self._not_modified += 1
+            self._bytes_saved += entry.size
+            self._parse_time_saved += entry.parse_time
+            return True, entry.value
+
+    def store(self, path: str, response: Response, value: Any,
+              parse_time: float) -> None:
+        """
+        Store the validators and parsed value of a response in the cache.
+        Responses without validators are not stored.
+
+        Args:
+            path (str): The path of the request.
+            response (:obj:`requests.models.Response`): The response.
+            value: The parsed response.
+            parse_time (float): The number of seconds used to parse the
+                response.
+        """
+
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag is None and last_modified is None:
+            return
+
+        entry = Validated(etag, last_modified, value, len(response.content),
+                          parse_time)
+        with self._lock:
+            self._set(path, entry)
+
+class Compose(NamedTuple):
+    """
+    The last known remote content of a compose file.
+    """
+
+    digest: str
+    content: str
+    stored: float
+
+class ComposeCache(BoundedCache):
+    """
+    Cache of the contents of compose files of applications, identified by
+    their content hashes, in order to avoid repeated uploads and downloads.
+
+    Uploading a compose file is skipped when its hash matches that of the last
+    known remote content, and retrieving a compose file uses the last known
+    content while it is valid. The cache assumes that the compose files are
+    only changed through clients that use it, unless a TTL is set. Entries
+    are identified by the URLs of the compose files, so clients of different
+    dashboards may share the cache.
+
+    If a directory is given, then the cache keeps its entries there, such
+    that later processes (such as other runs of a pipeline) use them as well.
+    The contents are stored in files named after their hashes. Since other
+    processes may change the compose files in the meantime, the entries then
+    remain valid for `DIRECTORY_TTL` seconds unless another TTL is given.
+
+    Args:
+        ttl (float or `None`): The number of seconds that the known content of
+            a compose file remains valid, or `None` to keep it valid until it
+            is changed or removed through the client, or for `DIRECTORY_TTL`
+            seconds if the cache is kept in a directory. Use `math.inf` to
+            keep the entries of a directory valid indefinitely.
+        directory (str, path or `None`): The directory to store the cache in,
+            or `None` to only keep the cache in memory.
+        max_entries (int): The maximum number of entries in the cache.
+    """
+
+    INDEX = 'index.json'
+    DIRECTORY_TTL = 3600.0
+
+    def __init__(self, ttl: Optional[float] = None,
+                 directory: Optional[Union[str, 'os.PathLike[str]']] = None,
+                 max_entries: int = 1000):
+        super().__init__(max_entries)
+        self._directory = None if directory is None else Path(directory)
+        if ttl is None and self._directory is not None:
+            ttl = self.DIRECTORY_TTL
+        self._ttl = ttl
+        self._hits = 0
+        self._misses = 0
+        self._skipped = 0
+        if self._directory is not None:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            self._load()
+
+    @property
+    def hits(self) -> int:
+        """
+        The number of retrievals that used the known content.
+        """
+
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """
+        The number of retrievals that did not find valid known content.
+        """
+
+        return self._misses
+
+    @property
+    def skipped(self) -> int:
+        """
+        The number of uploads that were skipped because the content matched
+        the known remote content.
+        """
+
+        return self._skipped
+
+    @staticmethod
+    def digest(content: Union[str, bytes]) -> str:
+        """
+        Calculate the hash of the content of a compose file.
+
+        Args:
+            content (str or bytes): The content, where text is encoded as
+                UTF-8.
+
+        Returns:
+            str: The hexadecimal SHA-256 hash of the content.
+        """
+
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+
+        return sha256(content).hexdigest()
+
+    def _valid(self, url: str) -> Optional[Compose]:
+        entry: Optional[Compose] = self._get(url)
+        if entry is None:
+            return None
+        if self._ttl is not None and entry.stored + self._ttl <= time():
+            del self._entries[url]
+            return None
+
+        return entry
+
+    def lookup(self, url: str) -> Tuple[bool, Optional[str]]:
+        """
+        Retrieve the valid known content of a compose file.
+
+        Args:
+            url (str): The URL of the compose file in the API.
+
+        Returns:
+            tuple: Whether valid content was found and the content.
+        """
+
+        with self._lock:
+            entry = self._valid(url)
+            if entry is None:
+                self._misses += 1
+                return False, None
+
+            self._hits += 1
+            return True, entry.content
+
+    def matches(self, url: str, content: Union[str, bytes]) -> bool:
+        """
+        Check whether the content of a compose file is the same as the valid
+        known remote content, such that uploading it may be skipped. Matches
+        are counted as skipped uploads.
+
+        Args:
+            url (str): The URL of the compose file in the API.
+            content (str or bytes): The content to upload.
+
+        Returns:
+            bool: Whether the content has the same hash as the known content.
+        """
+
+        digest = self.digest(content)
+        with self._lock:
+            entry = self._valid(url)
+            if entry is None or entry.digest != digest:
+                return False
+
+            self._skipped += 1
+            return True
+
+    def store(self, url: str, content: Union[str, bytes]) -> None:
+        """
+        Store the known remote content of a compose file.
+
+        Args:
+            url (str): The URL of the compose file in the API.
+            content (str or bytes): The content, which is not stored if it is
+                bytes that cannot be decoded as UTF-8.
+        """
+
+        if isinstance(content, bytes):
+            try:
+                content = content.decode('utf-8')
+            except UnicodeDecodeError:
+                self.invalidate(url)
+                return
+
+        entry = Compose(self.digest(content), content, time())
+        with self._lock:
+            self._set(url, entry)
+            self._save()
+
+    def invalidate(self, *paths: str, prefix: Optional[str] = None) -> None:
+        super().invalidate(*paths, prefix=prefix)
+        with self._lock:
+            self._save()
+
+    def clear(self) -> None:
+        super().clear()
+        with self._lock:
+            self._save()
+
+    def _load(self) -> None:
+        if self._directory is None:
+            return
+
+        try:
+            with (self._directory / self.INDEX).open('r',
+                                                     encoding='utf-8') as index:
+                entries = json.load(index)
+        except (OSError, ValueError):
+            return
+
+        for path, (digest, stored) in entries.items():
+            try:
+                content = (self._directory / digest).read_text(encoding='utf-8')
+            except (OSError, UnicodeDecodeError):
+                continue
+
+            if self.digest(content) == digest:
+                self._set(path, Compose(digest, content, stored))
+
+    def _save(self) -> None:
+        if self._directory is None:
+            return
+
+        # Replace files atomically, such that other processes never read
+        # partially written files.
+        digests = set()
+        for entry in self._entries.values():
+            digests.add(entry.digest)
+            target = self._directory / entry.digest
+            if not target.exists():
+                self._write(target, entry.content)
+
+        self._write(self._directory / self.INDEX, json.dumps({
+            path: [entry.digest, entry.stored]
+            for path, entry in self._entries.items()
+        }))
+
+        for stale in self._directory.iterdir():
+            if len(stale.name) == 64 and stale.name not in digests:
+                stale.unlink(missing_ok=True)
+
+    def _write(self, target: Path, content: str) -> None:
+        with NamedTemporaryFile('w', encoding='utf-8', dir=self._directory,
+                                prefix='.', delete=False) as temp:
+            temp.write(content)
+
+        os.replace(temp.name, target)
@@ -18,20 +18,88 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-from typing import Any, Dict, List, Optional, Union
+# pylint: disable=too-many-lines
+
+from contextlib import nullcontext
+from copy import copy
+from functools import partial
+from sys import intern
+from time import perf_counter, sleep
+from types import TracebackType
+from typing import Any, Callable, ContextManager, Dict, Iterable, Iterator, \
+    List, Mapping, Optional, Tuple, Type, TypeVar, Union, cast
+from weakref import WeakValueDictionary
 import requests
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
 from requests.models import Response
-import yaml
+from .appdef import load_appdef, load_fields
 from .application import Application
+from .batch import BatchResult, run_batch
+from .cache import ComposeCache, ConditionalCache, ResponseCache
+from .decode import Decoder, get_decoder
+from .deadlines import DeadlineExceeded, deadline, remaining
+from .flight import SingleFlight
 from .instance import Instance
+from .metrics import Instrument, RequestInfo, current_scope, instrumented, \
+    timed_decoder
+from .ratelimit import RateLimiter
+from .retry import UNAVAILABLE, CircuitBreaker, CircuitOpenError, RetryPolicy
+from .session import SessionPool
+from .stream import iter_json_array
+from .watch import InstanceWatcher, StateWaiter
+
+ClientT = TypeVar('ClientT', bound='Client')
+T = TypeVar('T')
+Timeouts = Dict[str, Union[float, Tuple[float, float]]]
 
 class Client:
     """
     Generic client base class, enforcing minimum required interface.
+
+    The client can be used as a context manager, which closes the client
+    when leaving the context.
+
+    Args:
+        base_url (str): The base URL of the BigBoat instance.
+        retry (:obj:`bigboat.retry.RetryPolicy` or `None`): The policy for
+            repeating idempotent requests that fail due to transient problems,
+            or `None` to perform each request once.
+        breaker (:obj:`bigboat.retry.CircuitBreaker` or `None`): The circuit
+            breaker which stops performing requests while the API fails, or
+            `None` to always perform requests.
+        timeouts (dict or `None`): Timeouts for specific API methods, which
+            override those of `TIMEOUTS`. The keys are HTTP methods and path
+            templates, such as 'GET instances/{name}'. The values are either
+            read timeouts in seconds or pairs of connect and read timeouts.
+        instruments (iterable or `None`): Hooks which are called before and
+            after each request, such as :obj:`bigboat.metrics.EndpointMetrics`,
+            or `None` to not instrument requests.
+        limiter (:obj:`bigboat.ratelimit.RateLimiter` or `None`): The rate
+            limiter which delays requests that exceed its rates, or `None` to
+            perform requests immediately.
     """
 
-    def __init__(self, base_url: str):
+    POOL_SIZE = DEFAULT_POOLSIZE
+    ROUTES: Tuple[str, ...] = ()
+    TIMEOUT: float = 60
+    CONNECT_TIMEOUT: float = 10
+    TIMEOUTS: Timeouts = {}
+
+    def __init__(self, base_url: str, retry: Optional[RetryPolicy] = None,
+                 breaker: Optional[CircuitBreaker] = None,
+                 timeouts: Optional[Timeouts] = None,
+                 instruments: Optional[Iterable[Instrument]] = None,
+                 limiter: Optional[RateLimiter] = None):
+        # pylint: disable=too-many-arguments
         self._base_url = base_url.rstrip('/')
+        self._retry = retry
+        self._breaker = breaker
+        self._limiter = limiter
+        self._timeouts = dict(self.TIMEOUTS)
+        if timeouts is not None:
+            self._timeouts.update(timeouts)
+        self._instruments: Tuple[Instrument, ...] = \
+            () if instruments is None else tuple(instruments)
 
     @property
     def base_url(self) -> str:
@@ -41,6 +109,201 @@ class Client:
 
         return self._base_url
 
+    @property
+    def instruments(self) -> Tuple[Instrument, ...]:
+        """
+        The hooks which are called before and after each request.
+        """
+
+        return self._instruments
+
+    def _route(self, path: str) -> str:
+        # Determine the path template from ROUTES that matches the path.
+        parts = path.split('/')
+        for route in self.ROUTES:
+            templates = route.split('/')
+            if len(templates) == len(parts) and all(
+                template.startswith('{') or template == part
+                for template, part in zip(templates, parts)
+            ):
+                return route
+
+        return path
+
+    def _timeout(self, method: str, path: str) -> Tuple[float, float]:
+        # Determine the connect and read timeouts of a request, shortened to
+        # end at the deadline of the current context.
+        timeout = self._timeouts.get(f'{method} {self._route(path)}',
+                                     self.TIMEOUT)
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+        else:
+            connect, read = min(self.CONNECT_TIMEOUT, timeout), timeout
+
+        left = remaining()
+        if left is None:
+            return connect, read
+        if left <= 0:
+            raise DeadlineExceeded(f'Deadline passed before {method} {path}')
+
+        return min(connect, left), min(read, left)
+
+    def _perform(self, method: str, path: str, send: Callable[..., Response],
+                 kind: Optional[str] = None) -> Response:
+        # The kind of request for the rate limiter, 'read' or 'write', is
+        # derived from the HTTP method unless the API method provides it.
+        if not self._instruments:
+            return self._repeat(method, path, send, kind)
+
+        # Provide the request to the instruments, which receive it again once
+        # the API method that performs it completes, or when it fails.
+        info = RequestInfo(method, self._route(path), path)
+        for instrument in self._instruments:
+            instrument.before(info)
+
+        def attempt(**kwargs: Any) -> Response:
+            info.attempts += 1
+            return send(**kwargs)
+
+        start = perf_counter()
+        try:
+            response = self._repeat(method, path, attempt, kind)
+        except BaseException as error:
+            info.network = perf_counter() - start
+            info.error = error
+            for instrument in self._instruments:
+                instrument.after(info)
+            raise
+
+        info.network = perf_counter() - start
+        info.status = response.status_code
+        info.size = self._size(response)
+        scope = current_scope()
+        if scope is None:
+            for instrument in self._instruments:
+                instrument.after(info)
+        else:
+            scope.add(info)
+
+        return response
+
+    @staticmethod
+    def _size(response: Response) -> int:
+        # Determine the size of the response body without reading the body
+        # of a streamed response.
+        length = response.headers.get('Content-Length')
+        if length is not None and length.isdigit():
+            return int(length)
+        if getattr(response, '_content_consumed', False):
+            return len(response.content)
+
+        return 0
+
+    def _repeat(self, method: str, path: str, send: Callable[..., Response],
+                kind: Optional[str] = None) -> Response:
+        # Perform a request, repeating it according to the retry policy.
+        policy = self._retry
+        if policy is None or not policy.allows(method, self._route(path)):
+            self._throttle(method, kind)
+            return self._attempt(send, self._timeout(method, path))
+
+        delays = policy.delays()
+        attempt = 1
+        while True:
+            try:
+                self._throttle(method, kind)
+                response = self._attempt(send, self._timeout(method, path))
+            except (CircuitOpenError, DeadlineExceeded):
+                raise
+            except (requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout):
+                delay = self._delay(policy, delays, attempt)
+                if delay is None:
+                    raise
+            else:
+                if response.status_code not in UNAVAILABLE:
+                    return response
+                delay = self._delay(policy, delays, attempt)
+                if delay is None:
+                    return response
+
+            sleep(delay)
+            attempt += 1
+
+    def _throttle(self, method: str, kind: Optional[str] = None) -> None:
+        # Wait until the rate limiter allows another attempt of a request.
+        if self._limiter is not None:
+            self._limiter.acquire(method, kind=kind)
+
+    @staticmethod
+    def _delay(policy: RetryPolicy, delays: Iterator[float],
+               attempt: int) -> Optional[float]:
+        # Determine the delay before another attempt, or None if no attempt
+        # should be made anymore.
+        if attempt >= policy.attempts:
+            return None
+
+        delay = next(delays)
+        left = remaining()
+        if left is not None and delay >= left:
+            return None
+
+        return delay
+
+    def _attempt(self, send: Callable[..., Response],
+                 timeout: Tuple[float, float]) -> Response:
+        # Perform a request once, tracking failures in the circuit breaker.
+        breaker = self._breaker
+        if breaker is None:
+            return send(timeout=timeout)
+
+        breaker.check()
+        failed = True
+        try:
+            response = send(timeout=timeout)
+            failed = response.status_code in UNAVAILABLE
+            return response
+        except requests.exceptions.RequestException as error:
+            failed = isinstance(error, (requests.exceptions.ConnectionError,
+                                        requests.exceptions.Timeout))
+            raise
+        finally:
+            breaker.record(failed)
+
+    def _create_adapter(self, pool_connections: Optional[int] = None,
+                        pool_maxsize: Optional[int] = None) -> HTTPAdapter:
+        # Use an adapter that keeps a pool of connections alive for each host,
+        # so that requests reuse connections.
+        if pool_connections is None:
+            pool_connections = self.POOL_SIZE
+        if pool_maxsize is None:
+            pool_maxsize = self.POOL_SIZE
+
+        return HTTPAdapter(pool_connections=pool_connections,
+                           pool_maxsize=pool_maxsize)
+
+    def _create_session(self, pool_connections: Optional[int] = None,
+                        pool_maxsize: Optional[int] = None) -> \
+            requests.Session:
+        session = requests.Session()
+        adapter = self._create_adapter(pool_connections, pool_maxsize)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def close(self) -> None:
+        """
+        Close the connections that the client keeps open to the API.
+        """
+
+    def __enter__(self: ClientT) -> ClientT:
+        return self
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]],
+                 exc_value: Optional[BaseException],
+                 traceback: Optional[TracebackType]) -> None:
+        self.close()
+
     def apps(self) -> List[Application]:
         """
         Retrieve all application definitions from the API.
@@ -96,16 +359,39 @@ class Client:
 
         raise NotImplementedError('Must be implemented by subclasses')
 
-    def instances(self) -> List[Instance]:
+    def instances(self, services: bool = True) -> List[Instance]:
         """
         Retrieve all live instances from the API.
 
+        Args:
+            services (bool): Whether to keep the services of the instances.
+                If this is disabled, then the instances have no services, which
+                makes summary listings cheaper.
+
         Returns:
             :obj:`list` of :obj:`bigboat.instance.Instance`
         """
 
         raise NotImplementedError('Must be implemented by subclasses')
 
+    def iter_instances(self, services: bool = True) -> Iterator[Instance]:
+        """
+        Retrieve all live instances from the API one by one.
+
+        Clients which support it parse the response while it is received,
+        such that the first instances are available early and the complete
+        response is not held in memory. The request is performed when the
+        first instance is requested from the iterator.
+
+        Args:
+            services (bool): Whether to keep the services of the instances.
+
+        Returns:
+            iterator of :obj:`bigboat.instance.Instance`
+        """
+
+        yield from self.instances(services=services)
+
     def get_instance(self, name: str) -> Optional[Instance]:
         """
         Retrieve a specific live instance from the API.
@@ -120,6 +406,31 @@ class Client:
 
         raise NotImplementedError('Must be implemented by subclasses')
 
+    def get_instances(self, names: Iterable[str],
+                      max_workers: Optional[int] = None) -> \
+            BatchResult[Optional[Instance]]:
+        """
+        Retrieve multiple live instances from the API concurrently.
+
+        Args:
+            names: The names of the instances.
+            max_workers (int or `None`): The maximum number of requests that
+                are performed at the same time, or `None` to use `POOL_SIZE`.
+
+        Returns:
+            :obj:`bigboat.batch.BatchResult`: The instances by their names,
+            with `None` for instances that do not exist. Errors raised while
+            retrieving an instance are collected in the `rejected` property
+            if they are raised by the API, or the `failed` property for
+            transport errors.
+        """
+
+        operations = [
+            (name, partial(self.get_instance, name))
+            for name in dict.fromkeys(names)
+        ]
+        return run_batch(operations, self._get_max_workers(max_workers))
+
     def update_instance(self, name: str, app_name: str, version: str,
                         **kwargs: Dict[str, str]) -> Optional[Instance]:
         """
@@ -138,6 +449,42 @@ class Client:
 
         raise NotImplementedError('Must be implemented by subclasses')
 
+    def update_instances(self, instances: Iterable[Instance],
+                         max_workers: Optional[int] = None) -> \
+            BatchResult[Optional[Instance]]:
+        """
+        Request multiple instances to be created with a desired state of
+        'running' concurrently.
+
+        Args:
+            instances: The instance entities to start. Each instance must have
+                application information, and may have parameters and options.
+            max_workers (int or `None`): The maximum number of requests that
+                are performed at the same time, or `None` to use `POOL_SIZE`.
+
+        Returns:
+            :obj:`bigboat.batch.BatchResult`: The started instances by their
+            names, with `None` for instances that failed to start. Errors
+            raised by the API, including missing application information,
+            are collected in the `rejected` property and transport errors in
+            the `failed` property.
+        """
+
+        operations = [
+            (instance.name, partial(self._update_instance, instance))
+            for instance in instances
+        ]
+        return run_batch(operations, self._get_max_workers(max_workers))
+
+    def _update_instance(self, instance: Instance) -> Optional[Instance]:
+        if instance.application is None:
+            raise ValueError('Application information required to start instance')
+
+        return self.update_instance(instance.name, instance.application.name,
+                                    instance.application.version,
+                                    parameters=instance.parameters,
+                                    options=instance.options)
+
     def delete_instance(self, name: str) -> Optional[Instance]:
         """
         Delete a specific live instance from the API.
@@ -152,32 +499,208 @@ class Client:
 
         raise NotImplementedError('Must be implemented by subclasses')
 
+    def delete_instances(self, names: Iterable[str],
+                         max_workers: Optional[int] = None) -> \
+            BatchResult[Optional[Instance]]:
+        """
+        Delete multiple live instances from the API concurrently.
+
+        Args:
+            names: The names of the instances.
+            max_workers (int or `None`): The maximum number of requests that
+                are performed at the same time, or `None` to use `POOL_SIZE`.
+
+        Returns:
+            :obj:`bigboat.batch.BatchResult`: The deleted instances by their
+            names, with `None` for instances that did not exist. Errors
+            raised by the API are collected in the `rejected` property and
+            transport errors in the `failed` property.
+        """
+
+        operations = [
+            (name, partial(self.delete_instance, name))
+            for name in dict.fromkeys(names)
+        ]
+        return run_batch(operations, self._get_max_workers(max_workers))
+
+    def watch_instances(self, interval: float = 5.0,
+                        max_interval: float = 60.0,
+                        services: bool = True) -> InstanceWatcher:
+        """
+        Watch the live instances for changes.
+
+        Args:
+            interval (float): The number of seconds between polls of the
+                instances while they are changing.
+            max_interval (float): The maximum number of seconds between polls
+                when the instances do not change.
+            services (bool): Whether to retrieve the services of the instances
+                and detect changes to them.
+
+        Returns:
+            :obj:`bigboat.watch.InstanceWatcher`: An iterator which provides
+            the added, removed and changed instances whenever a change is
+            detected, starting with all current instances as added ones.
+        """
+
+        return InstanceWatcher(self, interval=interval,
+                               max_interval=max_interval, services=services)
+
+    def wait_for_states(self, targets: Mapping[str, str], timeout: float,
+                        interval: float = 1.0, max_interval: float = 15.0) -> \
+            Dict[str, Instance]:
+        """
+        Wait until live instances reach their target states.
+
+        The instances are polled concurrently, with exponentially increasing
+        intervals between polls while no instance reaches its target state.
+
+        Args:
+            targets (dict): The target current states, such as 'running',
+                by the names of the instances.
+            timeout (float): The number of seconds to wait at most, which
+                bounds the requests of the polls as well. A timeout of zero
+                checks the states once.
+            interval (float): The first number of seconds between polls.
+            max_interval (float): The maximum number of seconds between polls.
+
+        Returns:
+            dict: The instances that reached their target state by their
+            names. Instances that did not reach their target state before
+            the timeout are not included.
+
+        Raises:
+            ValueError: If the API refused to provide an instance.
+        """
+
+        with self._bound_wait(timeout):
+            waiter = StateWaiter(targets, timeout, interval=interval,
+                                 max_interval=max_interval)
+            delay = waiter.update(self.get_instances(waiter.pending))
+            while delay is not None:
+                sleep(delay)
+                delay = waiter.update(self.get_instances(waiter.pending))
+
+        return waiter.reached
+
+    def wait_for_state(self, name: str, state: str, timeout: float) -> \
+            Optional[Instance]:
+        """
+        Wait until a live instance reaches a target state.
+
+        Args:
+            name (str): The name of the instance.
+            state (str): The target current state, such as 'running'.
+            timeout (float): The number of seconds to wait at most.
+
+        Returns:
+            :obj:`bigboat.instance.Instance` or `None`: The instance once it
+            reached the target state, or `None` if it did not reach the state
+            before the timeout.
+        """
+
+        return self.wait_for_states({name: state}, timeout).get(name)
+
+    @staticmethod
+    def _bound_wait(timeout: float) -> ContextManager[Optional[float]]:
+        # The polls for states are performed within a deadline at the timeout,
+        # except that the states are checked once with a timeout of zero.
+        if timeout > 0:
+            return deadline(timeout)
+
+        return nullcontext()
+
+    def _get_max_workers(self, max_workers: Optional[int]) -> int:
+        if max_workers is None:
+            return self.POOL_SIZE
+
+        return max_workers
+
 class Client_v1(Client):
     """
     Client for the deprecated BigBoat v1 API.
+
+    Args:
+        base_url (str): The base URL of the BigBoat instance.
+        pool_connections (int or `None`): The number of hosts for which
+            connection pools are kept, or `None` to use `POOL_SIZE`.
+        pool_maxsize (int or `None`): The maximum number of connections that
+            are kept alive for each host, or `None` to use `POOL_SIZE`.
+        retry (:obj:`bigboat.retry.RetryPolicy` or `None`): The policy for
+            repeating idempotent requests that fail due to transient problems,
+            or `None` to perform each request once.
+        breaker (:obj:`bigboat.retry.CircuitBreaker` or `None`): The circuit
+            breaker which stops performing requests while the API fails, or
+            `None` to always perform requests.
+        timeouts (dict or `None`): Timeouts for specific API methods, which
+            override those of `TIMEOUTS`. The keys are HTTP methods and path
+            templates, such as 'GET instances/{name}'. The values are either
+            read timeouts in seconds or pairs of connect and read timeouts.
+        fields_only (bool): Whether to parse only the top-level name and
+            version of application definitions, rather than the complete
+            documents, when retrieving them.
+        instruments (iterable or `None`): Hooks which are called before and
+            after each request, such as :obj:`bigboat.metrics.EndpointMetrics`,
+            or `None` to not instrument requests.
+        limiter (:obj:`bigboat.ratelimit.RateLimiter` or `None`): The rate
+            limiter which delays requests that exceed its rates, or `None` to
+            perform requests immediately.
     """
 
-    TIMEOUT = 60
+    ROUTES = (
+        'appdef/{name}/{version}', 'instances', 'state/{name}',
+        'start-app/{app_name}/{version}/{name}', 'stop-app/{name}'
+    )
+    TIMEOUTS: Timeouts = {
+        'GET appdef/{name}/{version}': 15,
+        'GET state/{name}': 15
+    }
+
+    def __init__(self, base_url: str, pool_connections: Optional[int] = None,
+                 pool_maxsize: Optional[int] = None,
+                 retry: Optional[RetryPolicy] = None,
+                 breaker: Optional[CircuitBreaker] = None,
+                 timeouts: Optional[Timeouts] = None,
+                 fields_only: bool = False,
+                 instruments: Optional[Iterable[Instrument]] = None,
+                 limiter: Optional[RateLimiter] = None):
+        # pylint: disable=too-many-arguments
+        super().__init__(base_url, retry=retry, breaker=breaker,
+                         timeouts=timeouts, instruments=instruments,
+                         limiter=limiter)
+        self._session = self._create_session(pool_connections, pool_maxsize)
+        self._fields_only = fields_only
+
+    def close(self) -> None:
+        self._session.close()
 
     def _format_url(self, path: str) -> str:
         return f'{self._base_url}/api/v1/{path}'
 
-    def _get(self, path: str) -> Response:
-        return requests.get(self._format_url(path), timeout=self.TIMEOUT)
+    def _get(self, path: str, kind: Optional[str] = None) -> Response:
+        return self._perform('GET', path,
+                             partial(self._session.get, self._format_url(path)),
+                             kind=kind)
 
     def _delete(self, path: str) -> Response:
-        return requests.delete(self._format_url(path), timeout=self.TIMEOUT)
+        return self._perform('DELETE', path,
+                             partial(self._session.delete,
+                                     self._format_url(path)))
 
     def apps(self) -> List[Application]:
         return []
 
+    @instrumented
     def get_app(self, name: str, version: str) -> Optional[Application]:
         try:
             request = self._get(f'appdef/{name}/{version}')
         except requests.exceptions.ConnectionError:
             return None
 
-        document = yaml.safe_load(request.text)
+        if self._fields_only:
+            document = load_fields(request.content, ('name', 'version'))
+        else:
+            document = load_appdef(request.content)
 
         return Application(self, document['name'], str(document['version']))
 
@@ -185,6 +708,7 @@ class Client_v1(Client):
         # Cannot create new apps through v1 API
         return None
 
+    @instrumented
     def delete_app(self, name: str, version: str) -> bool:
         request = self._delete(f'appdef/{name}/{version}')
 
@@ -193,7 +717,8 @@ class Client_v1(Client):
 
         return request.status_code == 200
 
-    def instances(self) -> List[Instance]:
+    @instrumented
+    def instances(self, services: bool = True) -> List[Instance]:
         request = self._get('instances')
 
         if request.status_code == 404:
@@ -202,6 +727,7 @@ class Client_v1(Client):
         data = request.json()
         return [Instance(self, name) for name in data['instances']]
 
+    @instrumented
     def get_instance(self, name: str) -> Optional[Instance]:
         request = self._get(f'state/{name}')
 
@@ -212,9 +738,12 @@ class Client_v1(Client):
 
         return Instance(self, name, state)
 
+    @instrumented
     def update_instance(self, name: str, app_name: str, version: str,
                         **kwargs: Dict[str, str]) -> Optional[Instance]:
-        request = self._get(f'start-app/{app_name}/{version}/{name}')
+        # The v1 API changes instances with GET requests.
+        request = self._get(f'start-app/{app_name}/{version}/{name}',
+                            kind=RateLimiter.WRITE)
 
         if request.status_code == 404:
             return None
@@ -222,48 +751,71 @@ class Client_v1(Client):
         return Instance(self, name, current_state='running',
                         application=Application(self, app_name, version))
 
+    @instrumented
     def delete_instance(self, name: str) -> Optional[Instance]:
-        request = self._get(f'stop-app/{name}')
+        request = self._get(f'stop-app/{name}', kind=RateLimiter.WRITE)
 
         if request.status_code == 404:
             return None
 
         return Instance(self, name, 'created')
 
-class Client_v2(Client):
+class Client_v2_Base(Client): # pylint: disable=abstract-method
     """
-    Client for the BigBoat v2 API.
+    Base class for clients of the BigBoat v2 API, which handles the formatting
+    of requests and the parsing of responses regardless of how the requests
+    are performed.
     """
 
-    TIMEOUT = 60
-
-    def __init__(self, base_url: str, api_key: str):
-        super().__init__(base_url)
+    ROUTES = (
+        'apps', 'apps/{name}/{version}',
+        'apps/{name}/{version}/files/{file_name}', 'instances',
+        'instances/{name}', 'status'
+    )
+    CHUNK_SIZE = 65536
+    # Cache key of the listing of instances without services
+    SUMMARY = 'instances#summary'
+    TIMEOUTS: Timeouts = {
+        'GET apps/{name}/{version}': 15,
+        'GET apps/{name}/{version}/files/{file_name}': 15,
+        'GET instances/{name}': 15,
+        'GET status': 15
+    }
+
+    def __init__(self, base_url: str, api_key: str,
+                 retry: Optional[RetryPolicy] = None,
+                 breaker: Optional[CircuitBreaker] = None,
+                 timeouts: Optional[Timeouts] = None,
+                 decoder: Optional[Union[str, Decoder]] = None,
+                 instruments: Optional[Iterable[Instrument]] = None,
+                 limiter: Optional[RateLimiter] = None):
+        # pylint: disable=too-many-arguments
+        super().__init__(base_url, retry=retry, breaker=breaker,
+                         timeouts=timeouts, instruments=instruments,
+                         limiter=limiter)
         self._api_key = api_key
-        self._session = requests.Session()
-        self._session.headers.update({'api-key': self._api_key})
+        self._decode = get_decoder(decoder)
+        if self._instruments:
+            self._decode = timed_decoder(self._decode)
+        # Identity map of applications, so that instances of the same
+        # application share one entity while any of them is in use.
+        self._applications: WeakValueDictionary[Tuple[str, str],
+                                                Application] = \
+            WeakValueDictionary()
 
     def _format_url(self, path: str) -> str:
         return f'{self._base_url}/api/v2/{path}'
 
-    def _get(self, path: str) -> Response:
-        return self._session.get(self._format_url(path), timeout=self.TIMEOUT)
-
-    def _put(self, path: str, content_type: Optional[str] = None,
-             data: Optional[Union[str, bytes]] = None,
-             json: Optional[Any] = None) -> Response:
+    @staticmethod
+    def _format_headers(content_type: Optional[str] = None,
+                        json: Optional[Any] = None) -> Dict[str, str]:
         headers: Dict[str, str] = {}
         if content_type is not None:
             headers['Content-Type'] = content_type
         elif json is not None:
             headers['Content-Type'] = 'application/json'
 
-        return self._session.put(self._format_url(path), headers=headers,
-                                 data=data, json=json, timeout=self.TIMEOUT)
-
-    def _delete(self, path: str) -> Response:
-        return self._session.delete(self._format_url(path),
-                                    timeout=self.TIMEOUT)
+        return headers
 
     @staticmethod
     def _check_bad_request(request: Response) -> None:
@@ -280,39 +832,316 @@ class Client_v2(Client):
             response = request.json()
             raise ValueError(response['message'])
 
+    @staticmethod
+    def _format_instance_data(app_name: str, version: str,
+                              **kwargs: Dict[str, str]) -> Dict[str, Any]:
+        return {
+            'app': app_name,
+            'version': version,
+            'parameters': kwargs.get('parameters') or {},
+            'options': kwargs.get('options') or {}
+        }
+
     def _format_app(self, app: Dict[str, str]) -> Application:
-        return Application(self, app['name'], app['version'])
+        key = (app['name'], app['version'])
+        application = self._applications.get(key)
+        if application is None:
+            application = Application(self, self._intern(key[0]),
+                                      self._intern(key[1]))
+            self._applications[key] = application
 
-    def apps(self) -> List[Application]:
-        request = self._get('apps')
+        return application
+
+    @staticmethod
+    def _intern(value: str) -> str:
+        if isinstance(value, str):
+            return intern(value)
+
+        return value
+
+    def _format_instance(self,
+                         instance: Dict[str, Union[str, Dict[str, Any]]],
+                         services: bool = True) -> Instance:
+        if 'app' in instance and isinstance(instance['app'], dict):
+            application = self._format_app(instance['app'])
+        else:
+            application = None
+
+        payload = instance.get('services') if services else None
+        if not isinstance(payload, dict):
+            payload = None
+
+        state = instance.get('state')
+        if not isinstance(state, dict):
+            state = {}
+
+        return Instance(self, str(instance.get('name')),
+                        current_state=state.get('current', 'running'),
+                        desired_state=state.get('desired'),
+                        application=application, services=payload)
+
+    def _parse_apps(self, request: Response) -> List[Application]:
         self._check_bad_request(request)
-        return [self._format_app(app) for app in request.json()]
+        return [
+            self._format_app(app) for app in self._decode(request.content)
+        ]
 
-    def get_app(self, name: str, version: str) -> Optional[Application]:
-        request = self._get(f'apps/{name}/{version}')
+    def _parse_app(self, request: Response) -> Optional[Application]:
         self._check_bad_request(request)
         if request.status_code == 404:
             return None
 
-        return self._format_app(request.json())
+        return self._format_app(self._decode(request.content))
 
-    def update_app(self, name: str, version: str) -> Optional[Application]:
-        try:
-            request = self._put(f'apps/{name}/{version}')
-        except requests.exceptions.ConnectionError:
-            return None
+    def _parse_deletion(self, request: Response) -> bool:
+        self._check_bad_request(request)
+        if request.status_code == 404:
+            return False
+
+        return True
 
+    def _parse_compose(self, request: Response) -> Optional[str]:
         self._check_bad_request(request)
-        return self._format_app(request.json())
+        if request.status_code == 404:
+            return None
 
-    def delete_app(self, name: str, version: str) -> bool:
-        request = self._delete(f'apps/{name}/{version}')
+        content_type = request.headers.get('content-type')
+        if content_type not in ('text/plain', 'text/yaml'):
+            return None
+
+        return request.text
+
+    def _parse_compose_update(self, request: Response) -> bool:
         self._check_bad_request(request)
         if request.status_code == 404:
             return False
 
+        if request.status_code != 201:
+            return False
+
         return True
 
+    def _parse_instances(self, request: Response,
+                         services: bool = True) -> List[Instance]:
+        self._check_bad_request(request)
+        return [
+            self._format_instance(instance, services=services)
+            for instance in self._decode(request.content)
+        ]
+
+    def _parse_summary(self, request: Response) -> List[Instance]:
+        return self._parse_instances(request, services=False)
+
+    def _parse_instance(self, request: Response) -> Optional[Instance]:
+        self._check_bad_request(request)
+        if request.status_code == 404:
+            return None
+
+        return self._format_instance(self._decode(request.content))
+
+    def _parse_statuses(self, request: Response) -> List[Dict[str, Any]]:
+        self._check_bad_request(request)
+        return self._decode(request.content)
+
+class Client_v2(Client_v2_Base):
+    """
+    Client for the BigBoat v2 API.
+
+    Args:
+        base_url (str): The base URL of the BigBoat instance.
+        api_key (str): The API key to authenticate with.
+        pool_connections (int or `None`): The number of hosts for which
+            connection pools are kept, or `None` to use `POOL_SIZE`.
+        pool_maxsize (int or `None`): The maximum number of connections that
+            are kept alive for each host, or `None` to use `POOL_SIZE`.
+        cache (:obj:`bigboat.cache.ResponseCache` or `None`): A cache for
+            the parsed responses of GET requests, or `None` to always perform
+            the requests. Methods that change entities through the API remove
+            the affected entries from the cache.
+        conditional (:obj:`bigboat.cache.ConditionalCache` or `None`):
+            A cache of validators of responses to GET requests, in order to
+            perform conditional requests and reuse earlier parsed responses
+            if the resource was not modified, or `None` to always retrieve
+            and parse complete responses.
+        compose (:obj:`bigboat.cache.ComposeCache` or `None`): A cache of
+            the contents of compose files, in order to skip uploads of
+            unchanged files and retrievals of known files, or `None` to
+            always perform the requests.
+        coalesce (bool): Whether concurrent identical GET requests share the
+            response of the request that is in progress, rather than each
+            performing their own request.
+        retry (:obj:`bigboat.retry.RetryPolicy` or `None`): The policy for
+            repeating idempotent requests that fail due to transient problems,
+            or `None` to perform each request once.
+        breaker (:obj:`bigboat.retry.CircuitBreaker` or `None`): The circuit
+            breaker which stops performing requests while the API fails, or
+            `None` to always perform requests.
+        timeouts (dict or `None`): Timeouts for specific API methods, which
+            override those of `TIMEOUTS`. The keys are HTTP methods and path
+            templates, such as 'GET instances/{name}'. The values are either
+            read timeouts in seconds or pairs of connect and read timeouts.
+        decoder (str, callable or `None`): The JSON library to decode
+            responses with, such as 'orjson', 'ujson' or 'json', a function
+            that decodes bytes, or `None` to use the fastest installed
+            library.
+        instruments (iterable or `None`): Hooks which are called before and
+            after each request, such as :obj:`bigboat.metrics.EndpointMetrics`,
+            or `None` to not instrument requests.
+        thread_safe (bool): Whether the client may be used by multiple
+            threads at the same time. The requests are then performed with
+            a :obj:`bigboat.session.SessionPool` of sessions that share the
+            pool of connections, which should have a `pool_maxsize` of at
+            least the number of threads.
+        limiter (:obj:`bigboat.ratelimit.RateLimiter` or `None`): The rate
+            limiter which delays requests that exceed its rates, or `None` to
+            perform requests immediately.
+    """
+
+    def __init__(self, base_url: str, api_key: str,
+                 pool_connections: Optional[int] = None,
+                 pool_maxsize: Optional[int] = None,
+                 cache: Optional[ResponseCache] = None,
+                 conditional: Optional[ConditionalCache] = None,
+                 compose: Optional[ComposeCache] = None,
+                 coalesce: bool = True,
+                 retry: Optional[RetryPolicy] = None,
+                 breaker: Optional[CircuitBreaker] = None,
+                 timeouts: Optional[Timeouts] = None,
+                 decoder: Optional[Union[str, Decoder]] = None,
+                 instruments: Optional[Iterable[Instrument]] = None,
+                 thread_safe: bool = False,
+                 limiter: Optional[RateLimiter] = None):
+        # pylint: disable=too-many-arguments,too-many-locals
+        super().__init__(base_url, api_key, retry=retry, breaker=breaker,
+                         timeouts=timeouts, decoder=decoder,
+                         instruments=instruments, limiter=limiter)
+        self._session: Union[requests.Session, SessionPool]
+        if thread_safe:
+            self._session = SessionPool(
+                self._create_adapter(pool_connections, pool_maxsize),
+                headers={'api-key': self._api_key},
+                size=self.POOL_SIZE if pool_maxsize is None else pool_maxsize
+            )
+        else:
+            self._session = self._create_session(pool_connections,
+                                                 pool_maxsize)
+            self._session.headers.update({'api-key': self._api_key})
+        self._cache = cache
+        self._conditional = conditional
+        self._compose = compose
+        self._flights = SingleFlight() if coalesce else None
+
+    def close(self) -> None:
+        self._session.close()
+
+    def _get(self, path: str,
+             headers: Optional[Dict[str, str]] = None) -> Response:
+        return self._perform('GET', path,
+                             partial(self._session.get, self._format_url(path),
+                                     headers=headers))
+
+    def _put(self, path: str, content_type: Optional[str] = None,
+             data: Optional[Union[str, bytes]] = None,
+             json: Optional[Any] = None) -> Response:
+        headers = self._format_headers(content_type=content_type, json=json)
+        return self._perform('PUT', path,
+                             partial(self._session.put, self._format_url(path),
+                                     headers=headers, data=data, json=json))
+
+    def _delete(self, path: str) -> Response:
+        return self._perform('DELETE', path,
+                             partial(self._session.delete,
+                                     self._format_url(path)))
+
+    def _fetch(self, path: str, parse: Callable[[Response], T],
+               key: Optional[str] = None) -> T:
+        # The key distinguishes cached values of the same path which are
+        # parsed differently.
+        if key is None:
+            key = path
+
+        if self._cache is not None:
+            found, value = self._cache.lookup(key)
+            if found:
+                return self._copy(value)
+
+        load = partial(self._load, path, parse, key)
+        if self._flights is None:
+            return self._copy(load())
+
+        # Share the result of an identical request that is in progress.
+        return self._copy(self._flights.do(key, load))
+
+    def _load(self, path: str, parse: Callable[[Response], T], key: str) -> T:
+        value = self._fetch_parsed(path, parse, key)
+        if self._cache is not None:
+            self._cache.store(key, self._route(path), value)
+
+        return value
+
+    def _fetch_parsed(self, path: str, parse: Callable[[Response], T],
+                      key: str) -> T:
+        if self._conditional is None:
+            return parse(self._get(path))
+
+        request = self._get(path, headers=self._conditional.headers(key))
+        if request.status_code == 304:
+            found, value = self._conditional.reuse(key)
+            if found:
+                return value
+
+        start = perf_counter()
+        value = parse(request)
+        self._conditional.store(key, request, value, perf_counter() - start)
+        return value
+
+    @staticmethod
+    def _copy(value: T) -> T:
+        # Provide a separate list so that a stored value is not altered
+        if isinstance(value, list):
+            return cast(T, copy(value))
+
+        return value
+
+    def _invalidate(self, *paths: str, prefix: Optional[str] = None) -> None:
+        if self._cache is not None:
+            self._cache.invalidate(*paths, prefix=prefix)
+        if self._flights is not None:
+            self._flights.forget(*paths, prefix=prefix)
+
+    @instrumented
+    def apps(self) -> List[Application]:
+        return self._fetch('apps', self._parse_apps)
+
+    @instrumented
+    def get_app(self, name: str, version: str) -> Optional[Application]:
+        return self._fetch(f'apps/{name}/{version}', self._parse_app)
+
+    @instrumented
+    def update_app(self, name: str, version: str) -> Optional[Application]:
+        path = f'apps/{name}/{version}'
+        try:
+            request = self._put(path)
+        except requests.exceptions.ConnectionError:
+            return None
+        finally:
+            self._invalidate('apps', path)
+
+        return self._parse_app(request)
+
+    @instrumented
+    def delete_app(self, name: str, version: str) -> bool:
+        path = f'apps/{name}/{version}'
+        try:
+            request = self._delete(path)
+        finally:
+            self._invalidate('apps', path, prefix=f'{path}/')
+            if self._compose is not None:
+                self._compose.invalidate(prefix=self._format_url(f'{path}/'))
+
+        return self._parse_deletion(request)
+
+    @instrumented
     def get_compose(self, name: str, version: str, file_name: str) -> \
             Optional[str]:
         """
@@ -330,22 +1159,33 @@ class Client_v2(Client):
         """
 
         path = f'apps/{name}/{version}/files/{file_name}'
-        request = self._get(path)
-        self._check_bad_request(request)
-        if request.status_code == 404:
-            return None
-
-        content_type = request.headers.get('content-type')
-        if content_type not in ('text/plain', 'text/yaml'):
-            return None
+        if self._compose is None:
+            return self._fetch(path, self._parse_compose)
+
+        # The compose cache identifies files by their URL, which includes the
+        # dashboard, since it may be shared by clients of other dashboards.
+        url = self._format_url(path)
+        found, content = self._compose.lookup(url)
+        if found:
+            return content
+
+        content = self._fetch(path, self._parse_compose)
+        if content is None:
+            self._compose.invalidate(url)
+        else:
+            self._compose.store(url, content)
 
-        return request.text
+        return content
 
+    @instrumented
     def update_compose(self, name: str, version: str, file_name: str,
                        content: Union[str, bytes]) -> bool:
         """
         Update a docker compose or bigboat compose file for the application.
 
+        If the client has a compose cache and the contents are the same as
+        the known remote contents, then the file is not uploaded again.
+
         Args:
             name (str): The name of the application
             version (str): The version of the application
@@ -353,7 +1193,8 @@ class Client_v2(Client):
             content (str or bytes): The file contents
 
         Returns:
-            bool: Whether the compose file was successfully updated.
+            bool: Whether the compose file was successfully updated or already
+            had the contents.
 
         Raises:
             ValueError: When the compose file could not be parsed as a valid
@@ -363,72 +1204,86 @@ class Client_v2(Client):
         """
 
         path = f'apps/{name}/{version}/files/{file_name}'
-        request = self._put(path, content_type='text/plain', data=content)
-        self._check_bad_request(request)
-        if request.status_code == 404:
-            return False
+        url = self._format_url(path)
+        if self._compose is not None and self._compose.matches(url, content):
+            return True
 
-        if request.status_code != 201:
-            return False
-
-        return True
+        try:
+            request = self._put(path, content_type='text/plain', data=content)
+        finally:
+            self._invalidate(path)
+            if self._compose is not None:
+                self._compose.invalidate(url)
 
-    def _format_instance(self,
-                         instance: Dict[str, Union[str, Dict[str, Any]]]) -> \
-            Instance:
-        if 'app' in instance and isinstance(instance['app'], dict):
-            application = self._format_app(instance['app'])
-        else:
-            application = None
+        updated = self._parse_compose_update(request)
+        if updated and self._compose is not None:
+            self._compose.store(url, content)
 
-        services = instance.get('services')
-        if not isinstance(services, dict):
-            services = None
+        return updated
 
-        state = instance.get('state')
-        if not isinstance(state, dict):
-            state = {}
+    @instrumented
+    def instances(self, services: bool = True) -> List[Instance]:
+        if services:
+            return self._fetch('instances', self._parse_instances)
 
-        return Instance(self, str(instance.get('name')),
-                        current_state=state.get('current', 'running'),
-                        desired_state=state.get('desired'),
-                        application=application, services=services)
+        return self._fetch('instances', self._parse_summary,
+                           key=self.SUMMARY)
 
-    def instances(self) -> List[Instance]:
-        request = self._get('instances')
-        self._check_bad_request(request)
-        return [self._format_instance(instance) for instance in request.json()]
+    def iter_instances(self, services: bool = True,
+                       chunk_size: Optional[int] = None) -> Iterator[Instance]:
+        """
+        Retrieve all live instances from the API one by one, parsing the
+        response while it is received. The response cache is not used.
 
-    def get_instance(self, name: str) -> Optional[Instance]:
-        request = self._get(f'instances/{name}')
-        self._check_bad_request(request)
+        Args:
+            services (bool): Whether to keep the services of the instances.
+            chunk_size (int or `None`): The number of bytes to read from the
+                response at a time, or `None` to use `CHUNK_SIZE`.
 
-        if request.status_code == 404:
-            return None
+        Returns:
+            iterator of :obj:`bigboat.instance.Instance`
+        """
 
-        return self._format_instance(request.json())
+        request = self._perform('GET', 'instances',
+                                partial(self._session.get,
+                                        self._format_url('instances'),
+                                        stream=True))
+        try:
+            self._check_bad_request(request)
+            if chunk_size is None:
+                chunk_size = self.CHUNK_SIZE
+            for instance in iter_json_array(request.iter_content(chunk_size)):
+                yield self._format_instance(instance, services=services)
+        finally:
+            request.close()
+
+    @instrumented
+    def get_instance(self, name: str) -> Optional[Instance]:
+        return self._fetch(f'instances/{name}', self._parse_instance)
 
+    @instrumented
     def update_instance(self, name: str, app_name: str, version: str,
                         **kwargs: Dict[str, str]) -> Optional[Instance]:
-        data = {
-            'app': app_name,
-            'version': version,
-            'parameters': kwargs.get('parameters') or {},
-            'options': kwargs.get('options') or {}
-        }
-        request = self._put(f'instances/{name}', json=data)
-
-        self._check_bad_request(request)
+        path = f'instances/{name}'
+        data = self._format_instance_data(app_name, version, **kwargs)
+        try:
+            request = self._put(path, json=data)
+        finally:
+            self._invalidate('instances', self.SUMMARY, path)
 
-        return self._format_instance(request.json())
+        return self._parse_instance(request)
 
+    @instrumented
     def delete_instance(self, name: str) -> Optional[Instance]:
-        request = self._delete(f'instances/{name}')
-
-        self._check_bad_request(request)
+        path = f'instances/{name}'
+        try:
+            request = self._delete(path)
+        finally:
+            self._invalidate('instances', self.SUMMARY, path)
 
-        return self._format_instance(request.json())
+        return self._parse_instance(request)
 
+    @instrumented
     def statuses(self) -> List[Dict[str, Any]]:
         """
         Retrieve all status items reported by BigBoat.
@@ -437,6 +1292,4 @@ class Client_v2(Client):
             :obj:`list` of :obj:`dict`: The status items
         """
 
-        request = self._get('status')
-        self._check_bad_request(request)
-        return request.json()
+        return self._fetch('status', self._parse_statuses)
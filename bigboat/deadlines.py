@@ -0,0 +1,80 @@
+"""
+Deadlines which bound the total time spent on requests to the BigBoat API.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import monotonic
+from typing import Iterator, Optional
+from requests.exceptions import Timeout
+
+_DEADLINE: ContextVar[Optional[float]] = ContextVar('bigboat_deadline',
+                                                    default=None)
+
+class DeadlineExceeded(Timeout):
+    """
+    Error indicating that a request was not performed because the deadline
+    of the current context has passed.
+    """
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[float]:
+    """
+    Bound the total time of the requests that clients perform within the
+    context, including those of batch operations and waits for states.
+
+    The timeouts of requests are shortened to end at the deadline, repeated
+    requests and polls are not started after the deadline, and requests that
+    would start after the deadline raise :obj:`bigboat.deadlines.DeadlineExceeded`.
+    A nested deadline can only shorten the deadline of an outer context.
+
+    Args:
+        seconds (float): The number of seconds from now until the deadline.
+
+    Returns:
+        A context manager which provides the deadline as a monotonic clock
+        value.
+    """
+
+    end = monotonic() + seconds
+    outer = _DEADLINE.get()
+    if outer is not None:
+        end = min(end, outer)
+
+    token = _DEADLINE.set(end)
+    try:
+        yield end
+    finally:
+        _DEADLINE.reset(token)
+
+def remaining() -> Optional[float]:
+    """
+    Determine the time left until the deadline of the current context.
+
+    Returns:
+        float or `None`: The number of seconds until the deadline, which is
+        negative if the deadline has passed, or `None` if there is no
+        deadline.
+    """
+
+    end = _DEADLINE.get()
+    if end is None:
+        return None
+
+    return end - monotonic()
@@ -0,0 +1,65 @@
+"""
+Decoders of JSON responses from the BigBoat API.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from importlib import import_module
+from typing import Any, Callable, Optional, Tuple, Union
+
+# Decoder of a JSON document from UTF-8 encoded bytes
+Decoder = Callable[[bytes], Any]
+
+# Modules which provide a JSON decoder, in order of preference
+BACKENDS: Tuple[str, ...] = ('orjson', 'ujson', 'json')
+
+def get_decoder(backend: Optional[Union[str, Decoder]] = None) -> Decoder:
+    """
+    Select a function that decodes JSON documents from bytes.
+
+    The decoders of the backends accept the bytes of a response directly, such
+    that no intermediate text string is created for faster JSON libraries.
+    They raise a `ValueError` for invalid JSON.
+
+    Args:
+        backend (str, callable or `None`): The name of the module whose
+            `loads` function is used, a decoder function, or `None` to use
+            the first available module of `BACKENDS`.
+
+    Returns:
+        callable: The decoder function.
+
+    Raises:
+        ValueError: If the backend is not known or not installed.
+    """
+
+    if callable(backend):
+        return backend
+
+    if backend is not None and backend not in BACKENDS:
+        raise ValueError(f'Unknown JSON backend: {backend}')
+
+    for name in BACKENDS if backend is None else (backend,):
+        try:
+            module = import_module(name)
+        except ImportError:
+            continue
+
+        decoder: Decoder = module.loads
+        return decoder
+
+    raise ValueError(f'JSON backend is not installed: {backend}')
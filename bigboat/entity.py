@@ -33,6 +33,8 @@ class Entity(Generic[EntityT_co]):
     An entity from the BigBoat API.
     """
 
+    __slots__ = ('_client', '__weakref__')
+
     def __init__(self, client: Client):
         self._client = client
 
@@ -59,5 +61,9 @@ class Entity(Generic[EntityT_co]):
 
         raise NotImplementedError('Must be implemented by subclasses')
 
-    def __getattr__(self, attr: str) -> Any:
-        raise AttributeError
+    if TYPE_CHECKING: # pragma: no cover
+        # Type checkers cannot detect the properties added by the readonly
+        # decorator; at runtime, missing attributes raise an AttributeError
+        # without calling a Python method.
+        def __getattr__(self, attr: str) -> Any:
+            raise AttributeError
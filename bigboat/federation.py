@@ -0,0 +1,175 @@
+"""
+Client that combines the APIs of multiple BigBoat dashboards.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from functools import partial
+from types import TracebackType
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, \
+    Type, TypeVar
+from .application import Application
+from .batch import BatchResult, run_batch
+from .client import Client, Client_v2
+from .deadlines import deadline
+from .instance import Instance
+
+T = TypeVar('T')
+
+class FederatedResult(BatchResult[List[T]]):
+    """
+    Results of an operation performed on multiple BigBoat dashboards.
+
+    The result is a dictionary of the base URLs of the dashboards which
+    responded in time, with the list of entities from that dashboard as
+    values. Dashboards that refused the request are in the `rejected`
+    property, while those that could not be reached or did not respond
+    before their timeout are in the `failed` property.
+    """
+
+    @property
+    def merged(self) -> List[Tuple[str, T]]:
+        """
+        The entities of all the dashboards that responded, as pairs of the
+        base URL of the dashboard and the entity.
+        """
+
+        return [
+            (base_url, item) for base_url, items in self.items()
+            for item in items
+        ]
+
+class FederatedClient:
+    """
+    Client that performs requests on multiple BigBoat dashboards concurrently
+    and combines their results.
+
+    The federated client can be used as a context manager, which closes all
+    the clients when leaving the context.
+
+    Args:
+        clients: The v1 and v2 clients of the dashboards. Each dashboard must
+            have a distinct base URL.
+        timeout (float): The default number of seconds to wait for results
+            from a dashboard, after which it is considered to have failed.
+        timeouts (dict or `None`): Number of seconds to wait for results from
+            specific dashboards, by their base URL.
+    """
+
+    TIMEOUT = 10.0
+
+    def __init__(self, clients: Iterable[Client], timeout: float = TIMEOUT,
+                 timeouts: Optional[Dict[str, float]] = None):
+        self._clients: Dict[str, Client] = {}
+        for client in clients:
+            if client.base_url in self._clients:
+                raise ValueError(f'Duplicate client for {client.base_url}')
+            self._clients[client.base_url] = client
+
+        self._timeouts = {
+            base_url: timeout for base_url in self._clients
+        }
+        if timeouts is not None:
+            self._timeouts.update(timeouts)
+
+    @property
+    def clients(self) -> Dict[str, Client]:
+        """
+        The clients of the dashboards by their base URL.
+        """
+
+        return self._clients.copy()
+
+    def close(self) -> None:
+        """
+        Close the connections of all the clients.
+        """
+
+        for client in self._clients.values():
+            client.close()
+
+    def __enter__(self) -> 'FederatedClient':
+        return self
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]],
+                 exc_value: Optional[BaseException],
+                 traceback: Optional[TracebackType]) -> None:
+        self.close()
+
+    def _run(self, operations: Iterable[Tuple[str, Callable[[], List[T]]]]) \
+            -> FederatedResult[T]:
+        # Perform each operation within a deadline, such that the requests to
+        # a slow dashboard end at its timeout rather than continuing in the
+        # background after the result is already considered to have failed.
+        result: FederatedResult[T] = FederatedResult()
+        run_batch([
+            (base_url, partial(self._bound, self._timeouts[base_url],
+                               operation))
+            for base_url, operation in operations
+        ], max(1, len(self._clients)), timeouts=self._timeouts, result=result)
+        return result
+
+    @staticmethod
+    def _bound(timeout: float, operation: Callable[[], List[T]]) -> List[T]:
+        with deadline(timeout):
+            return operation()
+
+    def apps(self) -> FederatedResult[Application]:
+        """
+        Retrieve the applications of all the dashboards.
+
+        Returns:
+            :obj:`bigboat.federation.FederatedResult`: Lists of applications
+            by base URL of the dashboards, with errors for dashboards that
+            did not respond in time.
+        """
+
+        return self._run([
+            (base_url, client.apps) for base_url, client in self._clients.items()
+        ])
+
+    def instances(self) -> FederatedResult[Instance]:
+        """
+        Retrieve the live instances of all the dashboards.
+
+        Returns:
+            :obj:`bigboat.federation.FederatedResult`: Lists of instances by
+            base URL of the dashboards, with errors for dashboards that did
+            not respond in time.
+        """
+
+        return self._run([
+            (base_url, client.instances)
+            for base_url, client in self._clients.items()
+        ])
+
+    def statuses(self) -> FederatedResult[Dict[str, Any]]:
+        """
+        Retrieve the status items of all the dashboards which use the v2 API.
+        Dashboards with other clients are not included in the result.
+
+        Returns:
+            :obj:`bigboat.federation.FederatedResult`: Lists of status items
+            by base URL of the dashboards, with errors for dashboards that
+            did not respond in time.
+        """
+
+        return self._run([
+            (base_url, client.statuses)
+            for base_url, client in self._clients.items()
+            if isinstance(client, Client_v2)
+        ])
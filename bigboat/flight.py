@@ -0,0 +1,155 @@
+"""
+Coalescing of concurrent identical requests to the BigBoat API.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from threading import Event, Lock
+from typing import Any, Callable, Dict, Optional, Tuple, Type, TypeVar
+from requests.exceptions import Timeout
+from .deadlines import DeadlineExceeded, remaining
+
+T = TypeVar('T')
+
+class Flight: # pylint: disable=too-few-public-methods
+    """
+    A call which is in progress, whose outcome is shared with the callers
+    that wait for it.
+    """
+
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self) -> None:
+        self.done = Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+class SingleFlight:
+    """
+    Coordination of calls by key, such that only one call for each key is in
+    progress at a time. Callers that request the same key while a call is in
+    progress wait for it and receive its result or error, instead of
+    performing their own call.
+
+    Only calls in progress are shared, so results are never older than the
+    start of the waiting. Errors that may be caused by the context of the
+    caller that performs the call, such as timeouts that are shortened to
+    its deadline, are not shared: the waiting callers then perform their own
+    calls instead.
+    """
+
+    # Errors which depend on the context of the caller that performs the call
+    CONTEXT_ERRORS: Tuple[Type[BaseException], ...] = (Timeout,)
+
+    def __init__(self) -> None:
+        self._flights: Dict[str, Flight] = {}
+        self._lock = Lock()
+        self._calls = 0
+        self._coalesced = 0
+
+    @property
+    def calls(self) -> int:
+        """
+        The number of calls that were performed.
+        """
+
+        return self._calls
+
+    @property
+    def coalesced(self) -> int:
+        """
+        The number of callers that received the outcome of a call that was
+        already in progress.
+        """
+
+        return self._coalesced
+
+    def do(self, key: str, function: Callable[[], T]) -> T:
+        """
+        Perform a call, or wait for the call for the same key in progress.
+
+        Waiting callers stop waiting at the deadline of their context. If the
+        call in progress fails with one of the `CONTEXT_ERRORS`, then the
+        waiting callers perform the call again.
+
+        Args:
+            key (str): The key of the call, such as the path of a request.
+            function (callable): The call to perform if none is in progress.
+
+        Returns:
+            The result of the call.
+
+        Raises:
+            :obj:`bigboat.deadlines.DeadlineExceeded`: If the deadline of the
+                context passes while waiting for a call in progress.
+            Exception: The error that the call raised.
+        """
+
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = Flight()
+                self._flights[key] = flight
+                self._calls += 1
+                leader = True
+            else:
+                self._coalesced += 1
+                leader = False
+
+        if leader:
+            try:
+                flight.value = function()
+            except BaseException as error:
+                flight.error = error
+                raise
+            finally:
+                with self._lock:
+                    if self._flights.get(key) is flight:
+                        del self._flights[key]
+                flight.done.set()
+
+            return flight.value
+
+        left = remaining()
+        if not flight.done.wait(None if left is None else max(0.0, left)):
+            raise DeadlineExceeded(f'Deadline passed while waiting for {key}')
+        if isinstance(flight.error, self.CONTEXT_ERRORS):
+            return self.do(key, function)
+        if flight.error is not None:
+            raise flight.error
+
+        return flight.value
+
+    def forget(self, *keys: str, prefix: Optional[str] = None) -> None:
+        """
+        Stop sharing calls in progress, such that later callers perform their
+        own calls. This is used when the outcome of the calls may be outdated,
+        for example because the entities were changed.
+
+        Args:
+            *keys: The keys of the calls to stop sharing.
+            prefix (str or `None`): Stop sharing all calls whose key starts
+                with this prefix.
+        """
+
+        with self._lock:
+            for key in keys:
+                self._flights.pop(key, None)
+            if prefix is not None:
+                for key in [key for key in self._flights
+                            if key.startswith(prefix)]:
+                    del self._flights[key]
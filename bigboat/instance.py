@@ -18,8 +18,11 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-from typing import Any, Dict, List, Optional, Tuple, Union, TYPE_CHECKING
+from inspect import isawaitable
+from typing import Any, Awaitable, Dict, List, Optional, Tuple, Union, \
+    TYPE_CHECKING
 from .entity import Entity
+from .service import Service
 from .utils import readonly
 if TYPE_CHECKING: # pragma: no cover
     # pylint: disable=cyclic-import
@@ -31,11 +34,14 @@ else:
 
 @readonly("name", "current_state", "desired_state", "application", "services",
           "parameters", "options")
-class Instance(Entity):
+class Instance(Entity): # pylint: disable=too-many-instance-attributes
     """
     A deployed (parameterized) application instance entity.
     """
 
+    __slots__ = ('_name', '_current_state', '_desired_state', '_application',
+                 '_services', '_parameters', '_options', '_service_entities')
+
     def __init__(self, client: Client, name: str,
                  current_state: Optional[str] = None,
                  **kwargs: Optional[Union[str, Application, Dict[str, Any]]]):
@@ -49,6 +55,69 @@ class Instance(Entity):
         self._parameters = kwargs.get('parameters')
         self._options = kwargs.get('options')
 
+        # The service entities are built from the services payload when they
+        # are first needed, such that listings which do not use them keep
+        # only the payload.
+        self._service_entities: Optional[Tuple[Service, ...]] = None
+
+    def get_services(self) -> Optional[Tuple[Service, ...]]:
+        """
+        Retrieve the services of the instance as entities.
+
+        Returns:
+            tuple of :obj:`bigboat.service.Service` or `None`: The services,
+            or `None` if the services of the instance are not known.
+        """
+
+        if self._service_entities is None and isinstance(self._services, dict):
+            self._service_entities = tuple(
+                Service.from_payload(self.client, name, payload)
+                for name, payload in self._services.items()
+                if isinstance(payload, dict)
+            )
+
+        return self._service_entities
+
+    def get_service(self, name: str) -> Optional[Service]:
+        """
+        Retrieve a service of the instance by its name.
+
+        Args:
+            name (str): The name of the service.
+
+        Returns:
+            :obj:`bigboat.service.Service` or `None`: The service, or `None`
+            if the instance has no known service with the name.
+        """
+
+        services = self.get_services()
+        if services is None:
+            return None
+
+        for service in services:
+            if service.name == name:
+                return service
+
+        return None
+
+    def services_in_state(self, state: str = 'running') -> bool:
+        """
+        Check whether all the services of the instance have a state.
+
+        Args:
+            state (str): The state of the services, such as 'running'.
+
+        Returns:
+            bool: Whether the services are known and all of them have the
+            state.
+        """
+
+        services = self.get_services()
+        if services is None:
+            return False
+
+        return all(service.state == state for service in services)
+
     def update(self) -> Optional['Instance']:
         """
         Request the instance to be created with a desired state of 'running'.
@@ -65,9 +134,31 @@ class Instance(Entity):
     def delete(self) -> bool:
         """
         Request the instance to be stopped.
+
+        For instances of an asynchronous client, this returns a coroutine.
         """
 
-        return self.client.delete_instance(self.name) is not None
+        result = self.client.delete_instance(self.name)
+        if isawaitable(result):
+            return _is_deleted(result) # type: ignore[return-value]
+
+        return result is not None
+
+    def wait_for(self, state: str, timeout: float) -> Optional['Instance']:
+        """
+        Wait until the instance reaches a target state.
+
+        Args:
+            state (str): The target current state, such as 'running'.
+            timeout (float): The number of seconds to wait at most.
+
+        Returns:
+            :obj:`bigboat.instance.Instance` or `None`: The instance once it
+            reached the target state, or `None` if it did not reach the state
+            before the timeout.
+        """
+
+        return self.client.wait_for_state(self.name, state, timeout)
 
     def __repr__(self) -> str:
         parts: List[Tuple[str, Union[str, Application, Dict[str, Any]]]] = [
@@ -82,3 +173,6 @@ class Instance(Entity):
         properties = [f'{key}={value!r}' for (key, value) in parts]
 
         return f'Instance({", ".join(properties)})'
+
+async def _is_deleted(result: Awaitable[Optional[Instance]]) -> bool:
+    return await result is not None
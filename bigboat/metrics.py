@@ -0,0 +1,373 @@
+"""
+Instrumentation of requests to the BigBoat API, with hooks and aggregated
+metrics per endpoint.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, \
+    TypeVar, TYPE_CHECKING, cast
+from .decode import Decoder
+if TYPE_CHECKING: # pragma: no cover
+    # pylint: disable=cyclic-import
+    from .client import Client
+else:
+    Client = object
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+class RequestInfo: # pylint: disable=too-many-instance-attributes
+    """
+    Information about a request to the API, which instruments receive before
+    the request is performed and once its response is handled.
+
+    The durations are in seconds. The network time covers all attempts of the
+    request, including delays between them. The decode time is spent on
+    decoding the JSON response and the build time is the remainder of the
+    time spent on handling the response, such as building entities.
+    """
+
+    __slots__ = ('method', 'route', 'path', 'status', 'size', 'attempts',
+                 'network', 'decode', 'build', 'error')
+
+    def __init__(self, method: str, route: str, path: str):
+        self.method = method
+        self.route = route
+        self.path = path
+        self.status: Optional[int] = None
+        self.size = 0
+        self.attempts = 0
+        self.network = 0.0
+        self.decode = 0.0
+        self.build = 0.0
+        self.error: Optional[BaseException] = None
+
+    @property
+    def endpoint(self) -> str:
+        """
+        The HTTP method and path template of the request.
+        """
+
+        return f'{self.method} {self.route}'
+
+    @property
+    def duration(self) -> float:
+        """
+        The total number of seconds spent on the request and its response.
+        """
+
+        return self.network + self.decode + self.build
+
+    def __repr__(self) -> str:
+        return (f'RequestInfo(endpoint={self.endpoint!r}, path={self.path!r}, '
+                f'status={self.status!r}, size={self.size!r}, '
+                f'network={self.network:.6f}, decode={self.decode:.6f}, '
+                f'build={self.build:.6f})')
+
+class Instrument:
+    """
+    Base class for hooks which are called for each request that a client
+    performs. Subclasses override the hooks that they need.
+    """
+
+    def before(self, info: RequestInfo) -> None:
+        """
+        Handle a request before it is performed. Only the method, path
+        template and path of the request are known at this point.
+
+        Args:
+            info (:obj:`bigboat.metrics.RequestInfo`): The request.
+        """
+
+    def after(self, info: RequestInfo) -> None:
+        """
+        Handle a request once its response is handled or it failed.
+
+        Args:
+            info (:obj:`bigboat.metrics.RequestInfo`): The request, with its
+                status, response size, timings and error, if any.
+        """
+
+class Histogram:
+    """
+    Histogram of observed values with cumulative counts of values up to
+    fixed upper bounds.
+
+    Args:
+        buckets (sequence of float): The ascending upper bounds.
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        self._buckets = tuple(buckets)
+        self._counts = [0] * (len(self._buckets) + 1)
+        self._sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """
+        Add an observed value to the histogram.
+
+        Args:
+            value (float): The value.
+        """
+
+        self._counts[bisect_left(self._buckets, value)] += 1
+        self._sum += value
+
+    @property
+    def count(self) -> int:
+        """
+        The number of observed values.
+        """
+
+        return sum(self._counts)
+
+    @property
+    def sum(self) -> float:
+        """
+        The sum of the observed values.
+        """
+
+        return self._sum
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """
+        Determine the number of observed values up to each bound.
+
+        Returns:
+            list of tuple: Pairs of upper bounds and counts, ending with
+            an infinite bound that counts all values.
+        """
+
+        result: List[Tuple[float, int]] = []
+        total = 0
+        for bound, count in zip(self._buckets + (float('inf'),),
+                                self._counts):
+            total += count
+            result.append((bound, total))
+
+        return result
+
+class EndpointMetrics(Instrument):
+    """
+    Instrument which aggregates counters and latency histograms for each
+    endpoint, which is the HTTP method and path template of a request.
+
+    Args:
+        buckets (sequence of float or `None`): The upper bounds in seconds of
+            the latency histograms, or `None` to use `BUCKETS`.
+    """
+
+    BUCKETS: Tuple[float, ...] = (
+        0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+    )
+    TIMINGS = ('network', 'decode', 'build')
+
+    def __init__(self, buckets: Optional[Sequence[float]] = None):
+        self._buckets = self.BUCKETS if buckets is None else tuple(buckets)
+        self._endpoints: Dict[str, Dict[str, Any]] = {}
+        self._lock = Lock()
+
+    def after(self, info: RequestInfo) -> None:
+        with self._lock:
+            metrics = self._endpoints.get(info.endpoint)
+            if metrics is None:
+                metrics = {
+                    'requests': 0,
+                    'errors': 0,
+                    'bytes': 0,
+                    'statuses': {},
+                    'latency': Histogram(self._buckets)
+                }
+                for timing in self.TIMINGS:
+                    metrics[f'{timing}_seconds'] = 0.0
+                self._endpoints[info.endpoint] = metrics
+
+            metrics['requests'] += 1
+            if info.error is not None or info.status is None or \
+                    info.status >= 400:
+                metrics['errors'] += 1
+            metrics['bytes'] += info.size
+            status = 'error' if info.status is None else str(info.status)
+            metrics['statuses'][status] = metrics['statuses'].get(status, 0) + 1
+            metrics['latency'].observe(info.duration)
+            for timing in self.TIMINGS:
+                metrics[f'{timing}_seconds'] += getattr(info, timing)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Retrieve the current metrics of the endpoints.
+
+        Returns:
+            dict: Metrics by endpoint, such as 'GET instances/{name}'. Each
+            has counts of `requests`, `errors`, response `bytes`, responses
+            by status code in `statuses`, sums of the `network_seconds`,
+            `decode_seconds` and `build_seconds`, and a `latency` histogram
+            as a list of upper bounds and cumulative counts.
+        """
+
+        with self._lock:
+            return {
+                endpoint: {
+                    key: value.cumulative() if isinstance(value, Histogram)
+                    else dict(value) if isinstance(value, dict) else value
+                    for key, value in metrics.items()
+                }
+                for endpoint, metrics in self._endpoints.items()
+            }
+
+    @staticmethod
+    def _labels(endpoint: str) -> str:
+        method, route = endpoint.split(' ', 1)
+        return f'method="{method}",route="{route}"'
+
+    def export(self, prefix: str = 'bigboat_client') -> str:
+        """
+        Format the metrics in the Prometheus text exposition format.
+
+        Args:
+            prefix (str): The prefix of the names of the metrics.
+
+        Returns:
+            str: The metrics.
+        """
+
+        # Each metric family is written as one group of its type and samples.
+        snapshot = [
+            (self._labels(endpoint), metrics)
+            for endpoint, metrics in self.snapshot().items()
+        ]
+        lines: List[str] = []
+        for name, key in (('requests_total', 'requests'),
+                          ('errors_total', 'errors'),
+                          ('response_bytes_total', 'bytes')):
+            lines.append(f'# TYPE {prefix}_{name} counter')
+            lines.extend(f'{prefix}_{name}{{{labels}}} {metrics[key]}'
+                         for labels, metrics in snapshot)
+
+        name = f'{prefix}_request_duration_seconds'
+        lines.append(f'# TYPE {name} histogram')
+        for labels, metrics in snapshot:
+            for bound, count in metrics['latency']:
+                limit = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{name}_bucket{{{labels},le="{limit}"}} {count}')
+            total = sum(metrics[f'{timing}_seconds']
+                        for timing in self.TIMINGS)
+            lines.append(f'{name}_sum{{{labels}}} {total!r}')
+            lines.append(f'{name}_count{{{labels}}} {metrics["requests"]}')
+
+        return '\n'.join(lines) + '\n'
+
+class Scope:
+    """
+    Tracking of the requests performed by one API method call, in order to
+    measure the time spent on their responses.
+    """
+
+    def __init__(self, instruments: Sequence[Instrument]):
+        self._instruments = instruments
+        self._info: Optional[RequestInfo] = None
+        self._received = 0.0
+
+    def add(self, info: RequestInfo) -> None:
+        """
+        Register a request whose response was received.
+        """
+
+        self.finish()
+        self._info = info
+        self._received = perf_counter()
+
+    def add_decode(self, duration: float) -> None:
+        """
+        Register time spent on decoding the response of the current request.
+        """
+
+        if self._info is not None:
+            self._info.decode += duration
+
+    def finish(self) -> None:
+        """
+        Complete the current request and call the instruments.
+        """
+
+        info = self._info
+        if info is None:
+            return
+
+        self._info = None
+        info.build = max(0.0, perf_counter() - self._received - info.decode)
+        for instrument in self._instruments:
+            instrument.after(info)
+
+_SCOPE: ContextVar[Optional[Scope]] = ContextVar('bigboat_scope',
+                                                 default=None)
+
+def current_scope() -> Optional[Scope]:
+    """
+    Retrieve the scope of the API method call in the current context.
+
+    Returns:
+        :obj:`bigboat.metrics.Scope` or `None`: The scope, or `None` if no
+        instrumented API method is being called.
+    """
+
+    return _SCOPE.get()
+
+def instrumented(method: F) -> F:
+    """
+    Decorator for API methods of clients which measures the time spent on
+    the responses of the requests that they perform, if the client has
+    instruments.
+    """
+
+    @wraps(method)
+    def wrapper(self: Client, *args: Any, **kwargs: Any) -> Any:
+        if not self.instruments:
+            return method(self, *args, **kwargs)
+
+        scope = Scope(self.instruments)
+        token = _SCOPE.set(scope)
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            _SCOPE.reset(token)
+            scope.finish()
+
+    return cast(F, wrapper)
+
+def timed_decoder(decoder: Decoder) -> Decoder:
+    """
+    Wrap a JSON decoder such that its time is registered in the scope of the
+    API method call in the current context.
+    """
+
+    @wraps(decoder)
+    def decode(content: bytes) -> Any:
+        start = perf_counter()
+        try:
+            return decoder(content)
+        finally:
+            scope = _SCOPE.get()
+            if scope is not None:
+                scope.add_decode(perf_counter() - start)
+
+    return decode
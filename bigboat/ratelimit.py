@@ -0,0 +1,254 @@
+"""
+Rate limiting of requests to the BigBoat API.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from threading import Lock
+from time import monotonic, sleep
+from typing import Dict, List, Optional, Tuple
+from .deadlines import DeadlineExceeded, remaining
+
+class TokenBucket:
+    """
+    Token bucket which allows a sustained rate of requests with bursts of a
+    limited size.
+
+    The bucket is not thread-safe by itself, the rate limiter that uses it
+    guards it with a lock.
+
+    Args:
+        rate (float): The number of tokens that are added each second.
+        burst (int): The maximum number of tokens in the bucket, which is
+            the number of requests that may be performed at once.
+
+    Raises:
+        ValueError: If the rate is not positive.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError('Rate must be positive')
+
+        self._rate = rate
+        self._burst = max(1, burst)
+        self._tokens = float(self._burst)
+        self._updated = monotonic()
+
+    @property
+    def rate(self) -> float:
+        """
+        The number of tokens that are added each second.
+        """
+
+        return self._rate
+
+    def reserve(self, now: float) -> float:
+        """
+        Take a token from the bucket, possibly ahead of the time at which it
+        becomes available.
+
+        Args:
+            now (float): The current monotonic clock value.
+
+        Returns:
+            float: The number of seconds until the token is available.
+        """
+
+        self._tokens = min(self._burst,
+                           self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return 0.0
+
+        return -self._tokens / self._rate
+
+    def cancel(self) -> None:
+        """
+        Return a reserved token to the bucket.
+        """
+
+        self._tokens = min(self._burst, self._tokens + 1)
+
+class RateLimiter: # pylint: disable=too-many-instance-attributes
+    """
+    Rate limiter which delays requests such that a client does not perform
+    more requests per second than the API can sustain.
+
+    A rate can be set for all requests as well as for reads (GET requests)
+    and writes (other requests, as well as the GET requests with which the
+    v1 client starts and stops instances) separately. Callers that exceed a rate wait
+    in order of arrival until their request may be performed. Requests that
+    would have to wait until after the deadline of their context raise
+    :obj:`bigboat.deadlines.DeadlineExceeded` immediately instead.
+
+    The limiter may be shared by multiple clients, for example of a
+    :obj:`bigboat.federation.FederatedClient`, in order to limit their
+    combined rate.
+
+    Args:
+        rate (float or `None`): The maximum number of requests per second,
+            or `None` to not limit all requests together.
+        read (float or `None`): The maximum number of GET requests per
+            second, or `None` to not limit reads separately.
+        write (float or `None`): The maximum number of PUT and DELETE
+            requests per second, or `None` to not limit writes separately.
+        burst (int): The number of requests of each rate that may be
+            performed at once after a period without requests.
+    """
+
+    READ = 'read'
+    WRITE = 'write'
+    READ_METHODS: Tuple[str, ...] = ('GET', 'HEAD')
+
+    def __init__(self, rate: Optional[float] = None,
+                 read: Optional[float] = None,
+                 write: Optional[float] = None, burst: int = 1):
+        self._buckets: Dict[str, List[TokenBucket]] = {
+            self.READ: [], self.WRITE: []
+        }
+        if rate is not None:
+            bucket = TokenBucket(rate, burst)
+            self._buckets[self.READ].append(bucket)
+            self._buckets[self.WRITE].append(bucket)
+        if read is not None:
+            self._buckets[self.READ].append(TokenBucket(read, burst))
+        if write is not None:
+            self._buckets[self.WRITE].append(TokenBucket(write, burst))
+
+        self._lock = Lock()
+        self._requests = 0
+        self._delayed = 0
+        self._rejected = 0
+        self._waiting = 0
+        self._wait_time = 0.0
+        self._max_wait = 0.0
+
+    @property
+    def requests(self) -> int:
+        """
+        The number of requests that the limiter allowed.
+        """
+
+        return self._requests
+
+    @property
+    def delayed(self) -> int:
+        """
+        The number of requests that had to wait.
+        """
+
+        return self._delayed
+
+    @property
+    def rejected(self) -> int:
+        """
+        The number of requests that were not performed since they would have
+        to wait until after their deadline.
+        """
+
+        return self._rejected
+
+    @property
+    def waiting(self) -> int:
+        """
+        The number of callers that are currently waiting.
+        """
+
+        return self._waiting
+
+    @property
+    def wait_time(self) -> float:
+        """
+        The total number of seconds that requests waited.
+        """
+
+        return self._wait_time
+
+    @property
+    def max_wait(self) -> float:
+        """
+        The longest number of seconds that a request waited.
+        """
+
+        return self._max_wait
+
+    def classify(self, method: str) -> str:
+        """
+        Determine the class of a request.
+
+        Args:
+            method (str): The HTTP method of the request.
+
+        Returns:
+            str: 'read' or 'write'.
+        """
+
+        return self.READ if method in self.READ_METHODS else self.WRITE
+
+    def acquire(self, method: str, kind: Optional[str] = None) -> float:
+        """
+        Wait until a request may be performed.
+
+        Args:
+            method (str): The HTTP method of the request.
+            kind (str or `None`): The class of the request, 'read' or 'write',
+                or `None` to classify the request by its HTTP method. This is
+                needed for API endpoints that change entities with GET
+                requests.
+
+        Returns:
+            float: The number of seconds that the request waited.
+
+        Raises:
+            :obj:`bigboat.deadlines.DeadlineExceeded`: If the request would
+                have to wait until after the deadline of the current context.
+        """
+
+        buckets = self._buckets[self.classify(method) if kind is None
+                                else kind]
+        if not buckets:
+            return 0.0
+
+        with self._lock:
+            now = monotonic()
+            delay = max(bucket.reserve(now) for bucket in buckets)
+            left = remaining()
+            if delay > 0 and left is not None and delay >= left:
+                for bucket in buckets:
+                    bucket.cancel()
+                self._rejected += 1
+                raise DeadlineExceeded(f'Deadline passes before {method} '
+                                       f'request is allowed by rate limit')
+
+            self._requests += 1
+            if delay <= 0:
+                return 0.0
+
+            self._delayed += 1
+            self._waiting += 1
+            self._wait_time += delay
+            self._max_wait = max(self._max_wait, delay)
+
+        try:
+            sleep(delay)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+        return delay
@@ -0,0 +1,188 @@
+"""
+Policies for handling transient failures of requests to the BigBoat API.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from threading import Lock
+from time import monotonic
+from typing import FrozenSet, Optional, Tuple
+from requests.exceptions import ConnectionError as ConnectError
+from .utils import Backoff
+
+# Status codes of responses which indicate that the API is unavailable
+UNAVAILABLE: FrozenSet[int] = frozenset({502, 503, 504})
+
+class RetryPolicy:
+    """
+    Policy for repeating requests that fail due to connection problems,
+    timeouts or unavailability of the API.
+
+    Only idempotent requests are repeated, which are GET and DELETE requests
+    as well as PUT requests to endpoints which replace an entity as a whole.
+    The delays between attempts increase exponentially with random jitter.
+
+    Args:
+        attempts (int): The maximum number of attempts for a request,
+            including the first attempt.
+        backoff (float): The number of seconds before the second attempt.
+        max_backoff (float): The maximum number of seconds between attempts.
+        jitter (float): The fraction of each delay that is randomly added to
+            or subtracted from it.
+    """
+
+    METHODS: Tuple[str, ...] = ('GET', 'DELETE')
+    PUT_ROUTES: Tuple[str, ...] = ('instances/{name}',)
+
+    def __init__(self, attempts: int = 3, backoff: float = 0.5,
+                 max_backoff: float = 10.0, jitter: float = 0.25):
+        self._attempts = attempts
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._jitter = jitter
+
+    @property
+    def attempts(self) -> int:
+        """
+        The maximum number of attempts for a request.
+        """
+
+        return self._attempts
+
+    def allows(self, method: str, route: str) -> bool:
+        """
+        Check whether a request may be repeated.
+
+        Args:
+            method (str): The HTTP method of the request.
+            route (str): The path template of the request.
+
+        Returns:
+            bool: Whether the request is idempotent.
+        """
+
+        if method in self.METHODS:
+            return True
+
+        return method == 'PUT' and route in self.PUT_ROUTES
+
+    def delays(self) -> Backoff:
+        """
+        Create an iterator of the delays between attempts of one request.
+
+        Returns:
+            :obj:`bigboat.utils.Backoff`: The delays in seconds.
+        """
+
+        return Backoff(self._backoff, self._max_backoff, jitter=self._jitter)
+
+class CircuitOpenError(ConnectError):
+    """
+    Error indicating that a request was not performed because the circuit
+    breaker considers the API to be unavailable.
+    """
+
+class CircuitBreaker:
+    """
+    Circuit breaker that stops performing requests to an API which fails
+    repeatedly, such that callers fail fast instead of waiting for timeouts.
+
+    After a number of consecutive failures, the circuit opens and requests
+    raise a :obj:`bigboat.retry.CircuitOpenError`. Once the reset timeout has
+    passed, the circuit is half-open and allows one trial request. The circuit
+    closes again if the trial succeeds, otherwise it opens for another reset
+    timeout.
+
+    Args:
+        threshold (int): The number of consecutive failures after which the
+            circuit opens.
+        reset_timeout (float): The number of seconds that the circuit remains
+            open before a trial request is allowed.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 30.0):
+        self._threshold = threshold
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened: Optional[float] = None
+        self._trial = False
+        self._lock = Lock()
+
+    @property
+    def failures(self) -> int:
+        """
+        The number of consecutive failures.
+        """
+
+        return self._failures
+
+    @property
+    def state(self) -> str:
+        """
+        The state of the circuit: 'closed', 'open' or 'half-open'.
+        """
+
+        with self._lock:
+            if self._opened is None:
+                return self.CLOSED
+            if self._trial or \
+                    monotonic() - self._opened < self._reset_timeout:
+                return self.OPEN
+
+            return self.HALF_OPEN
+
+    def check(self) -> None:
+        """
+        Check whether a request may be performed.
+
+        Raises:
+            :obj:`bigboat.retry.CircuitOpenError`: If the circuit is open.
+        """
+
+        with self._lock:
+            if self._opened is None:
+                return
+            if self._trial or \
+                    monotonic() - self._opened < self._reset_timeout:
+                raise CircuitOpenError(f'Circuit breaker is open after '
+                                       f'{self._failures} failures')
+
+            self._trial = True
+
+    def record(self, failed: bool) -> None:
+        """
+        Register the outcome of a request.
+
+        Args:
+            failed (bool): Whether the request failed due to connection
+                problems, a timeout or unavailability of the API.
+        """
+
+        with self._lock:
+            if not failed:
+                self._failures = 0
+                self._opened = None
+            else:
+                self._failures += 1
+                if self._trial or self._failures >= self._threshold:
+                    self._opened = monotonic()
+
+            self._trial = False
@@ -0,0 +1,112 @@
+"""
+Service entity from the API.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from sys import intern
+from typing import Any, Dict, Optional, Sequence, Tuple, TYPE_CHECKING
+from .entity import Entity
+from .utils import readonly
+if TYPE_CHECKING: # pragma: no cover
+    # pylint: disable=cyclic-import
+    from .client import Client
+else:
+    Client = object
+
+@readonly("name", "state", "container", "ports")
+class Service(Entity):
+    """
+    A service entity, which is part of a deployed application instance.
+
+    Services are started and stopped as part of their instance, thus they
+    cannot be updated or deleted separately.
+    """
+
+    __slots__ = ('_name', '_state', '_container', '_ports')
+
+    def __init__(self, client: Client, name: str, state: Optional[str] = None,
+                 container: Optional[str] = None, ports: Sequence[str] = ()):
+        # pylint: disable=too-many-arguments
+        super().__init__(client)
+        self._name = name
+        self._state = state
+        self._container = container
+        self._ports = tuple(ports)
+
+    @classmethod
+    def from_payload(cls, client: Client, name: str,
+                     payload: Dict[str, Any]) -> 'Service':
+        """
+        Create a service from its part of the services payload of an instance.
+
+        Args:
+            client (:obj:`bigboat.client.Client`): The client of the instance.
+            name (str): The name of the service.
+            payload (dict): The properties of the service from the API.
+
+        Returns:
+            :obj:`bigboat.service.Service`: The service entity.
+        """
+
+        state = payload.get('state')
+        container = payload.get('container')
+        if isinstance(container, dict):
+            container = container.get('id')
+        ports = payload.get('ports')
+        if not isinstance(ports, (list, tuple)):
+            ports = ()
+
+        # The states and ports are shared by many services, so use one
+        # string object for each distinct value.
+        return cls(client, intern(name),
+                   state=intern(state) if isinstance(state, str) else None,
+                   container=container if isinstance(container, str) else None,
+                   ports=[intern(str(port)) for port in ports])
+
+    def update(self) -> Optional['Service']:
+        """
+        Services cannot be updated separately from their instance.
+
+        Raises:
+            TypeError: Always, since the operation is not supported.
+        """
+
+        raise TypeError('Updating a service is not supported, update its '
+                        'instance instead')
+
+    def delete(self) -> bool:
+        """
+        Services cannot be deleted separately from their instance.
+
+        Raises:
+            TypeError: Always, since the operation is not supported.
+        """
+
+        raise TypeError('Deleting a service is not supported, delete its '
+                        'instance instead')
+
+    def __repr__(self) -> str:
+        parts: Tuple[Tuple[str, Any], ...] = (
+            ('name', self.name),
+            ('state', self.state),
+            ('container', self.container),
+            ('ports', self.ports)
+        )
+        properties = [f'{key}={value!r}' for (key, value) in parts]
+
+        return f'Service({", ".join(properties)})'
@@ -0,0 +1,144 @@
+"""
+Pools of HTTP sessions for clients that are used by multiple threads.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from threading import Lock
+from typing import Any, List, Mapping, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from requests.models import Response
+
+class SessionPool:
+    """
+    Pool of sessions which can be used by multiple threads at the same time.
+
+    Each request is performed with a session that no other thread uses
+    during the request, such that the state of the sessions, such as their
+    cookies, is not changed concurrently. All sessions share one adapter,
+    which keeps the connections alive and lets the threads reuse them.
+    Sessions are created when more threads perform requests at the same time
+    than there are idle sessions, and only up to `size` sessions are kept
+    for later requests.
+
+    Args:
+        adapter (:obj:`requests.adapters.HTTPAdapter`): The adapter with the
+            pools of connections to the hosts.
+        headers (dict or `None`): Headers which are sent with each request,
+            in addition to the default headers of a session.
+        size (int): The maximum number of idle sessions that are kept.
+    """
+
+    def __init__(self, adapter: HTTPAdapter,
+                 headers: Optional[Mapping[str, str]] = None,
+                 size: int = 10):
+        self._adapter = adapter
+        self._headers = dict(headers) if headers is not None else {}
+        self._size = size
+        self._idle: List[requests.Session] = []
+        self._created = 0
+        self._lock = Lock()
+
+    @property
+    def created(self) -> int:
+        """
+        The number of sessions that were created.
+        """
+
+        return self._created
+
+    @property
+    def idle(self) -> int:
+        """
+        The number of sessions that are not used by a request.
+        """
+
+        return len(self._idle)
+
+    def _create(self) -> requests.Session:
+        session = requests.Session()
+        session.headers.update(self._headers)
+        session.mount('http://', self._adapter)
+        session.mount('https://', self._adapter)
+        return session
+
+    def _acquire(self) -> requests.Session:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+
+            self._created += 1
+
+        return self._create()
+
+    def _release(self, session: requests.Session) -> None:
+        # Sessions beyond the size are dropped without closing them, since
+        # that would close the shared adapter.
+        with self._lock:
+            if len(self._idle) < self._size:
+                self._idle.append(session)
+
+    def request(self, method: str, url: str, **kwargs: Any) -> Response:
+        """
+        Perform a request with a session from the pool.
+
+        Args:
+            method (str): The HTTP method of the request.
+            url (str): The URL to request.
+            **kwargs: Arguments for :meth:`requests.Session.request`.
+
+        Returns:
+            :obj:`requests.models.Response`: The response.
+        """
+
+        session = self._acquire()
+        try:
+            return session.request(method, url, **kwargs)
+        finally:
+            self._release(session)
+
+    def get(self, url: str, **kwargs: Any) -> Response:
+        """
+        Perform a GET request with a session from the pool.
+        """
+
+        return self.request('GET', url, **kwargs)
+
+    def put(self, url: str, **kwargs: Any) -> Response:
+        """
+        Perform a PUT request with a session from the pool.
+        """
+
+        return self.request('PUT', url, **kwargs)
+
+    def delete(self, url: str, **kwargs: Any) -> Response:
+        """
+        Perform a DELETE request with a session from the pool.
+        """
+
+        return self.request('DELETE', url, **kwargs)
+
+    def close(self) -> None:
+        """
+        Close the connections of the adapter and remove the idle sessions.
+        """
+
+        with self._lock:
+            self._idle.clear()
+
+        self._adapter.close()
@@ -0,0 +1,160 @@
+"""
+Incremental parsing of streamed responses from the BigBoat API.
+
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import codecs
+import json
+import re
+from typing import Any, Iterable, Iterator, List
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+NUMBER = frozenset('0123456789.eE+-')
+
+class JSONArrayParser:
+    """
+    Incremental parser of a JSON array from chunks of UTF-8 encoded data,
+    which provides the elements of the array as soon as they are completely
+    received.
+    """
+
+    START = 'start'
+    FIRST = 'first'
+    VALUE = 'value'
+    SEPARATOR = 'separator'
+    END = 'end'
+
+    def __init__(self) -> None:
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._position = 0
+        self._state = self.START
+
+    def feed(self, data: bytes) -> List[Any]:
+        """
+        Parse a chunk of data.
+
+        Args:
+            data (bytes): The next part of the JSON document.
+
+        Returns:
+            list: The elements of the array that are completed by the chunk.
+
+        Raises:
+            ValueError: If the data is not a valid JSON array.
+        """
+
+        self._buffer = self._buffer[self._position:] + self._text.decode(data)
+        self._position = 0
+        return self._parse(False)
+
+    def close(self) -> List[Any]:
+        """
+        Finish parsing after all the data is received.
+
+        Returns:
+            list: The remaining elements of the array.
+
+        Raises:
+            ValueError: If the data is not a complete JSON array.
+        """
+
+        self._buffer = self._buffer[self._position:] + \
+            self._text.decode(b'', final=True)
+        self._position = 0
+        values = self._parse(True)
+        if self._state != self.END:
+            raise ValueError('Incomplete JSON array')
+
+        return values
+
+    def _parse(self, final: bool) -> List[Any]:
+        values = []
+        buffer = self._buffer
+        position = self._position
+        while True:
+            match = WHITESPACE.match(buffer, position)
+            if match is not None:
+                position = match.end()
+            if position == len(buffer):
+                break
+
+            if self._state != self.VALUE and \
+                    (self._state != self.FIRST or buffer[position] == ']'):
+                self._advance(buffer[position])
+                position += 1
+            else:
+                try:
+                    value, end = self._decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    # The element may be incomplete until all data is received.
+                    if final:
+                        raise
+                    break
+
+                # A number at the end of the buffer may continue in the next
+                # chunk.
+                if not final and (end == len(buffer) or buffer[end] in NUMBER):
+                    break
+
+                values.append(value)
+                position = end
+                self._state = self.SEPARATOR
+
+        self._position = position
+        return values
+
+    def _advance(self, char: str) -> None:
+        # Handle a structural character of the array.
+        if self._state == self.START and char == '[':
+            self._state = self.FIRST
+        elif self._state == self.SEPARATOR and char == ',':
+            self._state = self.VALUE
+        elif self._state in (self.FIRST, self.SEPARATOR) and char == ']':
+            self._state = self.END
+        elif self._state == self.START:
+            raise ValueError('Expected a JSON array')
+        elif self._state == self.END:
+            raise ValueError('Unexpected data after JSON array')
+        else:
+            raise ValueError('Expected a comma or end of JSON array, '
+                             f'found {char!r}')
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """
+    Parse a JSON array from chunks of UTF-8 encoded data.
+
+    Args:
+        chunks: The parts of the JSON document, for example from a streamed
+            response.
+
+    Returns:
+        An iterator of the parsed elements of the array, which provides each
+        element as soon as it is completely received.
+
+    Raises:
+        ValueError: If the data is not a valid JSON array.
+    """
+
+    parser = JSONArrayParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+
+    yield from parser.close()
@@ -18,8 +18,9 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-from functools import partial
-from typing import Any, Callable, Sequence, Type, Union
+from operator import attrgetter
+import random
+from typing import Callable, Iterator, Sequence, Type, Union
 
 def readonly(*args: Union[str, Sequence[str]], **kwargs: str) -> \
         Callable[[Type], Type]:
@@ -57,16 +58,51 @@ def readonly(*args: Union[str, Sequence[str]], **kwargs: str) -> \
             The altered class instance.
         """
 
-        def _get_property(property_name: str, instance: object) -> Any:
-            return getattr(instance, property_name)
-
+        # An attribute getter retrieves the member variable without calling
+        # Python functions, which is faster than a function or partial.
         for property_name in properties:
             setattr(subject, property_name,
-                    property(fget=partial(_get_property, f'_{property_name}')))
+                    property(fget=attrgetter(f'_{property_name}')))
         for variable_name, property_name in aliased_properties.items():
             setattr(subject, property_name,
-                    property(fget=partial(_get_property, f'_{variable_name}')))
+                    property(fget=attrgetter(f'_{variable_name}')))
 
         return subject
 
     return decorator
+
+class Backoff(Iterator[float]):
+    """
+    Iterator of delays between attempts, which increase exponentially up to
+    a maximum.
+
+    Args:
+        initial (float): The first delay in seconds.
+        maximum (float): The maximum delay in seconds.
+        factor (float): The multiplier for each next delay.
+        jitter (float): The fraction of each delay that is randomly added to
+            or subtracted from it, to spread out attempts of multiple callers.
+    """
+
+    def __init__(self, initial: float, maximum: float, factor: float = 2.0,
+                 jitter: float = 0.0):
+        self._initial = initial
+        self._maximum = maximum
+        self._factor = factor
+        self._jitter = jitter
+        self._delay = initial
+
+    def reset(self) -> None:
+        """
+        Start again from the initial delay.
+        """
+
+        self._delay = self._initial
+
+    def __next__(self) -> float:
+        delay = self._delay
+        self._delay = min(delay * self._factor, self._maximum)
+        if self._jitter:
+            delay += delay * self._jitter * random.uniform(-1.0, 1.0)
+
+        return max(0.0, delay)
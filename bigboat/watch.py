@@ -0,0 +1,222 @@
+"""
+Watchers that detect changes to the live instances of the BigBoat API.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from time import monotonic, sleep
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, NamedTuple, \
+    Optional, Tuple, TYPE_CHECKING
+from .batch import BatchResult
+from .deadlines import remaining
+from .instance import Instance
+from .utils import Backoff
+if TYPE_CHECKING: # pragma: no cover
+    # pylint: disable=cyclic-import
+    from .client import Client
+else:
+    Client = object
+
+class InstanceChanges(NamedTuple):
+    """
+    Changes to the live instances between two polls.
+
+    The `changed` list contains pairs of the earlier and the current instance
+    entities, for instances whose current state, desired state or services
+    differ.
+    """
+
+    added: List[Instance]
+    removed: List[Instance]
+    changed: List[Tuple[Instance, Instance]]
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+class InstanceWatcher(Iterator[InstanceChanges]):
+    """
+    Watcher that polls the live instances of a client and provides the
+    changes compared to the previous poll.
+
+    Iterating over the watcher polls the API until there are changes, which
+    are then provided. The first changes contain all the instances as added
+    instances. When a poll has no changes, the interval until the next poll
+    is increased, up to a maximum interval.
+
+    Args:
+        client (:obj:`bigboat.client.Client`): The client to poll.
+        interval (float): The number of seconds between polls while the
+            instances are changing.
+        max_interval (float): The maximum number of seconds between polls.
+        factor (float): The multiplier of the interval after a poll without
+            changes.
+        services (bool): Whether to retrieve the services of the instances
+            and detect changes to them.
+    """
+
+    def __init__(self, client: Client, interval: float = 5.0,
+                 max_interval: float = 60.0, factor: float = 2.0,
+                 services: bool = True):
+        # pylint: disable=too-many-arguments
+        self._client = client
+        self._services = services
+        self._backoff = Backoff(interval, max_interval, factor=factor)
+        self._snapshot: Dict[str, Instance] = {}
+        self._polled = False
+
+    @staticmethod
+    def _state(instance: Instance) -> Tuple[Optional[str], Optional[str],
+                                            Optional[Dict[str, Any]]]:
+        return (instance.current_state, instance.desired_state,
+                instance.services)
+
+    def poll(self) -> InstanceChanges:
+        """
+        Retrieve the live instances once and determine the changes compared
+        to the previous poll.
+
+        Returns:
+            :obj:`bigboat.watch.InstanceChanges`: The changes to the instances.
+        """
+
+        return self.compare(self._client.instances(services=self._services))
+
+    def compare(self, instances: Iterable[Instance]) -> InstanceChanges:
+        """
+        Determine the changes of retrieved live instances compared to the
+        previous poll, and keep them for the next comparison.
+
+        Args:
+            instances (iterable of :obj:`bigboat.instance.Instance`): The live
+                instances.
+
+        Returns:
+            :obj:`bigboat.watch.InstanceChanges`: The changes to the instances.
+        """
+
+        previous = self._snapshot
+        current = {instance.name: instance for instance in instances}
+
+        changes = InstanceChanges([], [], [])
+        for name, instance in current.items():
+            earlier = previous.pop(name, None)
+            if earlier is None:
+                changes.added.append(instance)
+            elif earlier is not instance and \
+                    self._state(earlier) != self._state(instance):
+                changes.changed.append((earlier, instance))
+
+        changes.removed.extend(previous.values())
+        self._snapshot = current
+        return changes
+
+    def __next__(self) -> InstanceChanges:
+        if self._polled:
+            sleep(next(self._backoff))
+
+        self._polled = True
+        changes = self.poll()
+        while not changes:
+            sleep(next(self._backoff))
+            changes = self.poll()
+
+        self._backoff.reset()
+        return changes
+
+class StateWaiter:
+    """
+    Tracker of instances that should reach a target state, which determines
+    the delays between polls of the instances.
+
+    The delays increase exponentially with random jitter while no instance
+    reaches its target state. Instances that reached their state are no
+    longer polled.
+
+    Args:
+        targets (dict): The target states by instance names.
+        timeout (float): The number of seconds to wait at most. The wait ends
+            earlier if the deadline of the current context passes.
+        interval (float): The first delay in seconds between polls.
+        max_interval (float): The maximum delay in seconds between polls.
+    """
+
+    JITTER = 0.2
+
+    def __init__(self, targets: Mapping[str, str], timeout: float,
+                 interval: float = 1.0, max_interval: float = 15.0):
+        self._pending = dict(targets)
+        self._reached: Dict[str, Instance] = {}
+        left = remaining()
+        if left is not None:
+            timeout = min(timeout, left)
+        self._deadline = monotonic() + timeout
+        self._backoff = Backoff(interval, max_interval, jitter=self.JITTER)
+
+    @property
+    def pending(self) -> List[str]:
+        """
+        The names of the instances that have not yet reached their target.
+        """
+
+        return list(self._pending)
+
+    @property
+    def reached(self) -> Dict[str, Instance]:
+        """
+        The instances that reached their target state by their names.
+        """
+
+        return self._reached
+
+    def update(self, instances: BatchResult[Optional[Instance]]) -> \
+            Optional[float]:
+        """
+        Check the polled instances for their target states.
+
+        Args:
+            instances (:obj:`bigboat.batch.BatchResult`): The polled instances.
+                Instances that could not be retrieved due to transport errors
+                are polled again later.
+
+        Returns:
+            float or `None`: The number of seconds to wait until the next
+            poll, or `None` if all instances reached their target state or
+            the timeout has passed.
+
+        Raises:
+            ValueError: If the API refused to provide an instance.
+        """
+
+        for error in instances.rejected.values():
+            raise error
+
+        progress = False
+        for name, instance in instances.items():
+            if instance is not None and \
+                    instance.current_state == self._pending.get(name):
+                self._reached[name] = instance
+                del self._pending[name]
+                progress = True
+
+        left = self._deadline - monotonic()
+        if not self._pending or left <= 0:
+            return None
+
+        if progress:
+            self._backoff.reset()
+
+        return min(next(self._backoff), left)
@@ -0,0 +1,87 @@
+"""
+Tests for parsing of application definitions.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import unittest
+from unittest.mock import patch
+import yaml
+from bigboat.appdef import load_appdef, load_fields
+
+class AppdefTest(unittest.TestCase):
+    """
+    Tests for parsing application definitions.
+    """
+
+    DOCUMENT = '''name: foo
+instance:
+  image: hello-world
+  nested: {name: bad, version: bad}
+services:
+  - name: bad
+version: 1.0
+'''
+
+    def test_load_appdef(self) -> None:
+        """
+        Test the load_appdef function.
+        """
+
+        document = load_appdef(self.DOCUMENT)
+        self.assertEqual(document['name'], 'foo')
+        self.assertEqual(document['instance']['image'], 'hello-world')
+        self.assertEqual(load_appdef(b'version: "1.0"\n'), {'version': '1.0'})
+
+    def test_load_fields(self) -> None:
+        """
+        Test the load_fields function.
+        """
+
+        self.assertEqual(load_fields(self.DOCUMENT, ('name', 'version')),
+                         {'name': 'foo', 'version': 1.0})
+        self.assertEqual(load_fields('? [complex, key]\n: value\nname: foo\n',
+                                     ('name',)),
+                         {'name': 'foo'})
+        self.assertEqual(load_fields(b'name: "1"\nversion: !!str 2\n',
+                                     ('name', 'version')),
+                         {'name': '1', 'version': '2'})
+
+        # Documents with aliases, missing fields or without a top-level
+        # mapping are parsed completely.
+        self.assertEqual(load_fields('name: &x foo\nversion: *x\n',
+                                     ('name', 'version')),
+                         {'name': 'foo', 'version': 'foo'})
+        self.assertEqual(load_fields('version: 2\n', ('name', 'version')),
+                         {'version': 2})
+        self.assertEqual(load_fields('- name\n', ('name',)), {})
+
+    def test_load_fields_empty(self) -> None:
+        """
+        Test the load_fields function on documents without content.
+        """
+
+        for loader in (yaml.SafeLoader, getattr(yaml, 'CSafeLoader',
+                                                yaml.SafeLoader)):
+            with self.subTest(loader=loader.__name__):
+                with patch('bigboat.appdef.SafeLoader', loader):
+                    self.assertEqual(load_fields('', ('name',)), {})
+                    self.assertEqual(load_fields(b'', ('name',)), {})
+                    self.assertEqual(load_fields('# comment\n', ('name',)),
+                                     {})
+                    self.assertEqual(load_fields('---\n...\n', ('name',)),
+                                     {})
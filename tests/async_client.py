@@ -0,0 +1,343 @@
+"""
+Tests for asynchronous client that connects to the BigBoat API.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Dict, List, Optional, Tuple, cast
+import unittest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from bigboat.application import Application
+from bigboat.async_client import AsyncClient_v2
+from bigboat.instance import Instance
+
+Route = Tuple[int, str, str]
+
+class AsyncClient_v2_Test(unittest.IsolatedAsyncioTestCase):
+    """
+    Tests for the asynchronous BigBoat v2 API client.
+    """
+
+    PATH = '/api/v2/'
+    KEY = 'my-api-key'
+
+    INSTANCE = {
+        "id": "y7bzwghzP9ouM56g6",
+        "name": "nginx",
+        "state": {"current": "starting", "desired": "running"},
+        "app": {"name": "nginx", "version": "latest"},
+        "services": {"www": {"state": "starting"}}
+    }
+
+    async def asyncSetUp(self) -> None:
+        await super().asyncSetUp()
+        self.routes: Dict[Tuple[str, str], Route] = {}
+        self.requests: List[Tuple[str, str, Dict[str, str], bytes]] = []
+        self.delay = 0.0
+        application = web.Application()
+        application.router.add_route('*', '/{path:.*}', self._handle)
+        self.server = TestServer(application)
+        await self.server.start_server()
+        self.client = AsyncClient_v2(str(self.server.make_url('/')), self.KEY)
+
+    async def asyncTearDown(self) -> None:
+        await self.client.close()
+        await self.server.close()
+        await super().asyncTearDown()
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        body = await request.read()
+        await asyncio.sleep(self.delay)
+        self.requests.append((request.method, request.path,
+                              dict(request.headers), body))
+        if request.headers.get('api-key') != self.KEY:
+            return web.json_response({"message": "No API key"}, status=401)
+
+        route = self.routes.get((request.method, request.path))
+        if route is None:
+            return web.Response(status=404, text='Not found')
+
+        status, text, content_type = route
+        return web.Response(status=status, body=text.encode(),
+                            headers={'Content-Type': content_type})
+
+    def _route(self, method: str, path: str, route: Route) -> None:
+        self.routes[(method, f'{self.PATH}{path}')] = route
+
+    @staticmethod
+    def _json(payload: Optional[Any] = None, status: int = 200) -> Route:
+        return (status, json.dumps(payload) if payload is not None else '',
+                'application/json')
+
+    async def test_apps(self) -> None:
+        """
+        Test the AsyncClient_v2.apps and AsyncClient_v2.get_app methods.
+        """
+
+        self._route('GET', 'apps', self._json([
+            {"id": "ERfrBncoPKSN9ampt", "name": "nginx", "version": "latest"},
+            {"id": "LENn6QcjnG8WRvAxf", "name": "nginx", "version": "1.11.4"}
+        ]))
+        self._route('GET', 'apps/nginx/latest', self._json({
+            "id": "MKMZCnLcEJmkjSenJ", "name": "nginx", "version": "latest"
+        }))
+
+        apps = await self.client.apps()
+        app_pairs = list(sorted((app.name, app.version) for app in apps))
+        self.assertEqual(app_pairs, [('nginx', '1.11.4'), ('nginx', 'latest')])
+
+        self.assertIsNone(await self.client.get_app('does', 'notexist'))
+        app = await self.client.get_app('nginx', 'latest')
+        assert app is not None
+        self.assertEqual(app.name, 'nginx')
+        self.assertEqual(app.version, 'latest')
+        self.assertIs(app.client, self.client)
+
+        unauthorized = AsyncClient_v2(str(self.server.make_url('/')), 'wrong')
+        async with unauthorized:
+            with self.assertRaises(ValueError):
+                await unauthorized.get_app('nginx', 'latest')
+
+    async def test_update_delete_app(self) -> None:
+        """
+        Test the AsyncClient_v2.update_app and delete_app methods.
+        """
+
+        self._route('PUT', 'apps/nginx/latest', self._json({
+            "id": "MKMZCnLcEJmkjSenJ", "name": "nginx", "version": "latest"
+        }, status=201))
+        self._route('DELETE', 'apps/nginx/latest', self._json(status=204))
+
+        app = await self.client.update_app('nginx', 'latest')
+        assert app is not None
+        self.assertEqual(app.version, 'latest')
+
+        self.assertFalse(await self.client.delete_app('does', 'notexist'))
+        self.assertTrue(await self.client.delete_app('nginx', 'latest'))
+
+        # A dashboard that cannot be reached does not provide an application.
+        port = self.server.port
+        await self.server.close()
+        offline = AsyncClient_v2(f'http://127.0.0.1:{port}', self.KEY)
+        async with offline:
+            self.assertIsNone(await offline.update_app('nginx', 'latest'))
+
+    async def test_compose(self) -> None:
+        """
+        Test the AsyncClient_v2.get_compose and update_compose methods.
+        """
+
+        path = 'apps/nginx/latest/files/'
+        content = 'name: nginx\nversion: latest\n'
+        self._route('GET', f'{path}bigboatCompose',
+                    (200, content, 'text/plain'))
+        self._route('GET', f'{path}notUsed',
+                    (200, '<html></html>', 'text/html'))
+        self._route('PUT', f'{path}bigboatCompose',
+                    (201, content, 'text/plain'))
+        self._route('PUT', f'{path}dockerCompose',
+                    (400, 'Bad YAML', 'text/plain'))
+
+        self.assertEqual(await self.client.get_compose('nginx', 'latest',
+                                                       'bigboatCompose'),
+                         content)
+        self.assertIsNone(await self.client.get_compose('nginx', 'latest',
+                                                        'notUsed'))
+        self.assertIsNone(await self.client.get_compose('does', 'notexist',
+                                                        'dockerCompose'))
+        self.assertTrue(await self.client.update_compose('nginx', 'latest',
+                                                         'bigboatCompose',
+                                                         content))
+        self.assertEqual(self.requests[-1][3], content.encode())
+        self.assertEqual(self.requests[-1][2]['Content-Type'], 'text/plain')
+        with self.assertRaises(ValueError):
+            await self.client.update_compose('nginx', 'latest',
+                                             'dockerCompose', ':')
+
+    async def test_instances(self) -> None:
+        """
+        Test the AsyncClient_v2 instance methods.
+        """
+
+        self._route('GET', 'instances', self._json([
+            {"id": "y7bzwghzP9ouM56g6", "name": "nginx"},
+            self.INSTANCE
+        ]))
+        self._route('GET', 'instances/nginx', self._json(self.INSTANCE))
+        self._route('PUT', 'instances/nginx', self._json(self.INSTANCE))
+        self._route('DELETE', 'instances/nginx', self._json(self.INSTANCE))
+        self._route('PUT', 'instances/error', (400, 'error', 'text/plain'))
+
+        instances = await self.client.instances()
+        self.assertEqual([instance.current_state for instance in instances],
+                         ['running', 'starting'])
+
+        self.assertIsNone(await self.client.get_instance('qux'))
+        instance = await self.client.get_instance('nginx')
+        assert instance is not None
+        self.assertEqual(instance.desired_state, 'running')
+        self.assertEqual(instance.application.name, 'nginx')
+        self.assertEqual(instance.services, {'www': {'state': 'starting'}})
+
+        with self.assertRaises(ValueError):
+            await self.client.update_instance('error', 'does', 'notexist')
+
+        instance = await self.client.update_instance('nginx', 'nginx',
+                                                     'latest', parameters={
+                                                         "SETTING": "value"
+                                                     })
+        assert instance is not None
+        self.assertEqual(instance.name, 'nginx')
+        self.assertEqual(json.loads(self.requests[-1][3]), {
+            'app': 'nginx',
+            'version': 'latest',
+            'parameters': {'SETTING': 'value'},
+            'options': {}
+        })
+
+        instance = await self.client.delete_instance('nginx')
+        assert instance is not None
+        self.assertEqual(instance.name, 'nginx')
+
+        # Entities of the client provide coroutines from their methods.
+        deletions = len(self.requests)
+        self.assertTrue(await cast(Awaitable[bool], instance.delete()))
+        self.assertEqual(self.requests[deletions][:2],
+                         ('DELETE', f'{self.PATH}instances/nginx'))
+        self._route('DELETE', 'instances/nginx', (404, 'Not found',
+                                                  'text/plain'))
+        self.assertFalse(await cast(Awaitable[bool], instance.delete()))
+
+    async def test_iter_instances(self) -> None:
+        """
+        Test the AsyncClient_v2.iter_instances method.
+        """
+
+        self._route('GET', 'instances', self._json([
+            {"id": "y7bzwghzP9ouM56g6", "name": "nginx"},
+            self.INSTANCE
+        ]))
+        names = [instance.name
+                 async for instance in self.client.iter_instances(chunk_size=4)]
+        self.assertEqual(names, ['nginx', 'nginx'])
+
+        self._route('GET', 'instances', self._json({"message": "No API key"},
+                                                   status=401))
+        with self.assertRaisesRegex(ValueError, 'No API key'):
+            async for _ in self.client.iter_instances():
+                pass # pragma: no cover
+
+    async def test_watch_instances(self) -> None:
+        """
+        Test the AsyncClient_v2.watch_instances method.
+        """
+
+        self._route('GET', 'instances', self._json([self.INSTANCE]))
+        watcher = self.client.watch_instances(interval=0.0, max_interval=0.0)
+        with self.assertRaises(TypeError):
+            next(watcher)
+
+        changes = await watcher.__anext__()
+        self.assertEqual([instance.name for instance in changes.added],
+                         ['nginx'])
+
+        running = dict(self.INSTANCE, state={"current": "running",
+                                             "desired": "running"})
+        self._route('GET', 'instances', self._json([running]))
+        async for changes in watcher:
+            self.assertEqual(len(changes.changed), 1)
+            self.assertEqual(changes.changed[0][1].current_state, 'running')
+            break
+
+    async def test_wait_for_states(self) -> None:
+        """
+        Test the AsyncClient_v2.wait_for_states method.
+        """
+
+        self._route('GET', 'instances/nginx', self._json(self.INSTANCE))
+        result = await self.client.wait_for_states({
+            'nginx': 'starting', 'missing': 'running'
+        }, 0.05, interval=0.01)
+        self.assertEqual(list(result.keys()), ['nginx'])
+
+        instance = await self.client.wait_for_state('nginx', 'starting', 1.0)
+        assert instance is not None
+        self.assertEqual(instance.name, 'nginx')
+
+        self.delay = 1.0
+        start = time.monotonic()
+        self.assertEqual(await self.client.wait_for_states({
+            'nginx': 'running'
+        }, 0.1, interval=0.01), {})
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    async def test_statuses(self) -> None:
+        """
+        Test the AsyncClient_v2.statuses method.
+        """
+
+        content = [{"name": "Available IPs", "isOk": True}]
+        self._route('GET', 'status', self._json(content))
+        self.assertEqual(await self.client.statuses(), content)
+
+    async def test_concurrent(self) -> None:
+        """
+        Test performing many requests concurrently from one event loop.
+        """
+
+        names = [f'instance-{index}' for index in range(50)]
+        for name in names:
+            self._route('GET', f'instances/{name}', self._json({"name": name}))
+
+        with self.assertRaises(TypeError):
+            with self.client:
+                pass
+
+        async with self.client as client:
+            instances = await asyncio.gather(*(
+                client.get_instance(name) for name in names
+            ))
+
+        self.assertEqual([instance.name for instance in instances if instance],
+                         names)
+
+        self._route('GET', 'instances/error', (400, 'error', 'text/plain'))
+        result = await self.client.get_instances(names + ['error', 'missing'],
+                                                 max_workers=10)
+        self.assertEqual(list(result.keys()), names + ['missing'])
+        self.assertIsNone(result['missing'])
+        self.assertEqual(str(result.rejected['error']), 'error')
+
+        for name in names:
+            self._route('PUT', f'instances/{name}', self._json({"name": name}))
+            self._route('DELETE', f'instances/{name}',
+                        self._json({"name": name}))
+
+        application = Application(self.client, 'nginx', 'latest')
+        result = await self.client.update_instances([
+            Instance(self.client, name, application=application)
+            for name in names
+        ] + [Instance(self.client, 'incomplete')], max_workers=5)
+        self.assertEqual(list(result.keys()), names)
+        self.assertIsInstance(result.rejected['incomplete'], ValueError)
+
+        result = await self.client.delete_instances(names)
+        self.assertEqual(list(result.keys()), names)
@@ -0,0 +1,123 @@
+"""
+Tests for batch operations performed concurrently for multiple entities.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from functools import partial
+import threading
+import time
+from typing import Callable, List, Tuple
+import unittest
+import requests
+from bigboat.batch import BatchResult, run_batch
+
+class BatchTest(unittest.TestCase):
+    """
+    Tests for concurrent batch operations.
+    """
+
+    def setUp(self) -> None:
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def _operation(self, key: str) -> str:
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+        time.sleep(0.01)
+        with self.lock:
+            self.active -= 1
+
+        if key == 'invalid':
+            raise ValueError('Invalid entity')
+        if key == 'offline':
+            raise requests.exceptions.ConnectionError('Offline')
+        if key == 'bug':
+            raise KeyError(key)
+
+        return key.upper()
+
+    def test_run_batch(self) -> None:
+        """
+        Test performing operations concurrently.
+        """
+
+        keys = [f'key-{index}' for index in range(12)] + ['invalid', 'offline']
+        result = run_batch([(key, partial(self._operation, key))
+                            for key in keys], 4)
+
+        self.assertIsInstance(result, BatchResult)
+        self.assertEqual(list(result.keys()), keys[:-2])
+        self.assertEqual(result['key-3'], 'KEY-3')
+        self.assertEqual(list(result.errors.keys()), ['invalid', 'offline'])
+        self.assertEqual(list(result.rejected.keys()), ['invalid'])
+        self.assertEqual(list(result.failed.keys()), ['offline'])
+        self.assertIsInstance(result.rejected['invalid'], ValueError)
+        self.assertIsInstance(result.failed['offline'],
+                              requests.exceptions.ConnectionError)
+        self.assertLessEqual(self.peak, 4)
+        self.assertGreater(self.peak, 1)
+
+        # Programming errors are not collected.
+        with self.assertRaises(KeyError):
+            run_batch([('bug', partial(self._operation, 'bug'))], 1)
+
+    def test_timeouts(self) -> None:
+        """
+        Test abandoning operations that exceed their timeout.
+        """
+
+        def slow() -> str:
+            time.sleep(0.5)
+            return 'slow'
+
+        start = time.monotonic()
+        operations: List[Tuple[str, Callable[[], str]]] = [
+            ('slow', slow), ('queued', partial(self._operation, 'queued'))
+        ]
+        result = run_batch(operations, 1, timeouts={'slow': 0.05, 'queued': 0.05})
+        self.assertLess(time.monotonic() - start, 0.4)
+        self.assertEqual(list(result.keys()), [])
+        self.assertEqual(list(result.failed.keys()), ['slow', 'queued'])
+        self.assertIn('within 0.05 seconds', str(result.failed['slow']))
+        self.assertEqual(self.peak, 0)
+
+        operations = [
+            ('slow', slow), ('fast', partial(self._operation, 'fast'))
+        ]
+        result = run_batch(operations, 2, timeouts={'slow': 0.05})
+        self.assertEqual(result, {'fast': 'FAST'})
+        self.assertEqual(list(result.failed.keys()), ['slow'])
+
+    def test_repr(self) -> None:
+        """
+        Test the BatchResult.__repr__ method.
+        """
+
+        result: BatchResult[str] = BatchResult()
+        result['foo'] = 'bar'
+        error = ValueError('baz')
+        result.add_error('baz', error)
+        failure = requests.exceptions.Timeout('qux')
+        result.add_error('qux', failure)
+        self.assertEqual(repr(result),
+                         f"BatchResult({{'foo': 'bar'}}, "
+                         f"rejected={{'baz': {error!r}}}, "
+                         f"failed={{'qux': {failure!r}}})")
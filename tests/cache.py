@@ -0,0 +1,290 @@
+"""
+Tests for caches for responses from the BigBoat API.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import math
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import unittest
+from unittest.mock import MagicMock, patch
+import requests_mock
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from bigboat.cache import ComposeCache, ConditionalCache, ResponseCache
+from bigboat.client import Client_v2
+
+class ResponseCacheTest(unittest.TestCase):
+    """
+    Tests for the cache of parsed responses.
+    """
+
+    def setUp(self) -> None:
+        self.clock = MagicMock(return_value=100.0)
+        patcher = patch('bigboat.cache.monotonic', new=self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = ResponseCache(ttl=5.0, ttls={'status': 30.0, 'apps': 0},
+                                   max_entries=3)
+
+    def test_lookup(self) -> None:
+        """
+        Test the ResponseCache.lookup and ResponseCache.store methods.
+        """
+
+        self.assertEqual(self.cache.lookup('instances'), (False, None))
+        self.cache.store('instances', 'instances', ['foo'])
+        self.cache.store('instances/qux', 'instances/{name}', None)
+        self.cache.store('status', 'status', [{'isOk': True}])
+        self.cache.store('apps', 'apps', [])
+
+        self.assertEqual(len(self.cache), 3)
+        self.assertEqual(self.cache.lookup('instances'), (True, ['foo']))
+        self.assertEqual(self.cache.lookup('instances/qux'), (True, None))
+        self.assertEqual(self.cache.lookup('apps'), (False, None))
+
+        # Entries expire according to the TTL of their endpoint.
+        self.clock.return_value = 105.0
+        self.assertEqual(self.cache.lookup('instances'), (False, None))
+        self.assertEqual(self.cache.lookup('status'),
+                         (True, [{'isOk': True}]))
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.hits, 3)
+        self.assertEqual(self.cache.misses, 3)
+
+    def test_eviction(self) -> None:
+        """
+        Test evicting the least recently used entries.
+        """
+
+        for name in ('foo', 'bar', 'baz'):
+            self.cache.store(f'instances/{name}', 'instances/{name}', name)
+
+        self.assertEqual(self.cache.lookup('instances/foo'), (True, 'foo'))
+        self.cache.store('instances/qux', 'instances/{name}', 'qux')
+        self.assertEqual(len(self.cache), 3)
+        self.assertEqual(self.cache.lookup('instances/bar'), (False, None))
+        self.assertEqual(self.cache.lookup('instances/foo'), (True, 'foo'))
+
+    def test_invalidate(self) -> None:
+        """
+        Test the ResponseCache.invalidate and ResponseCache.clear methods.
+        """
+
+        self.cache.store('apps/nginx/latest', 'apps/{name}/{version}', 'app')
+        self.cache.store('apps/nginx/latest/files/dockerCompose',
+                         'apps/{name}/{version}/files/{file_name}', 'x: y')
+        self.cache.store('instances', 'instances', [])
+
+        self.cache.invalidate('apps/nginx/latest', 'apps',
+                              prefix='apps/nginx/latest/')
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(self.cache.lookup('instances'), (True, []))
+
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+
+class ConditionalCacheTest(unittest.TestCase):
+    """
+    Tests for the cache of validators for conditional requests.
+    """
+
+    def setUp(self) -> None:
+        self.cache = ConditionalCache(max_entries=2)
+
+    @staticmethod
+    def _response(headers: dict) -> Response:
+        response = Response()
+        response.status_code = 200
+        response.headers = CaseInsensitiveDict(headers)
+        # pylint: disable-next=protected-access
+        response._content = b'[{"name": "nginx"}]'
+        return response
+
+    def test_headers(self) -> None:
+        """
+        Test the ConditionalCache.headers method.
+        """
+
+        self.assertEqual(self.cache.headers('instances'), {})
+        self.cache.store('instances', self._response({}), ['nginx'], 0.5)
+        self.assertEqual(self.cache.headers('instances'), {})
+        self.assertEqual(len(self.cache), 0)
+
+        self.cache.store('instances', self._response({'ETag': '"abc"'}),
+                         ['nginx'], 0.5)
+        self.assertEqual(self.cache.headers('instances'),
+                         {'If-None-Match': '"abc"'})
+
+        modified = 'Wed, 21 Oct 2015 07:28:00 GMT'
+        self.cache.store('apps', self._response({'Last-Modified': modified}),
+                         [], 0.1)
+        self.assertEqual(self.cache.headers('apps'),
+                         {'If-Modified-Since': modified})
+
+        self.cache.store('status', self._response({'ETag': '"def"'}), [], 0.1)
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.headers('instances'), {})
+
+    def test_reuse(self) -> None:
+        """
+        Test the ConditionalCache.reuse method.
+        """
+
+        self.assertEqual(self.cache.reuse('instances'), (False, None))
+        self.cache.store('instances', self._response({'ETag': '"abc"'}),
+                         ['nginx'], 0.5)
+        self.assertEqual(self.cache.reuse('instances'), (True, ['nginx']))
+        self.assertEqual(self.cache.reuse('instances'), (True, ['nginx']))
+        self.assertEqual(self.cache.not_modified, 2)
+        self.assertEqual(self.cache.bytes_saved, 38)
+        self.assertEqual(self.cache.parse_time_saved, 1.0)
+
+class ComposeCacheTest(unittest.TestCase):
+    """
+    Tests for the cache of compose files.
+    """
+
+    URL = 'http://bigboat.example/api/v2/'
+    PATH = f'{URL}apps/nginx/latest/files/dockerCompose'
+    CONTENT = 'www:\n  image: nginx\n'
+
+    def setUp(self) -> None:
+        self.clock = MagicMock(return_value=100.0)
+        patcher = patch('bigboat.cache.time', new=self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_lookup(self) -> None:
+        """
+        Test the ComposeCache.lookup, ComposeCache.matches and
+        ComposeCache.store methods.
+        """
+
+        cache = ComposeCache(ttl=60.0)
+        self.assertEqual(cache.lookup(self.PATH), (False, None))
+        self.assertFalse(cache.matches(self.PATH, self.CONTENT))
+
+        cache.store(self.PATH, self.CONTENT.encode('utf-8'))
+        self.assertEqual(cache.lookup(self.PATH), (True, self.CONTENT))
+        self.assertTrue(cache.matches(self.PATH, self.CONTENT))
+        self.assertTrue(cache.matches(self.PATH, self.CONTENT.encode('utf-8')))
+        self.assertFalse(cache.matches(self.PATH, 'www:\n  image: httpd\n'))
+        self.assertEqual(cache.skipped, 2)
+
+        cache.store(self.PATH, b'\xff')
+        self.assertEqual(len(cache), 0)
+
+        cache.store(self.PATH, self.CONTENT)
+        self.clock.return_value = 160.0
+        self.assertFalse(cache.matches(self.PATH, self.CONTENT))
+        self.assertEqual(cache.lookup(self.PATH), (False, None))
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 2)
+
+    def test_directory(self) -> None:
+        """
+        Test keeping the cache in a directory.
+        """
+
+        with TemporaryDirectory() as directory:
+            cache = ComposeCache(directory=directory)
+            cache.store(self.PATH, self.CONTENT)
+            digest = ComposeCache.digest(self.CONTENT)
+            self.assertEqual((Path(directory) / digest).read_text('utf-8'),
+                             self.CONTENT)
+
+            other = ComposeCache(directory=directory)
+            self.assertEqual(other.lookup(self.PATH), (True, self.CONTENT))
+
+            other.invalidate(prefix=f'{self.URL}apps/nginx/latest/')
+            self.assertFalse((Path(directory) / digest).exists())
+            self.assertEqual(len(ComposeCache(directory=directory)), 0)
+
+    def test_client(self) -> None:
+        """
+        Test skipping uploads and retrievals of compose files in the client.
+        """
+
+        cache = ComposeCache()
+        client = Client_v2('http://bigboat.example', 'api-key', compose=cache)
+        url = self.PATH
+        with requests_mock.Mocker() as mock:
+            put = mock.put(url, status_code=201)
+            get = mock.get(url, text=self.CONTENT,
+                           headers={'Content-Type': 'text/plain'})
+
+            self.assertTrue(client.update_compose('nginx', 'latest',
+                                                  'dockerCompose',
+                                                  self.CONTENT))
+            self.assertTrue(client.update_compose('nginx', 'latest',
+                                                  'dockerCompose',
+                                                  self.CONTENT))
+            self.assertEqual(put.call_count, 1)
+            self.assertEqual(client.get_compose('nginx', 'latest',
+                                                'dockerCompose'), self.CONTENT)
+            self.assertEqual(get.call_count, 0)
+
+            mock.delete('http://bigboat.example/api/v2/apps/nginx/latest',
+                        json={})
+            client.delete_app('nginx', 'latest')
+            self.assertEqual(client.get_compose('nginx', 'latest',
+                                                'dockerCompose'), self.CONTENT)
+            self.assertEqual(get.call_count, 1)
+            self.assertTrue(cache.matches(self.PATH, self.CONTENT))
+
+    def test_dashboards(self) -> None:
+        """
+        Test sharing a cache directory between clients of different
+        dashboards.
+        """
+
+        with TemporaryDirectory() as directory, \
+                requests_mock.Mocker() as mock:
+            staging = Client_v2('http://staging.example', 'api-key',
+                                compose=ComposeCache(directory=directory))
+            production = Client_v2('http://production.example', 'api-key',
+                                   compose=ComposeCache(directory=directory))
+            put = mock.put(requests_mock.ANY, status_code=201)
+            for client in (staging, production):
+                self.assertTrue(client.update_compose('nginx', 'latest',
+                                                      'dockerCompose',
+                                                      self.CONTENT))
+
+            self.assertEqual([request.hostname
+                              for request in put.request_history],
+                             ['staging.example', 'production.example'])
+
+    def test_directory_ttl(self) -> None:
+        """
+        Test expiring the entries of a cache directory by default.
+        """
+
+        with TemporaryDirectory() as directory:
+            ComposeCache(directory=directory).store(self.PATH, self.CONTENT)
+            self.clock.return_value = 100.0 + ComposeCache.DIRECTORY_TTL - 1
+            self.assertEqual(ComposeCache(directory=directory).lookup(self.PATH),
+                             (True, self.CONTENT))
+            self.clock.return_value = 100.0 + ComposeCache.DIRECTORY_TTL
+            self.assertEqual(ComposeCache(directory=directory).lookup(self.PATH),
+                             (False, None))
+
+            cache = ComposeCache(directory=directory, ttl=math.inf)
+            cache.store(self.PATH, self.CONTENT)
+            self.clock.return_value = 1e12
+            self.assertEqual(cache.lookup(self.PATH), (True, self.CONTENT))
@@ -18,14 +18,21 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import gc
 import json
+import sys
 import unittest
+from unittest.mock import patch
+import weakref
 import requests
 import requests_mock
 from requests_mock.request import _RequestObjectProxy as Request
 from requests_mock.response import _Context as Context
 import yaml
+from bigboat.application import Application
+from bigboat.cache import ConditionalCache, ResponseCache
 from bigboat.client import Client, Client_v1, Client_v2
+from bigboat.instance import Instance
 
 class Client_Test(unittest.TestCase):
     """
@@ -98,6 +105,26 @@ class Client_v1_Test(RequestsTestCase):
         super().setUp()
         self.client = Client_v1(self.URL)
 
+    def test_session(self) -> None:
+        """
+        Test whether the client uses a pooled session which it closes.
+        """
+
+        with patch('bigboat.client.HTTPAdapter') as adapter:
+            client = Client_v1(self.URL, pool_connections=2, pool_maxsize=4)
+            adapter.assert_called_once_with(pool_connections=2, pool_maxsize=4)
+
+        self.requests_mock.get(f'{self.URL}{self.PATH}state/foo',
+                               text='active')
+        with patch('requests.Session.close') as close:
+            with client:
+                client.get_instance('foo')
+                client.get_instance('foo')
+
+            close.assert_called_once_with()
+
+        self.assertEqual(self.requests_mock.call_count, 2)
+
     def test_apps(self) -> None:
         """
         Test the Client_v1.apps dummy method.
@@ -121,6 +148,12 @@ instance:
         self.assertEqual(application.name, 'foo')
         self.assertEqual(application.version, 'latest')
 
+        client = Client_v1(self.URL, fields_only=True)
+        application = client.get_app('foo', 'latest')
+        assert application is not None
+        self.assertEqual(application.name, 'foo')
+        self.assertEqual(application.version, 'latest')
+
         # Test connection error for nonexistent applications.
         self.requests_mock.get(f'{self.URL}{self.PATH}appdef/does/notexist',
                                exc=requests.exceptions.ConnectionError)
@@ -179,6 +212,28 @@ instance:
         self.assertEqual(instance.name, 'foo')
         self.assertEqual(instance.current_state, 'running')
 
+    def test_get_instances(self) -> None:
+        """
+        Test the Client_v1.get_instances method.
+        """
+
+        url = f'{self.URL}{self.PATH}state/'
+        self.requests_mock.get(f'{url}qux', status_code=404)
+        self.requests_mock.get(f'{url}foo', text='active')
+        self.requests_mock.get(f'{url}bar', text='created')
+        self.requests_mock.get(f'{url}baz',
+                               exc=requests.exceptions.ConnectTimeout)
+
+        result = self.client.get_instances(['foo', 'bar', 'baz', 'qux', 'foo'],
+                                           max_workers=2)
+        self.assertEqual(list(result.keys()), ['foo', 'bar', 'qux'])
+        self.assertEqual([instance.current_state for instance in result.values()
+                          if instance is not None], ['running', 'created'])
+        self.assertIsNone(result['qux'])
+        self.assertEqual(list(result.errors.keys()), ['baz'])
+        self.assertIsInstance(result.errors['baz'],
+                              requests.exceptions.ConnectTimeout)
+
     def test_update_instance(self) -> None:
         """
         Test the update_instance method.
@@ -198,6 +253,26 @@ instance:
         self.assertEqual(instance.application.name, 'foo')
         self.assertEqual(instance.application.version, 'latest')
 
+    def test_update_instances(self) -> None:
+        """
+        Test the Client_v1.update_instances method.
+        """
+
+        url = f'{self.URL}{self.PATH}'
+        self.requests_mock.get(f'{url}start-app/foo/latest/foo')
+        self.requests_mock.get(f'{url}start-app/foo/latest/bar',
+                               exc=requests.exceptions.ConnectionError)
+
+        application = Application(self.client, 'foo', 'latest')
+        result = self.client.update_instances([
+            Instance(self.client, 'foo', application=application),
+            Instance(self.client, 'bar', application=application),
+            Instance(self.client, 'baz')
+        ])
+        self.assertEqual(list(result.keys()), ['foo'])
+        self.assertEqual(list(result.rejected.keys()), ['baz'])
+        self.assertEqual(list(result.failed.keys()), ['bar'])
+
     def test_delete_instance(self) -> None:
         """
         Test the Client_v1.delete_instance method.
@@ -226,6 +301,22 @@ class Client_v2_Test(RequestsTestCase):
         super().setUp()
         self.client = Client_v2(self.URL, self.KEY)
 
+    def test_session(self) -> None:
+        """
+        Test whether the client uses a pooled session which it closes.
+        """
+
+        with patch('bigboat.client.HTTPAdapter') as adapter:
+            client = Client_v2(self.URL, self.KEY, pool_maxsize=16)
+            adapter.assert_called_once_with(pool_connections=10,
+                                            pool_maxsize=16)
+
+        with patch('requests.Session.close') as close:
+            with client as context:
+                self.assertIs(context, client)
+
+            close.assert_called_once_with()
+
     def test_apps(self) -> None:
         """
         Test the Client_v2.apps method.
@@ -304,6 +395,83 @@ class Client_v2_Test(RequestsTestCase):
         self.assertFalse(self.client.delete_app('does', 'notexist'))
         self.assertTrue(self.client.delete_app('nginx', 'latest'))
 
+    def test_cache(self) -> None:
+        """
+        Test caching responses of GET requests.
+        """
+
+        cache = ResponseCache(ttls={'instances/{name}': 0})
+        client = Client_v2(self.URL, self.KEY, cache=cache)
+        url = f'{self.URL}{self.PATH}'
+        apps = self.requests_mock.get(f'{url}apps', json=[
+            {"id": "ERfrBncoPKSN9ampt", "name": "nginx", "version": "latest"}
+        ])
+        self.requests_mock.put(f'{url}apps/nginx/latest', status_code=201,
+                               json={"name": "nginx", "version": "latest"})
+        instances = self.requests_mock.get(f'{url}instances',
+                                           json=[{"name": "nginx"}])
+        instance = self.requests_mock.get(f'{url}instances/nginx',
+                                          json={"name": "nginx"})
+        self.requests_mock.delete(f'{url}instances/nginx',
+                                  json={"name": "nginx"})
+
+        first = client.apps()
+        first.clear()
+        self.assertEqual(len(client.apps()), 1)
+        self.assertEqual(apps.call_count, 1)
+        client.update_app('nginx', 'latest')
+        client.apps()
+        self.assertEqual(apps.call_count, 2)
+
+        client.instances()
+        client.get_instance('nginx')
+        client.get_instance('nginx')
+        self.assertEqual(instance.call_count, 2)
+        client.instances()
+        self.assertEqual(instances.call_count, 1)
+        client.instances(services=False)
+        self.assertEqual(instances.call_count, 2)
+        client.delete_instance('nginx')
+        client.instances()
+        client.instances(services=False)
+        self.assertEqual(instances.call_count, 4)
+
+        self.assertEqual(cache.hits, 2)
+        self.assertEqual(cache.misses, 8)
+
+    def test_conditional(self) -> None:
+        """
+        Test performing conditional GET requests.
+        """
+
+        conditional = ConditionalCache()
+        client = Client_v2(self.URL, self.KEY, conditional=conditional)
+        url = f'{self.URL}{self.PATH}instances'
+        instances = self.requests_mock.get(url, [
+            {'json': [{"name": "nginx"}], 'headers': {'ETag': '"v1"'}},
+            {'status_code': 304},
+            {'json': [{"name": "nginx"}, {"name": "nginx2"}],
+             'headers': {'ETag': '"v2"'}}
+        ])
+
+        first = client.instances()
+        first.pop()
+        self.assertNotIn('If-None-Match',
+                         instances.request_history[0].headers)
+        second = client.instances()
+        self.assertEqual(instances.request_history[1].headers['If-None-Match'],
+                         '"v1"')
+        self.assertEqual([instance.name for instance in second], ['nginx'])
+        self.assertEqual(conditional.not_modified, 1)
+        self.assertEqual(conditional.bytes_saved, len('[{"name": "nginx"}]'))
+        self.assertGreater(conditional.parse_time_saved, 0.0)
+
+        third = client.instances()
+        self.assertEqual(len(third), 2)
+        client.instances()
+        self.assertEqual(instances.request_history[3].headers['If-None-Match'],
+                         '"v2"')
+
     def test_get_compose(self) -> None:
         """
         Test the Client_v2.get_compose method.
@@ -414,6 +582,44 @@ www:
             ('nginx2', 'starting', 'running')
         ])
 
+        self.requests_mock.get(f'{self.URL}{self.PATH}instances', json=[
+            {"name": "nginx", "services": {"www": {"state": "running"}}}
+        ])
+        self.assertEqual(self.client.instances()[0].services,
+                         {"www": {"state": "running"}})
+        self.assertIsNone(self.client.instances(services=False)[0].services)
+
+    def test_applications(self) -> None:
+        """
+        Test sharing application entities between instances.
+        """
+
+        app = {"name": "nginx", "version": "latest"}
+        self.requests_mock.get(f'{self.URL}{self.PATH}instances', json=[
+            {"name": "nginx", "app": app},
+            {"name": "nginx2", "app": app},
+            {"name": "redis", "app": {"name": "redis", "version": "latest"}}
+        ])
+        self.requests_mock.get(f'{self.URL}{self.PATH}instances/nginx',
+                               json={"name": "nginx", "app": app})
+
+        instances = self.client.instances()
+        application = instances[0].application
+        self.assertIs(instances[1].application, application)
+        self.assertIsNot(instances[2].application, application)
+        self.assertIs(instances[2].application.version, application.version)
+        self.assertIs(application.name, sys.intern('nginx'))
+
+        instance = self.client.get_instance('nginx')
+        assert instance is not None
+        self.assertIs(instance.application, application)
+
+        # Applications that are no longer used are not kept.
+        reference = weakref.ref(application)
+        del instances, instance, application
+        gc.collect()
+        self.assertIsNone(reference())
+
     def test_get_instance(self) -> None:
         """
         Test the Client_v2.get_instance method.
@@ -455,6 +661,60 @@ www:
         self.assertEqual(instance.application.version, 'latest')
         self.assertEqual(instance.services, {'www': {'state': 'starting'}})
 
+    def test_get_instances(self) -> None:
+        """
+        Test the Client_v2.get_instances method.
+        """
+
+        url = f'{self.URL}{self.PATH}instances/'
+        self.requests_mock.get(f'{url}qux', status_code=404)
+        self.requests_mock.get(f'{url}no-api-key', status_code=401,
+                               json={"message": "No API key"})
+        for name in ('foo', 'bar'):
+            self.requests_mock.get(f'{url}{name}', json={
+                "name": name,
+                "state": {"current": "running", "desired": "running"}
+            })
+
+        result = self.client.get_instances(['foo', 'no-api-key', 'bar', 'qux'])
+        self.assertEqual(list(result.keys()), ['foo', 'bar', 'qux'])
+        instance = result['bar']
+        assert instance is not None
+        self.assertEqual(instance.name, 'bar')
+        self.assertIsNone(result['qux'])
+        self.assertEqual(str(result.errors['no-api-key']), 'No API key')
+
+    def test_wait_for_states(self) -> None:
+        """
+        Test the Client_v2.wait_for_states method.
+        """
+
+        url = f'{self.URL}{self.PATH}instances/'
+        self.requests_mock.get(f'{url}foo', [
+            {'json': {"name": "foo", "state": {"current": state}}}
+            for state in ('created', 'starting', 'running')
+        ])
+        self.requests_mock.get(f'{url}bar', [
+            {'status_code': 404},
+            {'json': {"name": "bar", "state": {"current": "running"}}}
+        ])
+
+        with patch('bigboat.client.sleep') as sleep:
+            result = self.client.wait_for_states({
+                'foo': 'running', 'bar': 'running'
+            }, 60.0)
+            self.assertEqual(sorted(result.keys()), ['bar', 'foo'])
+            self.assertEqual(sleep.call_count, 2)
+            self.assertEqual(self.requests_mock.call_count, 5)
+
+            instance = Instance(self.client, 'foo')
+            waited = instance.wait_for('running', 0.0)
+            assert waited is not None
+            self.assertEqual(waited.current_state, 'running')
+            self.assertEqual(sleep.call_count, 2)
+            self.assertIsNone(self.client.wait_for_state('bar', 'stopped',
+                                                         0.0))
+
     def test_update_instance(self) -> None:
         """
         Test the Client_v2.update_instance method.
@@ -501,6 +761,68 @@ www:
         self.assertEqual(instance.desired_state, 'running')
         self.assertEqual(instance.services, {'www': {'state': 'starting'}})
 
+    def test_update_instances(self) -> None:
+        """
+        Test the Client_v2.update_instances method.
+        """
+
+        url = f'{self.URL}{self.PATH}instances/'
+        self.requests_mock.put(f'{url}error', status_code=400, text='error',
+                               headers={'content-type': 'text/plain'})
+        self.requests_mock.put(f'{url}offline',
+                               exc=requests.exceptions.ConnectTimeout)
+        for index in range(20):
+            self.requests_mock.put(f'{url}nginx-{index}', json={
+                "name": f"nginx-{index}",
+                "state": {"current": "created", "desired": "running"},
+                "app": {"name": "nginx", "version": "latest"}
+            })
+
+        application = Application(self.client, 'nginx', 'latest')
+        names = [f'nginx-{index}' for index in range(20)]
+        instances = [
+            Instance(self.client, name, application=application,
+                     parameters={"SETTING": "value"})
+            for name in names + ['error', 'offline']
+        ]
+        result = self.client.update_instances(instances, max_workers=5)
+        self.assertEqual(list(result.keys()), names)
+        self.assertEqual([instance.desired_state
+                          for instance in result.values()
+                          if instance is not None], ['running'] * 20)
+        self.assertEqual(str(result.rejected['error']), 'error')
+        self.assertIsInstance(result.failed['offline'],
+                              requests.exceptions.ConnectTimeout)
+        request = self.requests_mock.last_request
+        assert request is not None
+        self.assertEqual(request.json(), {
+            "app": "nginx",
+            "version": "latest",
+            "parameters": {"SETTING": "value"},
+            "options": {}
+        })
+
+    def test_delete_instances(self) -> None:
+        """
+        Test the Client_v2.delete_instances method.
+        """
+
+        url = f'{self.URL}{self.PATH}instances/'
+        self.requests_mock.delete(f'{url}nginx', json={
+            "name": "nginx",
+            "state": {"current": "stopping", "desired": "stopped"}
+        })
+        self.requests_mock.delete(f'{url}qux', status_code=404)
+        self.requests_mock.delete(f'{url}error', status_code=400,
+                                  headers={'content-type': 'application/json'},
+                                  json={"message": "Cannot stop"})
+
+        result = self.client.delete_instances(['nginx', 'qux', 'error'])
+        self.assertEqual(list(result.keys()), ['nginx', 'qux'])
+        self.assertIsNone(result['qux'])
+        self.assertEqual(str(result.rejected['error']), 'Cannot stop')
+        self.assertEqual(result.failed, {})
+
     def test_delete_instance(self) -> None:
         """
         Test the Client_v2.delete_instance method.
@@ -0,0 +1,175 @@
+"""
+Tests for deadlines of requests to the BigBoat API.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import unittest
+from unittest.mock import patch
+import requests
+import requests_mock
+from bigboat.client import Client_v1, Client_v2
+from bigboat.deadlines import DeadlineExceeded, deadline, remaining
+from bigboat.retry import RetryPolicy
+
+class DeadlineTest(unittest.TestCase):
+    """
+    Tests for deadlines and per-method timeouts.
+    """
+
+    URL = 'http://dashboard.example'
+
+    def setUp(self) -> None:
+        self.requests_mock = requests_mock.mock(case_sensitive=True)
+        self.requests_mock.start()
+        self.addCleanup(self.requests_mock.stop)
+        patcher = patch('bigboat.deadlines.monotonic', return_value=100.0)
+        self.monotonic = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = Client_v2(self.URL, 'my-api-key', timeouts={
+            'GET status': (1.0, 2.0),
+            'GET instances': 5.0
+        })
+
+    def test_deadline(self) -> None:
+        """
+        Test the deadline context manager.
+        """
+
+        self.assertIsNone(remaining())
+        with deadline(10.0) as end:
+            self.assertEqual(end, 110.0)
+            self.assertEqual(remaining(), 10.0)
+            with deadline(20.0) as inner:
+                self.assertEqual(inner, 110.0)
+            with deadline(2.0) as inner:
+                self.assertEqual(inner, 102.0)
+                self.monotonic.return_value = 103.0
+                self.assertEqual(remaining(), -1.0)
+
+            self.assertEqual(remaining(), 7.0)
+
+        self.assertIsNone(remaining())
+
+    def test_timeouts(self) -> None:
+        """
+        Test connect and read timeouts of API methods.
+        """
+
+        url = f'{self.URL}/api/v2/'
+        self.requests_mock.get(f'{url}status', json=[])
+        self.requests_mock.get(f'{url}instances', json=[])
+        self.requests_mock.get(f'{url}instances/nginx', json={"name": "nginx"})
+        self.requests_mock.put(f'{url}apps/nginx/latest/files/dockerCompose',
+                               status_code=201)
+
+        self.client.statuses()
+        self.client.instances()
+        self.client.get_instance('nginx')
+        self.client.update_compose('nginx', 'latest', 'dockerCompose', '')
+        self.assertEqual([request.timeout
+                          for request in self.requests_mock.request_history],
+                         [(1.0, 2.0), (5.0, 5.0), (10, 15), (10, 60)])
+
+        self.requests_mock.get(f'{self.URL}/api/v1/state/nginx', text='active')
+        Client_v1(self.URL).get_instance('nginx')
+        self.assertEqual(self.requests_mock.request_history[-1].timeout, (10, 15))
+
+    def test_requests(self) -> None:
+        """
+        Test shortening timeouts and stopping requests at the deadline.
+        """
+
+        url = f'{self.URL}/api/v2/'
+        self.requests_mock.get(f'{url}status', json=[])
+        with deadline(1.5):
+            self.client.statuses()
+            self.assertEqual(
+                self.requests_mock.request_history[-1].timeout, (1.0, 1.5)
+            )
+
+            self.monotonic.return_value = 101.5
+            with self.assertRaisesRegex(DeadlineExceeded, 'GET status'):
+                self.client.statuses()
+
+        self.assertEqual(self.requests_mock.call_count, 1)
+
+    def test_retry(self) -> None:
+        """
+        Test that requests are not repeated after the deadline.
+        """
+
+        client = Client_v2(self.URL, 'my-api-key',
+                           retry=RetryPolicy(attempts=5, backoff=1.0,
+                                             jitter=0.0))
+        self.requests_mock.get(f'{self.URL}/api/v2/instances/nginx',
+                               exc=requests.exceptions.ConnectTimeout)
+        def advance(delay: float) -> None:
+            self.monotonic.return_value += delay
+
+        with patch('bigboat.client.sleep', side_effect=advance) as sleep:
+            with deadline(2.5):
+                with self.assertRaises(requests.exceptions.ConnectTimeout):
+                    client.get_instance('nginx')
+
+            sleep.assert_called_once_with(1.0)
+
+        self.assertEqual(self.requests_mock.call_count, 2)
+
+    def test_wait(self) -> None:
+        """
+        Test bounding the polls of waiting for states by the timeout.
+        """
+
+        self.requests_mock.get(f'{self.URL}/api/v2/instances/foo', json={
+            "name": "foo", "state": {"current": "running"}
+        })
+        result = self.client.wait_for_states({'foo': 'running'}, 2.0)
+        self.assertEqual(list(result.keys()), ['foo'])
+        request = self.requests_mock.last_request
+        assert request is not None
+        self.assertEqual(request.timeout, (2.0, 2.0))
+
+    def test_batch(self) -> None:
+        """
+        Test carrying the deadline through batch and wait operations.
+        """
+
+        url = f'{self.URL}/api/v2/instances/'
+        for name in ('foo', 'bar'):
+            self.requests_mock.get(f'{url}{name}', json={
+                "name": name, "state": {"current": "starting"}
+            })
+
+        with deadline(3.0):
+            result = self.client.get_instances(['foo', 'bar'])
+            self.assertEqual(list(result.keys()), ['foo', 'bar'])
+            self.assertEqual([request.timeout for request
+                              in self.requests_mock.request_history],
+                             [(3.0, 3.0), (3.0, 3.0)])
+
+            self.monotonic.return_value = 103.0
+            result = self.client.get_instances(['foo'])
+            self.assertIsInstance(result.failed['foo'], DeadlineExceeded)
+
+            with patch('bigboat.client.sleep') as sleep:
+                self.assertEqual(self.client.wait_for_states({
+                    'foo': 'running'
+                }, 60.0), {})
+                sleep.assert_not_called()
+
+        self.assertEqual(self.requests_mock.call_count, 2)
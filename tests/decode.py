@@ -0,0 +1,86 @@
+"""
+Tests for decoders of JSON responses.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+import requests_mock
+from bigboat.client import Client_v2
+from bigboat.decode import get_decoder
+
+class DecoderTest(unittest.TestCase):
+    """
+    Tests for the selection of a JSON decoder.
+    """
+
+    def test_get_decoder(self) -> None:
+        """
+        Test the get_decoder function.
+        """
+
+        decoder = get_decoder('json')
+        self.assertIs(decoder, json.loads)
+        self.assertEqual(decoder('{"name": "caf\\u00e9"}'.encode('utf-8')),
+                         {'name': 'café'})
+        with self.assertRaises(ValueError):
+            decoder(b'{"name"')
+
+        custom = MagicMock()
+        self.assertIs(get_decoder(custom), custom)
+
+        with self.assertRaisesRegex(ValueError, 'Unknown'):
+            get_decoder('pickle')
+
+    @patch('bigboat.decode.import_module')
+    def test_fallback(self, import_module: MagicMock) -> None:
+        """
+        Test falling back to later backends when libraries are not installed.
+        """
+
+        def load(name: str) -> MagicMock:
+            if name != 'json':
+                raise ImportError(f'No module named {name!r}')
+            return MagicMock(loads=json.loads)
+
+        import_module.side_effect = load
+        self.assertIs(get_decoder(), json.loads)
+        self.assertEqual([args[0] for args, _ in import_module.call_args_list],
+                         ['orjson', 'ujson', 'json'])
+
+        with self.assertRaisesRegex(ValueError, 'not installed'):
+            get_decoder('ujson')
+
+    def test_client(self) -> None:
+        """
+        Test decoding responses of the v2 client with a selected decoder.
+        """
+
+        decoder = MagicMock(side_effect=json.loads)
+        client = Client_v2('http://bigboat.example', 'api-key', decoder=decoder)
+        with requests_mock.Mocker() as mock:
+            mock.get('http://bigboat.example/api/v2/apps',
+                     content=b'[{"name": "nginx", "version": "latest"}]')
+            apps = client.apps()
+
+        self.assertEqual([(app.name, app.version) for app in apps],
+                         [('nginx', 'latest')])
+        decoder.assert_called_once_with(
+            b'[{"name": "nginx", "version": "latest"}]'
+        )
@@ -0,0 +1,153 @@
+"""
+Tests for the client that combines multiple BigBoat dashboards.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import time
+from typing import List, Tuple, cast
+import unittest
+from unittest.mock import patch
+import requests_mock
+from bigboat.client import Client_v1, Client_v2
+from bigboat.deadlines import remaining
+from bigboat.federation import FederatedClient, FederatedResult
+from bigboat.instance import Instance
+
+class FederatedClientTest(unittest.TestCase):
+    """
+    Tests for the client that combines multiple dashboards.
+    """
+
+    FIRST = 'http://first.example'
+    SECOND = 'http://second.example'
+    LEGACY = 'http://legacy.example'
+
+    def setUp(self) -> None:
+        self.requests_mock = requests_mock.mock(case_sensitive=True)
+        self.requests_mock.start()
+        self.addCleanup(self.requests_mock.stop)
+        self.first = Client_v2(self.FIRST, 'first-key')
+        self.second = Client_v2(self.SECOND, 'second-key')
+        self.legacy = Client_v1(self.LEGACY)
+        self.client = FederatedClient([self.first, self.second, self.legacy],
+                                      timeout=1.0, timeouts={self.LEGACY: 0.05})
+
+    def test_init(self) -> None:
+        """
+        Test constructing the federated client.
+        """
+
+        self.assertEqual(list(self.client.clients.keys()),
+                         [self.FIRST, self.SECOND, self.LEGACY])
+        with self.assertRaises(ValueError):
+            FederatedClient([self.first, Client_v1(f'{self.FIRST}/')])
+
+        with patch('requests.Session.close') as close:
+            with self.client as context:
+                self.assertIs(context, self.client)
+
+            self.assertEqual(close.call_count, 3)
+
+    def test_apps(self) -> None:
+        """
+        Test the FederatedClient.apps method.
+        """
+
+        self.requests_mock.get(f'{self.FIRST}/api/v2/apps', json=[
+            {"name": "nginx", "version": "latest"},
+            {"name": "redis", "version": "7"}
+        ])
+        self.requests_mock.get(f'{self.SECOND}/api/v2/apps', status_code=401,
+                               json={"message": "Invalid API key"})
+
+        apps = self.client.apps()
+        self.assertIsInstance(apps, FederatedResult)
+        self.assertEqual(list(apps.keys()), [self.FIRST, self.LEGACY])
+        self.assertEqual([(base_url, app.name) for base_url, app in apps.merged],
+                         [(self.FIRST, 'nginx'), (self.FIRST, 'redis')])
+        self.assertEqual(str(apps.rejected[self.SECOND]), 'Invalid API key')
+
+    def test_instances(self) -> None:
+        """
+        Test the FederatedClient.instances method with a slow dashboard.
+        """
+
+        self.requests_mock.get(f'{self.FIRST}/api/v2/instances', json=[
+            {"name": "nginx", "state": {"current": "running"}}
+        ])
+        self.requests_mock.get(f'{self.SECOND}/api/v2/instances', json=[])
+
+        def slow() -> List[Instance]:
+            time.sleep(0.5)
+            return []
+
+        start = time.monotonic()
+        with patch.object(self.legacy, 'instances', side_effect=slow):
+            instances = self.client.instances()
+
+        self.assertLess(time.monotonic() - start, 0.4)
+        self.assertEqual(list(instances.keys()), [self.FIRST, self.SECOND])
+        self.assertEqual([(base_url, instance.name)
+                          for base_url, instance in instances.merged],
+                         [(self.FIRST, 'nginx')])
+        self.assertEqual(list(instances.failed.keys()), [self.LEGACY])
+
+    def test_deadline(self) -> None:
+        """
+        Test bounding the requests to each dashboard by its timeout.
+        """
+
+        self.requests_mock.get(f'{self.FIRST}/api/v2/instances', json=[])
+        self.requests_mock.get(f'{self.SECOND}/api/v2/instances', json=[])
+        left: List[float] = []
+
+        def bounded() -> List[Instance]:
+            left.append(remaining() or 0.0)
+            return []
+
+        with patch.object(self.legacy, 'instances', side_effect=bounded):
+            self.client.instances()
+
+        self.assertEqual(len(left), 1)
+        self.assertGreater(left[0], 0.0)
+        self.assertLessEqual(left[0], 0.05)
+
+        # The connect and read timeouts of requests end at the deadline.
+        legacy = self.requests_mock.get(f'{self.LEGACY}/api/v1/instances',
+                                        json={'instances': []})
+        self.client.instances()
+        request = legacy.last_request
+        assert request is not None
+        connect, read = cast(Tuple[float, float], request.timeout)
+        self.assertLessEqual(connect, 0.05)
+        self.assertLessEqual(read, 0.05)
+
+    def test_statuses(self) -> None:
+        """
+        Test the FederatedClient.statuses method.
+        """
+
+        self.requests_mock.get(f'{self.FIRST}/api/v2/status',
+                               json=[{"name": "Available IPs", "isOk": True}])
+        self.requests_mock.get(f'{self.SECOND}/api/v2/status', json=[])
+
+        statuses = self.client.statuses()
+        self.assertEqual(statuses.merged, [
+            (self.FIRST, {"name": "Available IPs", "isOk": True})
+        ])
+        self.assertEqual(list(statuses.keys()), [self.FIRST, self.SECOND])
@@ -0,0 +1,207 @@
+"""
+Tests for coalescing of concurrent identical requests.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+from time import sleep
+from typing import Any, Dict, List
+import unittest
+import requests_mock
+from requests_mock.request import _RequestObjectProxy as Request
+from requests_mock.response import _Context as Context
+from bigboat.client import Client_v2
+from bigboat.deadlines import DeadlineExceeded, deadline
+from bigboat.flight import SingleFlight
+
+class SingleFlightTest(unittest.TestCase):
+    """
+    Tests for the coordination of calls by key.
+    """
+
+    def setUp(self) -> None:
+        self.flights = SingleFlight()
+        self.started = Event()
+        self.release = Event()
+        self.executor = ThreadPoolExecutor(max_workers=6)
+        self.addCleanup(self.executor.shutdown)
+
+    def _call(self, value: Any = 'value') -> Any:
+        self.started.set()
+        self.release.wait(5)
+        if isinstance(value, Exception):
+            raise value
+
+        return value
+
+    def test_do(self) -> None:
+        """
+        Test sharing the result of a call in progress.
+        """
+
+        leader = self.executor.submit(self.flights.do, 'apps', self._call)
+        self.assertTrue(self.started.wait(5))
+        followers = [
+            self.executor.submit(self.flights.do, 'apps',
+                                 lambda: self._call('other'))
+            for _ in range(3)
+        ]
+        # Calls for other keys are not blocked by the call in progress.
+        other = self.executor.submit(self.flights.do, 'status', lambda: 'ok')
+        self.assertEqual(other.result(1), 'ok')
+        self.assertFalse(leader.done())
+        self.release.set()
+
+        self.assertEqual(leader.result(5), 'value')
+        self.assertEqual([future.result(5) for future in followers],
+                         ['value'] * 3)
+        self.assertEqual(self.flights.calls, 2)
+        self.assertEqual(self.flights.coalesced, 3)
+
+        # Calls after the call has finished are not shared.
+        self.assertEqual(self.flights.do('apps', lambda: 'new'), 'new')
+
+    def test_error(self) -> None:
+        """
+        Test sharing the error of a call in progress.
+        """
+
+        error = ValueError('Bad request')
+        leader = self.executor.submit(self.flights.do, 'apps',
+                                      lambda: self._call(error))
+        self.assertTrue(self.started.wait(5))
+        follower = self.executor.submit(self.flights.do, 'apps', self._call)
+        self.release.set()
+
+        with self.assertRaises(ValueError):
+            leader.result(5)
+        with self.assertRaises(ValueError):
+            follower.result(5)
+
+    def test_context_error(self) -> None:
+        """
+        Test performing the call again when the call in progress fails due
+        to the context of its caller.
+        """
+
+        error = DeadlineExceeded('Deadline of the leader')
+        leader = self.executor.submit(self.flights.do, 'apps',
+                                      lambda: self._call(error))
+        self.assertTrue(self.started.wait(5))
+        follower = self.executor.submit(self.flights.do, 'apps',
+                                        lambda: 'own')
+        for _ in range(500):
+            if self.flights.coalesced:
+                break
+            sleep(0.01)
+        self.assertEqual(self.flights.coalesced, 1)
+        self.release.set()
+
+        with self.assertRaises(DeadlineExceeded):
+            leader.result(5)
+        self.assertEqual(follower.result(5), 'own')
+        self.assertEqual(self.flights.calls, 2)
+
+    def test_forget(self) -> None:
+        """
+        Test stopping the sharing of calls in progress.
+        """
+
+        leader = self.executor.submit(self.flights.do, 'instances/a',
+                                      self._call)
+        self.assertTrue(self.started.wait(5))
+        self.flights.forget(prefix='instances')
+        self.assertEqual(self.flights.do('instances/a', lambda: 'new'), 'new')
+        self.release.set()
+        self.assertEqual(leader.result(5), 'value')
+        self.assertEqual(self.flights.coalesced, 0)
+
+    def test_deadline(self) -> None:
+        """
+        Test waiting for a call in progress until the deadline.
+        """
+
+        leader = self.executor.submit(self.flights.do, 'apps', self._call)
+        self.assertTrue(self.started.wait(5))
+        with deadline(0.01):
+            with self.assertRaises(DeadlineExceeded):
+                self.flights.do('apps', self._call)
+
+        self.release.set()
+        self.assertEqual(leader.result(5), 'value')
+
+class ClientCoalesceTest(unittest.TestCase):
+    """
+    Tests for coalescing identical GET requests in the v2 client.
+    """
+
+    URL = 'http://bigboat.example'
+    STATUS: List[Dict[str, Any]] = [{"name": "Available IPs", "isOk": True}]
+
+    def setUp(self) -> None:
+        self.started = Event()
+        self.release = Event()
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.addCleanup(self.executor.shutdown)
+
+    def _respond(self, request: Request, context: Context) -> \
+            List[Dict[str, Any]]:
+        # pylint: disable=unused-argument
+        self.started.set()
+        self.release.wait(5)
+        return self.STATUS
+
+    def test_statuses(self) -> None:
+        """
+        Test sharing the response of an identical request in progress.
+        """
+
+        client = Client_v2(self.URL, 'api-key')
+        with requests_mock.Mocker() as mock:
+            route = mock.get(f'{self.URL}/api/v2/status', json=self._respond)
+            leader = self.executor.submit(client.statuses)
+            self.assertTrue(self.started.wait(5))
+            followers = [self.executor.submit(client.statuses)
+                         for _ in range(3)]
+            self.release.set()
+
+            results = [leader.result(5)] + \
+                [future.result(5) for future in followers]
+            self.assertEqual(results, [self.STATUS] * 4)
+            self.assertEqual(route.call_count, 1)
+
+            # Each caller receives its own list.
+            self.assertIsNot(results[0], results[1])
+
+    def test_disabled(self) -> None:
+        """
+        Test performing every request when coalescing is disabled.
+        """
+
+        client = Client_v2(self.URL, 'api-key', coalesce=False)
+        with requests_mock.Mocker() as mock:
+            route = mock.get(f'{self.URL}/api/v2/status', json=self._respond)
+            leader = self.executor.submit(client.statuses)
+            self.assertTrue(self.started.wait(5))
+            follower = self.executor.submit(client.statuses)
+            self.release.set()
+
+            self.assertEqual(leader.result(5), self.STATUS)
+            self.assertEqual(follower.result(5), self.STATUS)
+            self.assertEqual(route.call_count, 2)
@@ -20,6 +20,7 @@ limitations under the License.
 
 import unittest
 from unittest.mock import MagicMock
+import weakref
 from bigboat.client import Client
 from bigboat.application import Application
 from bigboat.instance import Instance
@@ -82,3 +83,45 @@ class ApplicationTest(unittest.TestCase):
                     "parameters={'SETTING': 'value'}, "
                     "options={'storageBucket': 'custom'})")
         self.assertEqual(repr(self.instance), instance)
+
+    def test_slots(self) -> None:
+        """
+        Test that the instance has a compact representation with read-only
+        properties.
+        """
+
+        self.assertFalse(hasattr(self.instance, '__dict__'))
+        self.assertFalse(hasattr(self.application, '__dict__'))
+        self.assertEqual(self.instance.name, 'nginx')
+        self.assertEqual(self.instance.current_state, 'starting')
+        self.assertIs(self.instance.client, self.client)
+        with self.assertRaises(AttributeError):
+            setattr(self.instance, 'name', 'other')
+        with self.assertRaises(AttributeError):
+            setattr(self.instance, 'extra', 'value')
+
+        self.assertIs(weakref.ref(self.instance)(), self.instance)
+
+    def test_services(self) -> None:
+        """
+        Test the service entities of the instance.
+        """
+
+        services = self.instance.get_services()
+        assert services is not None
+        self.assertEqual([(service.name, service.state) for service in services],
+                         [('www', 'starting')])
+        self.assertIs(self.instance.get_service('www'), services[0])
+        self.assertIsNone(self.instance.get_service('db'))
+        self.assertTrue(self.instance.services_in_state('starting'))
+        self.assertFalse(self.instance.services_in_state())
+
+        instance = Instance(self.client, 'nginx', services={
+            'www': {'state': 'running'}, 'db': {'state': 'running'}
+        })
+        self.assertTrue(instance.services_in_state())
+
+        summary = Instance(self.client, 'nginx')
+        self.assertIsNone(summary.get_services())
+        self.assertIsNone(summary.get_service('www'))
+        self.assertFalse(summary.services_in_state())
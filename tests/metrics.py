@@ -0,0 +1,202 @@
+"""
+Tests for instrumentation of requests.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import unittest
+from typing import List, Tuple
+from prometheus_client.parser import text_string_to_metric_families
+import requests
+import requests_mock
+from bigboat.client import Client_v1, Client_v2
+from bigboat.metrics import EndpointMetrics, Histogram, Instrument, RequestInfo
+
+class RecordingInstrument(Instrument):
+    """
+    Instrument which records the calls of its hooks.
+    """
+
+    def __init__(self) -> None:
+        self.calls: List[Tuple[str, RequestInfo]] = []
+
+    def before(self, info: RequestInfo) -> None:
+        self.calls.append(('before', info))
+
+    def after(self, info: RequestInfo) -> None:
+        self.calls.append(('after', info))
+
+class HistogramTest(unittest.TestCase):
+    """
+    Tests for the histogram of observed values.
+    """
+
+    def test_observe(self) -> None:
+        """
+        Test the Histogram.observe method.
+        """
+
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.count, 4)
+        self.assertAlmostEqual(histogram.sum, 2.65)
+        self.assertEqual(histogram.cumulative(),
+                         [(0.1, 2), (1.0, 3), (float('inf'), 4)])
+
+class EndpointMetricsTest(unittest.TestCase):
+    """
+    Tests for the instrumentation of clients.
+    """
+
+    URL = 'http://bigboat.example'
+
+    def setUp(self) -> None:
+        self.recorder = RecordingInstrument()
+        self.metrics = EndpointMetrics(buckets=(0.5, 5.0))
+        self.client = Client_v2(self.URL, 'api-key',
+                                instruments=[self.recorder, self.metrics])
+        self.mock = requests_mock.Mocker()
+        self.mock.start()
+        self.addCleanup(self.mock.stop)
+
+    def test_hooks(self) -> None:
+        """
+        Test calling the hooks of instruments.
+        """
+
+        self.mock.get(f'{self.URL}/api/v2/instances/nginx',
+                      json={'name': 'nginx'})
+        self.mock.get(f'{self.URL}/api/v2/instances/qux', status_code=404)
+        self.mock.get(f'{self.URL}/api/v2/status',
+                      exc=requests.exceptions.ConnectionError)
+
+        self.assertEqual(self.client.instruments,
+                         (self.recorder, self.metrics))
+        instance = self.client.get_instance('nginx')
+        self.assertIsNotNone(instance)
+        self.assertEqual([hook for hook, _ in self.recorder.calls],
+                         ['before', 'after'])
+        info = self.recorder.calls[1][1]
+        self.assertIs(info, self.recorder.calls[0][1])
+        self.assertEqual(info.endpoint, 'GET instances/{name}')
+        self.assertEqual(info.path, 'instances/nginx')
+        self.assertEqual(info.status, 200)
+        self.assertEqual(info.size, len(b'{"name": "nginx"}'))
+        self.assertEqual(info.attempts, 1)
+        self.assertGreater(info.decode, 0.0)
+        self.assertGreaterEqual(info.build, 0.0)
+        self.assertIsNone(info.error)
+        self.assertIn("endpoint='GET instances/{name}'", repr(info))
+
+        self.assertIsNone(self.client.get_instance('qux'))
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.client.statuses()
+
+        info = self.recorder.calls[-1][1]
+        self.assertEqual(info.endpoint, 'GET status')
+        self.assertIsNone(info.status)
+        self.assertIsInstance(info.error, requests.exceptions.ConnectionError)
+
+    def test_batch(self) -> None:
+        """
+        Test instrumenting requests of batch operations and methods without
+        their own scope.
+        """
+
+        for name in ('foo', 'bar'):
+            self.mock.get(f'{self.URL}/api/v2/instances/{name}',
+                          json={'name': name})
+        self.mock.get(f'{self.URL}/api/v2/instances', json=[{'name': 'foo'}])
+
+        self.client.get_instances(['foo', 'bar'], max_workers=2)
+        self.assertEqual(sorted(info.path for hook, info in self.recorder.calls
+                                if hook == 'after'),
+                         ['instances/bar', 'instances/foo'])
+
+        self.assertEqual(len(list(self.client.iter_instances())), 1)
+        self.assertEqual(self.recorder.calls[-1][1].endpoint, 'GET instances')
+
+        client = Client_v1(self.URL, instruments=[self.metrics])
+        self.mock.get(f'{self.URL}/api/v1/state/foo', text='active')
+        client.get_instance('foo')
+        self.assertEqual(self.metrics.snapshot()['GET state/{name}']['requests'],
+                         1)
+
+    def test_metrics(self) -> None:
+        """
+        Test aggregating and exporting metrics of endpoints.
+        """
+
+        self.mock.get(f'{self.URL}/api/v2/instances/nginx',
+                      json={'name': 'nginx'})
+        self.mock.get(f'{self.URL}/api/v2/instances/qux', status_code=404)
+        self.client.get_instance('nginx')
+        self.client.get_instance('qux')
+
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(list(snapshot), ['GET instances/{name}'])
+        metrics = snapshot['GET instances/{name}']
+        self.assertEqual(metrics['requests'], 2)
+        self.assertEqual(metrics['errors'], 1)
+        self.assertEqual(metrics['statuses'], {'200': 1, '404': 1})
+        self.assertEqual(metrics['latency'][-1], (float('inf'), 2))
+        self.assertGreater(metrics['decode_seconds'], 0.0)
+
+        export = self.metrics.export(prefix='test')
+        labels = 'method="GET",route="instances/{name}"'
+        self.assertIn(f'test_requests_total{{{labels}}} 2\n', export)
+        self.assertIn(f'test_errors_total{{{labels}}} 1\n', export)
+        self.assertIn(f'test_request_duration_seconds_bucket{{{labels},'
+                      'le="+Inf"} 2\n', export)
+        self.assertIn(f'test_request_duration_seconds_count{{{labels}}} 2\n',
+                      export)
+
+    def test_export(self) -> None:
+        """
+        Test grouping the samples of each metric family in the export.
+        """
+
+        self.mock.get(f'{self.URL}/api/v2/instances/nginx',
+                      json={'name': 'nginx'})
+        self.mock.get(f'{self.URL}/api/v2/status', json=[])
+        self.client.get_instance('nginx')
+        self.client.statuses()
+
+        families = {
+            family.name: family for family in
+            text_string_to_metric_families(self.metrics.export(prefix='test'))
+        }
+        self.assertEqual({name: family.type
+                          for name, family in families.items()}, {
+            'test_requests': 'counter',
+            'test_errors': 'counter',
+            'test_response_bytes': 'counter',
+            'test_request_duration_seconds': 'histogram'
+        })
+        for family in families.values():
+            routes = {sample.labels['route'] for sample in family.samples}
+            self.assertEqual(routes, {'instances/{name}', 'status'},
+                             family.name)
+
+        counts = [
+            sample.value for sample in
+            families['test_request_duration_seconds'].samples
+            if sample.labels.get('le') == '+Inf'
+        ]
+        self.assertEqual(counts, [1.0, 1.0])
@@ -0,0 +1,200 @@
+"""
+Tests for rate limiting of requests.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import unittest
+from unittest.mock import call, patch
+import requests_mock
+from bigboat.client import Client_v1, Client_v2
+from bigboat.deadlines import DeadlineExceeded, deadline
+from bigboat.ratelimit import RateLimiter, TokenBucket
+
+class TokenBucketTest(unittest.TestCase):
+    """
+    Tests for the token bucket.
+    """
+
+    def test_reserve(self) -> None:
+        """
+        Test the TokenBucket.reserve and TokenBucket.cancel methods.
+        """
+
+        with patch('bigboat.ratelimit.monotonic', return_value=100.0):
+            bucket = TokenBucket(2.0, burst=2)
+
+        self.assertEqual(bucket.rate, 2.0)
+        self.assertEqual(bucket.reserve(100.0), 0.0)
+        self.assertEqual(bucket.reserve(100.0), 0.0)
+        self.assertEqual(bucket.reserve(100.0), 0.5)
+        self.assertEqual(bucket.reserve(100.0), 1.0)
+        bucket.cancel()
+        self.assertEqual(bucket.reserve(100.0), 1.0)
+
+        # Tokens are added over time up to the burst size.
+        self.assertEqual(bucket.reserve(110.0), 0.0)
+        self.assertEqual(bucket.reserve(110.0), 0.0)
+        self.assertEqual(bucket.reserve(110.0), 0.5)
+
+    def test_rate(self) -> None:
+        """
+        Test rejecting a rate that is not positive.
+        """
+
+        with self.assertRaises(ValueError):
+            TokenBucket(0.0)
+
+class RateLimiterTest(unittest.TestCase):
+    """
+    Tests for the rate limiter.
+    """
+
+    def setUp(self) -> None:
+        patcher = patch('bigboat.ratelimit.monotonic', return_value=100.0)
+        self.monotonic = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch('bigboat.ratelimit.sleep')
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_acquire(self) -> None:
+        """
+        Test waiting for the global and class rates.
+        """
+
+        limiter = RateLimiter(rate=10.0, write=2.0)
+        self.assertEqual(limiter.classify('GET'), 'read')
+        self.assertEqual(limiter.classify('PUT'), 'write')
+
+        self.assertEqual(limiter.acquire('PUT'), 0.0)
+        self.assertEqual(limiter.acquire('GET'), 0.1)
+        self.assertEqual(limiter.acquire('DELETE'), 0.5)
+        self.sleep.assert_has_calls([call(0.1), call(0.5)])
+
+        self.assertEqual(limiter.requests, 3)
+        self.assertEqual(limiter.delayed, 2)
+        self.assertEqual(limiter.waiting, 0)
+        self.assertAlmostEqual(limiter.wait_time, 0.6)
+        self.assertEqual(limiter.max_wait, 0.5)
+        self.assertEqual(limiter.rejected, 0)
+
+    def test_kind(self) -> None:
+        """
+        Test classifying a request by its kind instead of its HTTP method.
+        """
+
+        limiter = RateLimiter(write=2.0)
+        self.assertEqual(limiter.acquire('GET', kind=RateLimiter.WRITE), 0.0)
+        self.assertEqual(limiter.acquire('GET', kind=RateLimiter.WRITE), 0.5)
+        self.assertEqual(limiter.acquire('GET'), 0.0)
+        self.assertEqual(limiter.requests, 2)
+
+    def test_unlimited(self) -> None:
+        """
+        Test performing requests of a class without a rate immediately.
+        """
+
+        limiter = RateLimiter(write=1.0)
+        for _ in range(5):
+            self.assertEqual(limiter.acquire('GET'), 0.0)
+
+        self.sleep.assert_not_called()
+        self.assertEqual(limiter.requests, 0)
+
+    def test_deadline(self) -> None:
+        """
+        Test rejecting requests that would wait until after the deadline.
+        """
+
+        limiter = RateLimiter(read=1.0)
+        limiter.acquire('GET')
+        with patch('bigboat.ratelimit.remaining', return_value=0.5):
+            with self.assertRaises(DeadlineExceeded):
+                limiter.acquire('GET')
+
+        self.assertEqual(limiter.rejected, 1)
+        # The token of the rejected request is available again.
+        self.assertEqual(limiter.acquire('GET'), 1.0)
+
+class ClientRateLimitTest(unittest.TestCase):
+    """
+    Tests for rate limiting the requests of clients.
+    """
+
+    URL = 'http://bigboat.example'
+
+    def setUp(self) -> None:
+        patcher = patch('bigboat.ratelimit.sleep')
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_client_v2(self) -> None:
+        """
+        Test delaying the writes of the v2 client.
+        """
+
+        limiter = RateLimiter(write=1.0)
+        client = Client_v2(self.URL, 'api-key', limiter=limiter)
+        with requests_mock.Mocker() as mock:
+            mock.put(f'{self.URL}/api/v2/instances/foo', status_code=201,
+                     json={'name': 'foo', 'state': {}})
+            mock.get(f'{self.URL}/api/v2/status', json=[])
+            for _ in range(3):
+                client.update_instance('foo', 'app', '1.0')
+                client.statuses()
+
+        self.assertEqual(limiter.requests, 3)
+        self.assertEqual(limiter.delayed, 2)
+        self.assertEqual(self.sleep.call_count, 2)
+
+    def test_client_v1(self) -> None:
+        """
+        Test delaying the requests of the v1 client.
+        """
+
+        limiter = RateLimiter(rate=5.0)
+        client = Client_v1(self.URL, limiter=limiter)
+        with requests_mock.Mocker() as mock:
+            mock.get(f'{self.URL}/api/v1/state/foo', text='active')
+            with deadline(10.0):
+                client.get_instance('foo')
+                client.get_instance('foo')
+
+        self.assertEqual(limiter.requests, 2)
+        self.assertEqual(limiter.delayed, 1)
+
+    def test_client_v1_writes(self) -> None:
+        """
+        Test delaying starting and stopping instances with the v1 client,
+        which uses GET requests for them.
+        """
+
+        limiter = RateLimiter(write=1.0)
+        client = Client_v1(self.URL, limiter=limiter)
+        with requests_mock.Mocker() as mock:
+            mock.get(f'{self.URL}/api/v1/start-app/app/1.0/foo', text='')
+            mock.get(f'{self.URL}/api/v1/stop-app/foo', text='')
+            mock.get(f'{self.URL}/api/v1/state/foo', text='active')
+            for _ in range(3):
+                client.update_instance('foo', 'app', '1.0')
+                client.delete_instance('foo')
+                client.get_instance('foo')
+
+        self.assertEqual(limiter.requests, 6)
+        self.assertEqual(limiter.delayed, 5)
+        self.assertEqual(self.sleep.call_count, 5)
@@ -0,0 +1,175 @@
+"""
+Tests for policies for handling transient failures of requests.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import unittest
+from unittest.mock import call, patch
+import requests
+import requests_mock
+from bigboat.client import Client_v2
+from bigboat.retry import CircuitBreaker, CircuitOpenError, RetryPolicy
+
+class RetryPolicyTest(unittest.TestCase):
+    """
+    Tests for the policy for repeating requests.
+    """
+
+    def test_allows(self) -> None:
+        """
+        Test the RetryPolicy.allows method.
+        """
+
+        policy = RetryPolicy()
+        self.assertEqual(policy.attempts, 3)
+        self.assertTrue(policy.allows('GET', 'apps'))
+        self.assertTrue(policy.allows('DELETE', 'apps/{name}/{version}'))
+        self.assertTrue(policy.allows('PUT', 'instances/{name}'))
+        self.assertFalse(policy.allows('PUT', 'apps/{name}/{version}'))
+        self.assertFalse(policy.allows('POST', 'instances'))
+
+    def test_delays(self) -> None:
+        """
+        Test the RetryPolicy.delays method.
+        """
+
+        policy = RetryPolicy(backoff=1.0, max_backoff=3.0, jitter=0.5)
+        with patch('bigboat.utils.random.uniform', return_value=1.0):
+            delays = policy.delays()
+            self.assertEqual([next(delays) for _ in range(3)], [1.5, 3.0, 4.5])
+
+class CircuitBreakerTest(unittest.TestCase):
+    """
+    Tests for the circuit breaker.
+    """
+
+    def setUp(self) -> None:
+        patcher = patch('bigboat.retry.monotonic', return_value=100.0)
+        self.monotonic = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_breaker(self) -> None:
+        """
+        Test opening, trialing and closing the circuit.
+        """
+
+        breaker = CircuitBreaker(threshold=2, reset_timeout=10.0)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        breaker.check()
+        breaker.record(True)
+        breaker.record(False)
+        self.assertEqual(breaker.failures, 0)
+
+        breaker.record(True)
+        breaker.record(True)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaisesRegex(CircuitOpenError, 'after 2 failures'):
+            breaker.check()
+
+        self.monotonic.return_value = 110.0
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        breaker.check()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.check()
+
+        # A failed trial opens the circuit for another reset timeout.
+        breaker.record(True)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.monotonic.return_value = 119.0
+        with self.assertRaises(CircuitOpenError):
+            breaker.check()
+
+        self.monotonic.return_value = 120.0
+        breaker.check()
+        breaker.record(False)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(breaker.failures, 0)
+
+class ClientRetryTest(unittest.TestCase):
+    """
+    Tests for handling transient failures in a client.
+    """
+
+    URL = 'http://dashboard.example'
+
+    def setUp(self) -> None:
+        self.requests_mock = requests_mock.mock(case_sensitive=True)
+        self.requests_mock.start()
+        self.addCleanup(self.requests_mock.stop)
+
+    def test_retry(self) -> None:
+        """
+        Test repeating idempotent requests according to a retry policy.
+        """
+
+        client = Client_v2(self.URL, 'my-api-key',
+                           retry=RetryPolicy(attempts=3, jitter=0.0))
+        url = f'{self.URL}/api/v2/'
+        self.requests_mock.get(f'{url}instances/nginx', [
+            {'exc': requests.exceptions.ConnectTimeout},
+            {'status_code': 503, 'text': 'Service Unavailable'},
+            {'json': {"name": "nginx"}}
+        ])
+        self.requests_mock.delete(f'{url}instances/nginx', [
+            {'exc': requests.exceptions.ConnectionError}
+        ] * 3)
+        self.requests_mock.put(f'{url}apps/nginx/latest', [
+            {'exc': requests.exceptions.ConnectionError},
+            {'json': {"name": "nginx", "version": "latest"}}
+        ])
+
+        with patch('bigboat.client.sleep') as sleep:
+            instance = client.get_instance('nginx')
+            assert instance is not None
+            self.assertEqual(instance.name, 'nginx')
+            sleep.assert_has_calls([call(0.5), call(1.0)])
+
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                client.delete_instance('nginx')
+
+            # Updating an application is not idempotent.
+            self.assertIsNone(client.update_app('nginx', 'latest'))
+
+        self.assertEqual(self.requests_mock.call_count, 7)
+
+    def test_breaker(self) -> None:
+        """
+        Test failing fast with a circuit breaker.
+        """
+
+        breaker = CircuitBreaker(threshold=2, reset_timeout=30.0)
+        client = Client_v2(self.URL, 'my-api-key', breaker=breaker)
+        url = f'{self.URL}/api/v2/'
+        self.requests_mock.get(f'{url}status', [
+            {'exc': requests.exceptions.ReadTimeout},
+            {'status_code': 504, 'text': 'Gateway Timeout'}
+        ])
+        self.requests_mock.put(f'{url}apps/nginx/latest',
+                               json={"name": "nginx", "version": "latest"})
+
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            client.statuses()
+        with self.assertRaises(ValueError):
+            client.statuses()
+
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            client.get_instance('nginx')
+        self.assertIsNone(client.update_app('nginx', 'latest'))
+        self.assertEqual(self.requests_mock.call_count, 2)
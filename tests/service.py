@@ -0,0 +1,79 @@
+"""
+Tests for service entity from the API.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import unittest
+from unittest.mock import MagicMock
+from bigboat.client import Client
+from bigboat.service import Service
+
+class ServiceTest(unittest.TestCase):
+    """
+    Tests for the service entity of an instance.
+    """
+
+    def setUp(self) -> None:
+        self.client = MagicMock(spec_set=Client)
+        self.service = Service.from_payload(self.client, 'www', {
+            'state': 'running',
+            'errors': [],
+            'container': {'id': 'c0ffee', 'name': 'nginx-www'},
+            'ports': ['80/tcp', '443/tcp']
+        })
+
+    def test_from_payload(self) -> None:
+        """
+        Test the Service.from_payload method.
+        """
+
+        self.assertEqual(self.service.name, 'www')
+        self.assertEqual(self.service.state, 'running')
+        self.assertEqual(self.service.container, 'c0ffee')
+        self.assertEqual(self.service.ports, ('80/tcp', '443/tcp'))
+        self.assertIs(self.service.client, self.client)
+
+        other = Service.from_payload(self.client, 'www',
+                                     {'state': ''.join(['runn', 'ing'])})
+        self.assertIs(other.state, self.service.state)
+
+        service = Service.from_payload(self.client, 'db',
+                                       {'container': None, 'ports': 'bad'})
+        self.assertIsNone(service.state)
+        self.assertIsNone(service.container)
+        self.assertEqual(service.ports, ())
+
+    def test_update(self) -> None:
+        """
+        Test the Service.update and Service.delete methods.
+        """
+
+        with self.assertRaises(TypeError):
+            self.service.update()
+        with self.assertRaises(TypeError):
+            self.service.delete()
+
+    def test_repr(self) -> None:
+        """
+        Test the Service.__repr__ method.
+        """
+
+        self.assertEqual(repr(self.service),
+                         "Service(name='www', state='running', "
+                         "container='c0ffee', ports=('80/tcp', '443/tcp'))")
+        self.assertFalse(hasattr(self.service, '__dict__'))
@@ -0,0 +1,141 @@
+"""
+Tests for pools of HTTP sessions.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+import unittest
+from unittest.mock import patch
+from requests import Response, Session
+from requests.adapters import HTTPAdapter
+import requests_mock
+from benchmarks.server import FakeServer, fleet_routes
+from bigboat.client import Client_v2
+from bigboat.session import SessionPool
+
+class SessionPoolTest(unittest.TestCase):
+    """
+    Tests for the pool of sessions.
+    """
+
+    URL = 'http://bigboat.example/api/v2/status'
+
+    def setUp(self) -> None:
+        self.adapter = HTTPAdapter()
+        self.pool = SessionPool(self.adapter, headers={'api-key': 'key'},
+                                size=2)
+
+    def test_request(self) -> None:
+        """
+        Test performing requests with sessions from the pool.
+        """
+
+        with requests_mock.Mocker() as mock:
+            route = mock.get(self.URL, json=[])
+            mock.put(self.URL, status_code=201)
+            mock.delete(self.URL, status_code=204)
+            self.assertEqual(self.pool.get(self.URL).json(), [])
+            self.assertEqual(self.pool.get(self.URL,
+                                           headers={'X-Test': '1'}).json(), [])
+            self.assertEqual(self.pool.put(self.URL).status_code, 201)
+            self.assertEqual(self.pool.delete(self.URL).status_code, 204)
+
+            self.assertEqual(route.request_history[0].headers['api-key'],
+                             'key')
+            self.assertEqual(route.request_history[1].headers['X-Test'], '1')
+            # Headers of a request do not remain in the session.
+            self.assertNotIn('X-Test', route.request_history[0].headers)
+
+        self.assertEqual(self.pool.created, 1)
+        self.assertEqual(self.pool.idle, 1)
+
+    def test_concurrent(self) -> None:
+        """
+        Test creating and keeping sessions for concurrent requests.
+        """
+
+        barrier = Barrier(4)
+        response = Response()
+        response.status_code = 200
+
+        def wait(session: Session, method: str, url: str) -> Response:
+            # pylint: disable=unused-argument
+            barrier.wait(5)
+            return response
+
+        with patch.object(Session, 'request', autospec=True,
+                          side_effect=wait):
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                responses = list(executor.map(self.pool.get, [self.URL] * 4))
+
+        self.assertEqual(responses, [response] * 4)
+        self.assertEqual(self.pool.created, 4)
+        self.assertEqual(self.pool.idle, 2)
+
+    def test_close(self) -> None:
+        """
+        Test closing the shared adapter.
+        """
+
+        with requests_mock.Mocker() as mock:
+            mock.get(self.URL, json=[])
+            self.pool.get(self.URL)
+
+        with patch.object(self.adapter, 'close') as close:
+            self.pool.close()
+            close.assert_called_once_with()
+
+        self.assertEqual(self.pool.idle, 0)
+
+class ThreadSafeClientTest(unittest.TestCase):
+    """
+    Stress test of a thread-safe client used by many threads.
+    """
+
+    THREADS = 16
+    CALLS = 400
+
+    def test_stress(self) -> None:
+        """
+        Test whether many threads receive correct results from one client.
+        """
+
+        routes = fleet_routes(instances=20, statuses=5)
+        with FakeServer(routes) as server, \
+                Client_v2(server.url, 'api-key', pool_maxsize=self.THREADS,
+                          coalesce=False, thread_safe=True) as client:
+            def call(index: int) -> bool:
+                if index % 3 == 0:
+                    return len(client.instances()) == 20
+                if index % 3 == 1:
+                    return len(client.statuses()) == 5
+
+                instance = client.update_instance('instance-0', 'app-0',
+                                                  '1.0')
+                return instance is not None and instance.name == 'instance-0'
+
+            with ThreadPoolExecutor(max_workers=self.THREADS) as executor:
+                results = list(executor.map(call, range(self.CALLS)))
+
+            self.assertEqual(results, [True] * self.CALLS)
+
+        pool = client._session # pylint: disable=protected-access
+        self.assertIsInstance(pool, SessionPool)
+        if isinstance(pool, SessionPool):
+            self.assertLessEqual(pool.created, self.THREADS)
@@ -0,0 +1,130 @@
+"""
+Tests for incremental parsing of streamed responses.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import json
+from typing import Any, List
+import unittest
+import requests_mock
+from bigboat.client import Client_v1, Client_v2
+from bigboat.stream import JSONArrayParser, iter_json_array
+
+class JSONArrayParserTest(unittest.TestCase):
+    """
+    Tests for the incremental parser of JSON arrays.
+    """
+
+    DATA: List[Any] = [
+        {"name": "é€\U0001f600", "count": 12345},
+        1, [2, 3], "x", None, 1.5e10, True, -0.5
+    ]
+
+    def test_chunks(self) -> None:
+        """
+        Test parsing a JSON array split into chunks of various sizes.
+        """
+
+        data = json.dumps(self.DATA).encode('utf-8')
+        for size in (1, 2, 3, 7, len(data)):
+            with self.subTest(size=size):
+                chunks = [data[i:i + size] for i in range(0, len(data), size)]
+                self.assertEqual(list(iter_json_array(chunks)), self.DATA)
+
+        self.assertEqual(list(iter_json_array([b' [ ', b'\n] '])), [])
+
+    def test_feed(self) -> None:
+        """
+        Test providing elements as soon as they are complete.
+        """
+
+        parser = JSONArrayParser()
+        self.assertEqual(parser.feed(b'[{"name": "foo"}, {"na'), [
+            {"name": "foo"}
+        ])
+        self.assertEqual(parser.feed(b'me": "bar"}, 12'), [{"name": "bar"}])
+        self.assertEqual(parser.feed(b'3, 4'), [123])
+        self.assertEqual(parser.feed(b']'), [4])
+        self.assertEqual(parser.close(), [])
+
+    def test_invalid(self) -> None:
+        """
+        Test parsing invalid JSON arrays.
+        """
+
+        invalid = {
+            b'{}': 'Expected a JSON array',
+            b'': 'Incomplete JSON array',
+            b'[1,': 'Incomplete JSON array',
+            b'[1 2]': "Expected a comma or end of JSON array, found '2'",
+            b'[1.]': "found '.'",
+            b'[{"a":': 'Expecting value',
+            b'[1] x': 'Unexpected data after JSON array'
+        }
+        for data, message in invalid.items():
+            with self.subTest(data=data):
+                with self.assertRaisesRegex(ValueError, message):
+                    list(iter_json_array([data]))
+
+class IterInstancesTest(unittest.TestCase):
+    """
+    Tests for retrieving instances one by one.
+    """
+
+    URL = 'http://dashboard.example'
+
+    def setUp(self) -> None:
+        self.requests_mock = requests_mock.mock(case_sensitive=True)
+        self.requests_mock.start()
+        self.addCleanup(self.requests_mock.stop)
+
+    def test_v2(self) -> None:
+        """
+        Test the Client_v2.iter_instances method.
+        """
+
+        client = Client_v2(self.URL, 'my-api-key')
+        url = f'{self.URL}/api/v2/instances'
+        self.requests_mock.get(url, json=[
+            {"name": "nginx", "state": {"current": "running"}},
+            {"name": "redis", "app": {"name": "redis", "version": "7"}}
+        ])
+
+        instances = client.iter_instances(chunk_size=8)
+        self.assertEqual(self.requests_mock.call_count, 0)
+        first = next(instances)
+        self.assertEqual(first.name, 'nginx')
+        self.assertEqual(first.current_state, 'running')
+        self.assertEqual(self.requests_mock.call_count, 1)
+        self.assertEqual([instance.name for instance in instances], ['redis'])
+
+        self.requests_mock.get(url, status_code=401,
+                               json={"message": "Invalid API key"})
+        with self.assertRaisesRegex(ValueError, 'Invalid API key'):
+            next(client.iter_instances())
+
+    def test_v1(self) -> None:
+        """
+        Test the Client.iter_instances method for the v1 client.
+        """
+
+        client = Client_v1(self.URL)
+        self.requests_mock.get(f'{self.URL}/api/v1/instances',
+                               json={"instances": ["nginx", "redis"]})
+        self.assertEqual([instance.name for instance in client.iter_instances()],
+                         ['nginx', 'redis'])
@@ -20,7 +20,8 @@ limitations under the License.
 
 from typing import Any
 import unittest
-from bigboat.utils import readonly
+from unittest.mock import patch
+from bigboat.utils import Backoff, readonly
 
 @readonly(['name', 'version'], rest='other')
 class Item:
@@ -60,3 +61,19 @@ class Utils_Test(unittest.TestCase):
         self.assertEqual(item.get(), 'foo')
         with self.assertRaises(AttributeError):
             dummy = item.nonexistent
+
+    def test_backoff(self) -> None:
+        """
+        Test the Backoff iterator.
+        """
+
+        backoff = Backoff(0.5, 3.0)
+        self.assertEqual([next(backoff) for _ in range(5)],
+                         [0.5, 1.0, 2.0, 3.0, 3.0])
+        backoff.reset()
+        self.assertEqual(next(backoff), 0.5)
+
+        with patch('random.uniform', side_effect=[1.0, -1.0, 0.0]):
+            backoff = Backoff(1.0, 10.0, factor=3.0, jitter=0.5)
+            self.assertEqual([next(backoff) for _ in range(3)],
+                             [1.5, 1.5, 9.0])
@@ -0,0 +1,167 @@
+"""
+Tests for watcher that detects changes to the live instances.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import unittest
+from typing import Optional
+from unittest.mock import MagicMock, call, patch
+from requests.exceptions import ConnectionError as ConnectError
+from bigboat.batch import BatchResult
+from bigboat.client import Client
+from bigboat.instance import Instance
+from bigboat.watch import InstanceChanges, InstanceWatcher, StateWaiter
+
+class InstanceWatcherTest(unittest.TestCase):
+    """
+    Tests for the watcher of live instances.
+    """
+
+    def setUp(self) -> None:
+        self.client = MagicMock(spec_set=Client)
+        patcher = patch('bigboat.watch.sleep')
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _instance(self, name: str, state: str = 'running') -> Instance:
+        return Instance(self.client, name, current_state=state,
+                        desired_state='running',
+                        services={'www': {'state': state}})
+
+    def test_poll(self) -> None:
+        """
+        Test the InstanceWatcher.poll method.
+        """
+
+        first = self._instance('foo')
+        second = self._instance('bar', 'starting')
+        self.client.instances.side_effect = [
+            [first, second],
+            [first, self._instance('bar', 'starting')],
+            [self._instance('foo'), self._instance('bar'),
+             self._instance('baz')],
+            [self._instance('baz', 'stopping')]
+        ]
+
+        watcher = InstanceWatcher(self.client)
+        self.assertEqual(watcher.poll(),
+                         InstanceChanges([first, second], [], []))
+        self.assertFalse(watcher.poll())
+
+        changes = watcher.poll()
+        self.assertEqual([instance.name for instance in changes.added],
+                         ['baz'])
+        self.assertEqual(changes.removed, [])
+        self.assertEqual([(earlier.current_state, instance.current_state)
+                          for earlier, instance in changes.changed],
+                         [('starting', 'running')])
+
+        changes = watcher.poll()
+        self.assertEqual(changes.added, [])
+        self.assertEqual([instance.name for instance in changes.removed],
+                         ['foo', 'bar'])
+        self.assertEqual([instance.services for _, instance in changes.changed],
+                         [{'www': {'state': 'stopping'}}])
+
+    def test_iterate(self) -> None:
+        """
+        Test iterating over changes with backoff of the poll interval.
+        """
+
+        first = self._instance('foo')
+        self.client.instances.side_effect = [
+            [first], [first], [first], [first], [], [], [self._instance('bar')]
+        ]
+
+        watcher = Client.watch_instances(self.client, interval=1.0,
+                                         max_interval=3.0)
+        self.assertEqual(next(watcher).added, [first])
+        self.sleep.assert_not_called()
+
+        self.assertEqual(next(watcher).removed, [first])
+        self.sleep.assert_has_calls([call(1.0), call(2.0), call(3.0),
+                                     call(3.0)])
+
+        self.sleep.reset_mock()
+        self.assertEqual(len(next(watcher).added), 1)
+        self.sleep.assert_has_calls([call(1.0), call(2.0)])
+        self.client.instances.assert_called_with(services=True)
+
+        watcher = Client.watch_instances(self.client, services=False)
+        self.client.instances.side_effect = [[first]]
+        watcher.poll()
+        self.client.instances.assert_called_with(services=False)
+
+class StateWaiterTest(unittest.TestCase):
+    """
+    Tests for the tracker of instances that should reach target states.
+    """
+
+    def setUp(self) -> None:
+        self.client = MagicMock(spec_set=Client)
+        patcher = patch('bigboat.watch.monotonic', return_value=0.0)
+        self.monotonic = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch('bigboat.utils.random.uniform', return_value=0.0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _poll(self, **states: Optional[str]) -> BatchResult[Optional[Instance]]:
+        result: BatchResult[Optional[Instance]] = BatchResult()
+        for name, state in states.items():
+            if state is None:
+                result[name] = None
+            else:
+                result[name] = Instance(self.client, name, current_state=state)
+
+        return result
+
+    def test_update(self) -> None:
+        """
+        Test the StateWaiter.update method.
+        """
+
+        waiter = StateWaiter({'foo': 'running', 'bar': 'stopped'}, 10.0,
+                             interval=1.0, max_interval=3.0)
+        self.assertEqual(waiter.pending, ['foo', 'bar'])
+        self.assertEqual(waiter.update(self._poll(foo='starting', bar=None)),
+                         1.0)
+        self.assertEqual(waiter.update(self._poll(foo='starting', bar=None)),
+                         2.0)
+
+        result = self._poll(foo='running')
+        result.add_error('bar', ConnectError('Connection refused'))
+        self.assertEqual(waiter.update(result), 1.0)
+        self.assertEqual(waiter.pending, ['bar'])
+        self.assertEqual(list(waiter.reached.keys()), ['foo'])
+
+        self.monotonic.return_value = 9.5
+        self.assertEqual(waiter.update(self._poll(bar='running')), 0.5)
+        self.monotonic.return_value = 10.0
+        self.assertIsNone(waiter.update(self._poll(bar='stopping')))
+        self.assertEqual(waiter.pending, ['bar'])
+
+        waiter = StateWaiter({'foo': 'running'}, 10.0)
+        self.assertIsNone(waiter.update(self._poll(foo='running')))
+        instance = waiter.reached['foo']
+        self.assertEqual(instance.current_state, 'running')
+
+        result = self._poll()
+        result.add_error('foo', ValueError('No API key'))
+        with self.assertRaisesRegex(ValueError, 'No API key'):
+            waiter.update(result)